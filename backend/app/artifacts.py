@@ -0,0 +1,182 @@
+# backend/app/artifacts.py
+"""
+Compact, pickle-free model artifacts.
+
+PCA + a binary linear classifier is one affine map on the raw features, so a
+bundle is exported as an uncompressed .npz next to its .pkl:
+
+  weights         (n_features,) float64   fused PCA / classifier weights
+  bias            ()            float64
+  spatial_filter  (n_channels, n_filters) only for xDAWN subject models
+  meta            JSON string: feature_set, auc, version, ... (no pickle)
+
+p(target) = sigmoid(X @ weights + bias). Loading memory-maps the members
+straight out of the zip (numpy + stdlib only, no sklearn / joblib), so
+workers share the pages and a load costs a few syscalls.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from app.features import DEFAULT_FEATURE_SET
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_SUFFIX = ".npz"
+
+_NPY_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+
+
+# =============================================================================
+# 1️⃣  Fusing PCA + linear model
+# =============================================================================
+def fuse_weights(pca, model):
+    """
+    Folds PCA + linear model into one decision function on raw features:
+    w.P(x - mu) + b  ==  coef . x + intercept
+    """
+    w = model.coef_.ravel()
+    if pca is None:
+        return w.astype(np.float64), float(model.intercept_[0])
+    components = pca.components_
+    if getattr(pca, "whiten", False):
+        components = components / np.sqrt(pca.explained_variance_)[:, np.newaxis]
+    coef = components.T @ w
+    intercept = float(model.intercept_[0] - coef @ pca.mean_)
+    return coef, intercept
+
+
+def sigmoid(z):
+    # tanh form: no overflow warnings for large |z|
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def _json_meta(bundle):
+    """Scalar / list metadata of a bundle (estimators and arrays are dropped)."""
+    meta = {}
+    for key, value in bundle.items():
+        if key in ("model", "pca", "spatial_filter", "weights", "bias"):
+            continue
+        if isinstance(value, np.generic):
+            value = value.item()
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        meta[key] = value
+    return meta
+
+
+# =============================================================================
+# 2️⃣  Export
+# =============================================================================
+def artifact_path(pkl_path):
+    return Path(pkl_path).with_suffix(ARTIFACT_SUFFIX)
+
+
+def export_artifact(bundle, path):
+    """Writes the fused artifact for a fitted bundle (atomically) and returns its path."""
+    path = Path(path)
+    weights, bias = fuse_weights(bundle.get("pca"), bundle["model"])
+    meta = {
+        **_json_meta(bundle),
+        "feature_set": bundle.get("feature_set", DEFAULT_FEATURE_SET),
+        "n_features": int(weights.shape[0]),
+        "format": ARTIFACT_FORMAT,
+        "exported_at": datetime.utcnow().isoformat(),
+    }
+    arrays = {
+        "weights": np.ascontiguousarray(weights, dtype=np.float64),
+        "bias": np.array(bias, dtype=np.float64),
+        "meta": np.array(json.dumps(meta)),
+    }
+    if bundle.get("spatial_filter") is not None:
+        arrays["spatial_filter"] = np.ascontiguousarray(bundle["spatial_filter"], dtype=np.float64)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)  # uncompressed: members stay mmap-able
+    os.replace(tmp_path, path)
+    return path
+
+
+# =============================================================================
+# 3️⃣  Memory-mapped load
+# =============================================================================
+def _mmap_npz(path):
+    """{name: read-only array} backed by one mmap of an uncompressed .npz."""
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+
+    arrays = {}
+    for info in infos:
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{path}: member {info.filename} is compressed, cannot memory-map")
+        # local file header: 30 fixed bytes, then file name and extra field
+        name_len, extra_len = struct.unpack("<HH", buf[info.header_offset + 26: info.header_offset + 30])
+        start = info.header_offset + 30 + name_len + extra_len
+
+        header = io.BytesIO(buf[start: start + min(info.file_size, 4096)])
+        version = np.lib.format.read_magic(header)
+        shape, fortran_order, dtype = _NPY_HEADER_READERS[version](header)
+        arrays[info.filename.removesuffix(".npy")] = np.ndarray(
+            shape, dtype=dtype, buffer=buf, offset=start + header.tell(), order="F" if fortran_order else "C"
+        )
+    return arrays
+
+
+def load_artifact(path):
+    """
+    Serving bundle from a fused artifact:
+    {'weights', 'bias', 'spatial_filter'?, 'feature_set', 'auc', ...}.
+    """
+    arrays = _mmap_npz(path)
+    meta = json.loads(str(arrays.pop("meta")[()]))
+    if meta.get("format", ARTIFACT_FORMAT) > ARTIFACT_FORMAT:
+        raise ValueError(f"{path}: artifact format {meta['format']} is newer than this server")
+    bundle = {**meta, "weights": arrays.pop("weights"), "bias": float(arrays.pop("bias")[()])}
+    bundle.update(arrays)  # spatial_filter, if any
+    return bundle
+
+
+def predict_fused(bundle, X):
+    return sigmoid(X @ bundle["weights"] + bundle["bias"])
+
+
+# =============================================================================
+# ▶️  Convert existing .pkl bundles
+# =============================================================================
+def convert_models(models_dir):
+    """Exports an artifact for every *_model.pkl under models_dir (skips versions/)."""
+    import joblib
+
+    written = []
+    for pkl_path in sorted(Path(models_dir).rglob("*_model.pkl")):
+        if "versions" in pkl_path.parts:
+            continue
+        written.append(export_artifact(joblib.load(pkl_path), artifact_path(pkl_path)))
+        print(f"💾 {pkl_path.name} → {written[-1].name}")
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export fused .npz artifacts for existing .pkl model bundles")
+    parser.add_argument(
+        "--models-dir", default=str(Path(__file__).resolve().parents[2] / "models"), help="Searched recursively"
+    )
+    args = parser.parse_args()
+    convert_models(args.models_dir)
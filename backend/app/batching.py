@@ -0,0 +1,205 @@
+# backend/app/batching.py
+"""
+Micro-batching for concurrent predict requests.
+
+Sync endpoints run in the threadpool; instead of each calling
+predict_with_model, they submit (bundle, X) to one scheduler thread per
+process. Whenever it is free, the thread takes every request queued so far
+(up to NEUROSENSE_BATCH_MAX_ROWS rows), groups them by model bundle, runs one
+stacked predict per model and hands every caller its own slice back.
+
+A lone request is dispatched at once; requests only coalesce while a batch is
+in flight. NEUROSENSE_BATCH_MAX_WAIT_MS > 0 additionally lingers that long
+for more requests, but only when the queue was already non-empty (under load).
+NEUROSENSE_BATCHING=0 disables batching.
+
+The model call runs in the first caller's contextvars, so its stage
+histograms keep that request's endpoint / model type labels. Profiled
+requests, inputs with the wrong column count and requests whose batch does not
+come back within NEUROSENSE_BATCH_TIMEOUT_S are predicted on the caller's
+thread instead. Batch sizes, queueing time and fallbacks are exported as
+neurosense_batch_* metrics.
+"""
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+
+from app.metrics import (
+    BATCH_FALLBACKS,
+    BATCH_MAX_ROWS,
+    BATCH_MAX_WAIT_SECONDS,
+    BATCH_QUEUE_SECONDS,
+    BATCH_REQUESTS,
+    BATCH_ROWS,
+    stage,
+)
+from app.models_serving import FeatureSetMismatch, bundle_feature_set, predict_with_model
+from app.profiling import profiling_active
+
+ENABLED = os.getenv("NEUROSENSE_BATCHING", "1") != "0"
+MAX_WAIT_MS = float(os.getenv("NEUROSENSE_BATCH_MAX_WAIT_MS", "0"))
+MAX_ROWS = int(os.getenv("NEUROSENSE_BATCH_MAX_ROWS", "32768"))
+TIMEOUT_S = float(os.getenv("NEUROSENSE_BATCH_TIMEOUT_S", "5"))
+
+_STOP = object()
+
+
+def bundle_n_features(bundle):
+    """Columns the bundle expects (None when it cannot tell)."""
+    if "weights" in bundle:
+        return int(bundle["weights"].shape[0])
+    for key in ("pca", "PCA", "model", "clf", "estimator"):
+        n = getattr(bundle.get(key), "n_features_in_", None)
+        if n is not None:
+            return int(n)
+    return None
+
+
+class _Request:
+    __slots__ = ("bundle", "X", "future", "context", "submitted")
+
+    def __init__(self, bundle, X):
+        self.bundle = bundle
+        self.X = X
+        self.future = Future()
+        self.context = contextvars.copy_context()  # metrics labels of the calling request
+        self.submitted = time.perf_counter()
+
+
+class InferenceBatcher:
+    def __init__(self, max_wait_ms=MAX_WAIT_MS, max_rows=MAX_ROWS, timeout_s=TIMEOUT_S, enabled=ENABLED):
+        self.enabled = enabled
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_rows = max_rows
+        self.timeout = timeout_s
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        BATCH_MAX_WAIT_SECONDS.set(self.max_wait)
+        BATCH_MAX_ROWS.set(max_rows)
+
+    # ---- callers ----------------------------------------------------------
+    def predict(self, bundle, X, feature_set: str = None):
+        """Same contract as predict_with_model, but may share a model call with other requests."""
+        if feature_set is not None and feature_set != bundle_feature_set(bundle):
+            raise FeatureSetMismatch(f"Model expects feature set '{bundle_feature_set(bundle)}', got '{feature_set}'")
+        X = np.asarray(X)
+        if not self.enabled or profiling_active() or X.ndim != 2 or X.shape[1] != bundle_n_features(bundle):
+            # malformed input fails on its own; profiled requests keep the call tree in their trace
+            return predict_with_model(bundle, X)
+
+        with stage("batched_predict"):
+            future = self.submit(bundle, X)
+            try:
+                return future.result(timeout=self.max_wait + self.timeout)
+            except FutureTimeout:
+                future.cancel()  # dropped by the scheduler if it has not picked it up yet
+                BATCH_FALLBACKS.labels("timeout").inc()
+                return predict_with_model(bundle, X)
+
+    def submit(self, bundle, X) -> Future:
+        self._ensure_thread()
+        request = _Request(bundle, X)
+        self._queue.put(request)
+        return request.future
+
+    def _ensure_thread(self):
+        # started lazily, again after a fork (threads do not survive fork()) or if it died
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid is not None and self._pid != os.getpid():
+                    self._queue = queue.SimpleQueue()  # the parent's queue may hold its requests
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def close(self):
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    # ---- scheduler thread -------------------------------------------------
+    def _collect(self, first):
+        """Everything queued right now; lingers for more only when there was a backlog."""
+        batch, rows = [first], len(first.X)
+        deadline = None
+        while rows < self.max_rows:
+            try:
+                if deadline is None:
+                    request = self._queue.get_nowait()
+                else:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is None and len(batch) > 1 and self.max_wait > 0:
+                    deadline = time.perf_counter() + self.max_wait
+                    continue
+                break
+            if request is _STOP:
+                self._queue.put(_STOP)  # finish this batch, stop on the next loop
+                break
+            batch.append(request)
+            rows += len(request.X)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            # callers that timed out and cancelled are dropped here
+            batch = [r for r in self._collect(first) if r.future.set_running_or_notify_cancel()]
+            started = time.perf_counter()
+            for request in batch:
+                BATCH_QUEUE_SECONDS.observe(started - request.submitted)
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(id(request.bundle), []).append(request)
+            for requests in groups.values():
+                self._predict_group(requests)
+
+    def _predict_group(self, requests):
+        bundle = requests[0].bundle
+        try:
+            X = requests[0].X if len(requests) == 1 else np.concatenate([r.X for r in requests])
+            # the first caller's context: stage timers inside keep its endpoint / model type
+            probs = requests[0].context.run(predict_with_model, bundle, X)
+        except Exception as exc:
+            if len(requests) == 1:
+                requests[0].future.set_exception(exc)
+                return
+            # one bad request must not fail the others: retry them one by one
+            BATCH_FALLBACKS.labels("group_error").inc()
+            for request in requests:
+                self._predict_group([request])
+            return
+
+        BATCH_ROWS.observe(len(X))
+        BATCH_REQUESTS.observe(len(requests))
+        offsets = np.cumsum([len(r.X) for r in requests])[:-1]
+        for request, part in zip(requests, np.split(probs, offsets)):
+            request.future.set_result(part)
+
+
+_batcher = InferenceBatcher()
+
+
+def predict_batched(bundle, X, feature_set: str = None):
+    return _batcher.predict(bundle, X, feature_set)
+
+
+def close_batcher():
+    _batcher.close()
@@ -0,0 +1,173 @@
+# backend/app/cohort.py
+"""
+Cohort-wide LOSO vs subject-specific model comparison.
+
+Every session of every subject is scored in one batched predict per model
+(one call for the generalized model over the whole cohort, one call per
+subject model), then split back into per-session rows with reduceat.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from app.features import DEFAULT_FEATURE_SET, feature_filename, npz_feature_set
+from app.models_serving import bundle_feature_set, get_subject_model, get_generalized_model, predict_with_model
+from app.nsi import confidence_consistency_segments
+
+ROOT = Path(__file__).resolve().parents[2]  # repo root
+STATIC_DIR = ROOT / "backend" / "static_data"
+
+REPORT_COLUMNS = [
+    "subject_id", "session_id", "n_trials",
+    "loso_score", "subject_score", "delta_score",
+    "loso_confidence", "subject_confidence", "delta_confidence",
+    "loso_auc", "subject_auc", "delta_auc",
+]
+
+
+def discover_cohort(static_dir: Path = STATIC_DIR):
+    return sorted(p.name for p in Path(static_dir).glob("SBJ*") if p.is_dir())
+
+
+def load_cohort_features(subject_ids, static_dir: Path = STATIC_DIR, feature_set=DEFAULT_FEATURE_SET):
+    """Returns [(subject_id, session_id, X, targets or None), ...]."""
+    sessions = []
+    for subject_id in subject_ids:
+        for path in sorted((Path(static_dir) / subject_id).glob(f"S*/{feature_filename('train', feature_set)}")):
+            with np.load(path, allow_pickle=True) as d:
+                X = d.get("X")
+                targets = d["targets"] if "targets" in d.files else None
+                if npz_feature_set(d) != feature_set:
+                    continue
+            if X is None or len(X) == 0:
+                continue
+            if targets is not None and len(targets) != len(X):
+                targets = None
+            sessions.append((subject_id, path.parent.name, X, targets))
+    return sessions
+
+
+def _segment_stats(probs, offsets, targets_list):
+    counts = np.diff(np.append(offsets, len(probs)))
+    scores = np.add.reduceat(probs, offsets) / counts
+    confidence = confidence_consistency_segments(probs, offsets)
+
+    aucs = np.full(len(offsets), np.nan)
+    for i, (start, targets) in enumerate(zip(offsets, targets_list)):
+        if targets is not None and len(np.unique(targets)) == 2:
+            aucs[i] = roc_auc_score(targets.astype(int), probs[start:start + counts[i]])
+    return scores, confidence, aucs
+
+
+def compare_cohort(subject_ids=None, static_dir: Path = STATIC_DIR) -> pd.DataFrame:
+    """
+    One row per session with score / confidence / AUC under both models and
+    subject - loso deltas. Subject columns are NaN where no subject model exists.
+    """
+    if subject_ids is None:
+        subject_ids = discover_cohort(static_dir)
+
+    loso_bundle = get_generalized_model()
+    loso_feature_set = bundle_feature_set(loso_bundle)
+    sessions = load_cohort_features(subject_ids, static_dir, loso_feature_set)
+    if not sessions:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    X_all = np.vstack([X for _, _, X, _ in sessions])
+    lengths = np.array([len(X) for _, _, X, _ in sessions])
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    targets_list = [t for _, _, _, t in sessions]
+
+    report = pd.DataFrame({
+        "subject_id": [s for s, _, _, _ in sessions],
+        "session_id": [s for _, s, _, _ in sessions],
+        "n_trials": lengths,
+    })
+
+    # generalized model: one pass over the whole cohort
+    loso_probs = predict_with_model(loso_bundle, X_all, loso_feature_set)
+    report["loso_score"], report["loso_confidence"], report["loso_auc"] = _segment_stats(
+        loso_probs, offsets, targets_list
+    )
+
+    # subject models: one pass per subject over all of its sessions
+    subject_probs = np.full(len(X_all), np.nan)
+    has_model = np.zeros(len(sessions), dtype=bool)
+    for subject_id in report["subject_id"].unique():
+        try:
+            bundle = get_subject_model(int(subject_id.replace("SBJ", "")))
+        except (ValueError, FileNotFoundError):
+            bundle = None
+        if bundle is None:
+            continue
+        rows = np.nonzero(report["subject_id"].to_numpy() == subject_id)[0]
+        feature_set = bundle_feature_set(bundle)
+        if feature_set == loso_feature_set:
+            X_subject = X_all[np.concatenate([np.arange(offsets[r], offsets[r] + lengths[r]) for r in rows])]
+        else:
+            # subject model trained on another feature set: same sessions, other files
+            own = {s: X for _, s, X, _ in load_cohort_features([subject_id], static_dir, feature_set)}
+            rows = np.array([r for r in rows if len(own.get(sessions[r][1], ())) == lengths[r]], dtype=int)
+            if len(rows) == 0:
+                continue
+            X_subject = np.vstack([own[sessions[r][1]] for r in rows])
+        idx = np.concatenate([np.arange(offsets[r], offsets[r] + lengths[r]) for r in rows])
+        subject_probs[idx] = predict_with_model(bundle, X_subject, feature_set)
+        has_model[rows] = True
+
+    scores, confidence, aucs = _segment_stats(np.nan_to_num(subject_probs, nan=0.5), offsets, targets_list)
+    report["subject_score"] = np.where(has_model, scores, np.nan)
+    report["subject_confidence"] = np.where(has_model, confidence, np.nan)
+    report["subject_auc"] = np.where(has_model, aucs, np.nan)
+
+    report["delta_score"] = report["subject_score"] - report["loso_score"]
+    report["delta_confidence"] = report["subject_confidence"] - report["loso_confidence"]
+    report["delta_auc"] = report["subject_auc"] - report["loso_auc"]
+    return report[REPORT_COLUMNS]
+
+
+def summarize(report: pd.DataFrame) -> dict:
+    numeric = report.drop(columns=["subject_id", "session_id"])
+    return {
+        "n_subjects": int(report["subject_id"].nunique()),
+        "n_sessions": int(len(report)),
+        "mean": {k: (None if pd.isna(v) else float(v)) for k, v in numeric.mean().items()},
+    }
+
+
+def _fmt(value):
+    return "n/a" if value is None else f"{value:.4f}"
+
+
+def format_summary(summary: dict) -> str:
+    """One-line means for the CLI; n/a where there was nothing to average."""
+    mean = summary["mean"]
+    return f"mean delta score = {_fmt(mean.get('delta_score'))}, mean delta AUC = {_fmt(mean.get('delta_auc'))}"
+
+
+def export_report(report: pd.DataFrame, path) -> Path:
+    """Writes .csv or .parquet (needs pyarrow or fastparquet) based on the suffix."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        report.to_parquet(path, index=False)
+    else:
+        report.to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare LOSO vs subject models across the cohort")
+    parser.add_argument("--subjects", nargs="*", default=None, help="e.g. SBJ01 SBJ02 (default: all)")
+    parser.add_argument("--out", default=str(ROOT / "models" / "cohort_comparison.csv"), help=".csv or .parquet")
+    args = parser.parse_args()
+
+    report = compare_cohort(args.subjects)
+    out = export_report(report, args.out)
+    summary = summarize(report)
+    print(f"📊 {summary['n_sessions']} sessions / {summary['n_subjects']} subjects → {out}")
+    print(f"   {format_summary(summary)}")
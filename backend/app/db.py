@@ -1,82 +1,174 @@
 # backend/app/db.py
 
-from pymongo import MongoClient
 from datetime import datetime
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# pymongo and dotenv are imported on first use so importing the app (and
+# serving /health) does not pay for them; main.py closes the client on shutdown.
+_client = None
+_collections = {}
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-DB_NAME = os.getenv("MONGO_DB", "neurosense_dev")
+# legacy module attributes (app.db.sessions_col, ...) -> collection names
+COLLECTIONS = {
+    "subjects_col": "subjects",
+    "sessions_col": "sessions",
+    "game_history_col": "game_history",
+    "nsi_col": "nsi_cache",
+    "parents_col": "parents",
+}
+_settings_loaded = False
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
 
-# ---- Collections ----
-subjects_col = db["subjects"]
-sessions_col = db["sessions"]
-game_history_col = db["game_history"]
-nsi_col = db["nsi_cache"]
-parents_col = db["parents"]
+def _load_settings():
+    global _settings_loaded
+    if not _settings_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _settings_loaded = True
+
+
+def db_name():
+    _load_settings()
+    return os.getenv("MONGO_DB", "neurosense_dev")
+
+
+def get_client():
+    """The process-wide MongoClient, created on first use (does not block on connect)."""
+    global _client
+    if _client is None:
+        from pymongo import MongoClient
+
+        _load_settings()
+        _client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    return _client
+
+
+def set_client(client):
+    """Swaps the client (e.g. mongomock in benchmarks / load tests)."""
+    global _client
+    _client = client
+    _collections.clear()
+
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
+    _collections.clear()
+
+
+def get_db():
+    return get_client()[db_name()]
+
+
+def collection(name: str):
+    col = _collections.get(name)
+    if col is None:
+        col = _collections[name] = get_db()[name]
+    return col
+
+
+def __getattr__(name):
+    # keeps `from app.db import sessions_col` / `app.db.db` working, lazily
+    if name in COLLECTIONS:
+        return collection(COLLECTIONS[name])
+    if name == "db":
+        return get_db()
+    if name == "client":
+        return get_client()
+    if name == "DB_NAME":
+        return db_name()
+    if name == "MONGO_URI":
+        _load_settings()
+        return os.getenv("MONGO_URI", "mongodb://localhost:27017")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # ---- DB Functions ----
 def check_db():
     # Simple sanity check
     return {
-        "db": DB_NAME,
-        "collections": db.list_collection_names()
+        "db": db_name(),
+        "collections": get_db().list_collection_names()
     }
 
 
 def get_subject(subject_id: str):
-    return subjects_col.find_one({"subject_id": subject_id})
+    return collection("subjects").find_one({"subject_id": subject_id})
 
 def db_list_subjects():
-    return list(subjects_col.find({}, {"_id": 0}))
+    return list(collection("subjects").find({}, {"_id": 0}))
 
 def get_sessions(subject_id: str):
     return list(
-        sessions_col.find(
+        collection("sessions").find(
             {"subject_id": subject_id},
             {"_id": 0}
         ).sort("session_index", 1)
     )
 
+def get_session(subject_id: str, session_id: str):
+    return collection("sessions").find_one(
+        {"subject_id": subject_id, "session_id": session_id},
+        {"_id": 0}
+    )
+
 def insert_or_update_session(
     subject_id: str,
     session_id: str,
     score: float,
     model_used: str,
+    model_version: str = None,
 ):
+    """
+    Upserts the session score in ONE conditional update: created_at only
+    moves (and the cached NSI is only marked stale) when score, model or model
+    version actually changed. Returns True if the document was written.
+    """
     try:
         session_index = int(session_id.replace("S", ""))
     except Exception:
         session_index = None
 
-    sessions_col.update_one(
+    unchanged = {
+        "$and": [
+            {"$eq": ["$score", score]},
+            {"$eq": ["$model_used", {"$literal": model_used}]},
+            {"$eq": ["$model_version", {"$literal": model_version}]},
+        ]
+    }
+
+    result = collection("sessions").update_one(
         {"subject_id": subject_id, "session_id": session_id},
-        {
-            "$set": {
-                "subject_id": subject_id,
-                "session_id": session_id,
-                "session_index": session_index,
-                "score": score,
-                "model_used": model_used,
-                "created_at": datetime.utcnow(),
+        [
+            {
+                "$set": {
+                    "subject_id": {"$literal": subject_id},
+                    "session_id": {"$literal": session_id},
+                    "session_index": session_index,
+                    "score": score,
+                    "model_used": {"$literal": model_used},
+                    "model_version": {"$literal": model_version},
+                    "created_at": {"$cond": [unchanged, "$created_at", datetime.utcnow()]},
+                }
             }
-        },
+        ],
         upsert=True
     )
 
-    # 🔥 Invalidate NSI cache
-    nsi_col.delete_one({"subject_id": subject_id})
+    changed = result.upserted_id is not None or result.modified_count > 0
+    if changed:
+        # 🔥 Invalidate NSI cache (the stale value is served until it is recomputed)
+        invalidate_nsi(subject_id)
+    return changed
 
 
 
 def db_get_manifest():
-    subjects = list(subjects_col.find({}, {"_id": 0}))
-    sessions = list(sessions_col.find({}, {"_id": 0}))
+    subjects = list(collection("subjects").find({}, {"_id": 0}))
+    sessions = list(collection("sessions").find({}, {"_id": 0}))
 
     # reconstruct original manifest format
     out = []
@@ -92,7 +184,7 @@ def db_get_manifest():
 
 def db_get_session_scores(subject_id):
     sess = list(
-        sessions_col.find(
+        collection("sessions").find(
             {"subject_id": subject_id},
             {"_id": 0, "score": 1}
         ).sort("session_index", 1)
@@ -100,35 +192,56 @@ def db_get_session_scores(subject_id):
     return [s["score"] for s in sess]
 
 def db_get_last_game(subject_id):
-    last = game_history_col.find_one(
+    last = collection("game_history").find_one(
         {"subject_id": subject_id},
         sort=[("timestamp", -1)]
     )
     return last["game_id"] if last else None
 
 def db_log_game(entry: dict):
-    game_history_col.insert_one({
+    collection("game_history").insert_one({
         **entry,
         "timestamp": datetime.utcnow()
     })
 
 
+# VERSION STAMPS (for ETags)
+def _collection_stamp(col, query: dict, time_field: str):
+    count = col.count_documents(query)
+    last = col.find_one(query, {"_id": 0, time_field: 1}, sort=[(time_field, -1)])
+    return f"{count}:{last.get(time_field) if last else ''}"
+
+def data_version(subject_id: str = None, include_games: bool = False):
+    """
+    Changes whenever sessions (or subjects / game history) are written.
+    Two indexed queries per collection, far cheaper than recomputing.
+    """
+    query = {"subject_id": subject_id} if subject_id else {}
+    parts = [_collection_stamp(collection("sessions"), query, "created_at")]
+    if subject_id is None:
+        parts.append(_collection_stamp(collection("subjects"), {}, "created_at"))
+    if include_games:
+        parts.append(_collection_stamp(collection("game_history"), query, "timestamp"))
+    return "|".join(parts)
+
+
 # NSI CACHE
 def get_cached_nsi(subject_id: str):
-    doc = nsi_col.find_one(
+    doc = collection("nsi_cache").find_one(
         {"subject_id": subject_id},
         {"_id": 0}
     )
     return doc
 
 def set_cached_nsi(subject_id: str, nsi: int, components: dict):
-    nsi_col.update_one(
+    collection("nsi_cache").update_one(
         {"subject_id": subject_id},
         {
             "$set": {
                 "subject_id": subject_id,
                 "nsi": nsi,
                 "components": components,
+                "stale": False,
                 "updated_at": datetime.utcnow(),
             }
         },
@@ -136,4 +249,7 @@ def set_cached_nsi(subject_id: str, nsi: int, components: dict):
     )
 
 def invalidate_nsi(subject_id: str):
-    nsi_col.delete_one({"subject_id": subject_id})
+    collection("nsi_cache").update_one(
+        {"subject_id": subject_id},
+        {"$set": {"stale": True, "updated_at": datetime.utcnow()}}
+    )
@@ -0,0 +1,149 @@
+# backend/app/encoding.py
+"""
+Response encodings for array-heavy endpoints (/data, /predict).
+
+JSON stays the default but is rendered by orjson, which serializes NumPy
+arrays natively (no .tolist()). Clients can ask for a compact binary body
+through the Accept header:
+
+  application/x-neurosense-f32   all arrays, little-endian, with a shape header
+  application/x-npy              a single array (?field=...) as .npy bytes
+
+x-neurosense-f32 layout (all integers little-endian):
+  b"NSF1" | uint32 meta_len | meta JSON (utf-8) | uint16 n_arrays |
+  n_arrays × ( uint8 name_len | name | uint8 kind ('f' float32, 'i' int32) |
+               uint8 ndim | ndim × uint32 dim | data )
+
+Integer arrays with values outside int32 (e.g. int64 timestamps) are refused
+with 406 rather than wrapped; JSON and .npy keep their full width.
+"""
+import io
+import struct
+
+import numpy as np
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+JSON_MEDIA_TYPE = "application/json"
+F32_MEDIA_TYPE = "application/x-neurosense-f32"
+NPY_MEDIA_TYPE = "application/x-npy"
+
+_MAGIC = b"NSF1"
+_INT32 = np.iinfo(np.int32)
+
+
+def _orjson_default(obj):
+    # orjson handles C-contiguous arrays itself; this covers the rest
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError
+
+
+class NumpyJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def negotiate(accept: str) -> str:
+    accept = (accept or "").lower()
+    for media_type in (F32_MEDIA_TYPE, NPY_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def _split(payload: dict):
+    arrays, meta = {}, {}
+    for k, v in payload.items():
+        if isinstance(v, np.ndarray) and v.ndim >= 1:
+            arrays[k] = v
+        else:
+            meta[k] = v
+    return arrays, meta
+
+
+def _as_int32(name, arr):
+    if not (np.issubdtype(arr.dtype, np.integer) or arr.dtype == np.bool_):
+        raise ValueError(f"array '{name}' of dtype {arr.dtype} has no {F32_MEDIA_TYPE} encoding")
+    if arr.size and (arr.min() < _INT32.min or arr.max() > _INT32.max):
+        raise ValueError(f"array '{name}' has values outside int32")
+    return np.ascontiguousarray(arr, dtype="<i4")
+
+
+def encode_f32(payload: dict) -> bytes:
+    """Raises ValueError for arrays that int32 / float32 cannot carry."""
+    arrays, meta = _split(payload)
+    meta_bytes = orjson.dumps(meta, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    parts = [_MAGIC, struct.pack("<I", len(meta_bytes)), meta_bytes, struct.pack("<H", len(arrays))]
+    for name, arr in arrays.items():
+        if np.issubdtype(arr.dtype, np.floating):
+            kind, data = b"f", np.ascontiguousarray(arr, dtype="<f4")
+        else:
+            kind, data = b"i", _as_int32(name, arr)
+        name_bytes = name.encode()
+        parts += [
+            struct.pack("<B", len(name_bytes)),
+            name_bytes,
+            kind,
+            struct.pack("<B", data.ndim),
+            struct.pack(f"<{data.ndim}I", *data.shape),
+            data.tobytes(),
+        ]
+    return b"".join(parts)
+
+
+def decode_f32(body: bytes):
+    """Inverse of encode_f32: (meta, {name: array}), for Python clients and tests."""
+    if body[:4] != _MAGIC:
+        raise ValueError("not an NSF1 body")
+    (meta_len,) = struct.unpack_from("<I", body, 4)
+    pos = 8 + meta_len
+    meta = orjson.loads(body[8:pos])
+    (n_arrays,) = struct.unpack_from("<H", body, pos)
+    pos += 2
+    arrays = {}
+    for _ in range(n_arrays):
+        name_len = body[pos]
+        name = body[pos + 1: pos + 1 + name_len].decode()
+        pos += 1 + name_len
+        dtype = {b"f": "<f4", b"i": "<i4"}[body[pos:pos + 1]]
+        ndim = body[pos + 1]
+        shape = struct.unpack_from(f"<{ndim}I", body, pos + 2)
+        pos += 2 + 4 * ndim
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays[name] = np.frombuffer(body, dtype=dtype, count=count, offset=pos).reshape(shape)
+        pos += 4 * count
+    return meta, arrays
+
+
+def encode_npy(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(arr), allow_pickle=False)
+    return buf.getvalue()
+
+
+def array_response(payload: dict, accept: str, field: str = None):
+    """Encodes payload according to the Accept header (JSON by default)."""
+    media_type = negotiate(accept)
+
+    if media_type == F32_MEDIA_TYPE:
+        try:
+            return Response(encode_f32(payload), media_type=F32_MEDIA_TYPE)
+        except ValueError as exc:
+            raise HTTPException(status_code=406, detail=f"{exc}; request JSON or {NPY_MEDIA_TYPE} instead")
+
+    if media_type == NPY_MEDIA_TYPE:
+        arr = payload.get(field)
+        if not isinstance(arr, np.ndarray):
+            raise HTTPException(status_code=400, detail=f"field '{field}' is not an array in this response")
+        return Response(encode_npy(arr), media_type=NPY_MEDIA_TYPE)
+
+    return NumpyJSONResponse(payload)
@@ -0,0 +1,166 @@
+# backend/app/features.py
+"""
+Feature-set registry for epoched EEG.
+
+Every feature set maps a (n_trials, n_channels, n_samples) tensor to a
+(n_trials, n_features) matrix in one vectorized pass (no per-trial loops).
+The feature-set ID is written into the npz `info` and into model bundles so
+features and models can be matched at serving time.
+
+  stats       mean / std / max / min over the 100–700 ms window (legacy, 32 features)
+  decimated   window averaged into ~20 Hz bins per channel (the usual P300 input)
+  bandpower   log power per channel in delta / theta / alpha / beta / gamma
+  multiwindow mean amplitude per channel in overlapping 200 ms windows
+
+Sets can be combined with '+', e.g. "decimated+bandpower". Features computed
+on spatially filtered epochs get the filter's short hash appended
+("decimated~1a2b3c4d") so they only ever match the model that owns the filter.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+DEFAULT_FEATURE_SET = "stats"
+
+FEATURE_SETS = {}
+
+BANDS = ((1.0, 4.0), (4.0, 8.0), (8.0, 13.0), (13.0, 30.0), (30.0, 40.0))
+SUB_WINDOWS = ((100, 300), (200, 400), (300, 500), (400, 600), (500, 700))
+
+
+def register_feature_set(name):
+    def decorator(fn):
+        FEATURE_SETS[name] = fn
+        return fn
+    return decorator
+
+
+def _window(eeg, window, fs):
+    start = int(window[0] * fs / 1000)
+    end = int(window[1] * fs / 1000)
+    return eeg[:, :, start:end]
+
+
+# =============================================================================
+# 1️⃣  Registered feature sets
+# =============================================================================
+@register_feature_set("stats")
+def stats_features(eeg, window=(100, 700), fs=250.0):
+    seg = _window(eeg, window, fs)
+    return np.concatenate(
+        [seg.mean(axis=2), seg.std(axis=2), seg.max(axis=2), seg.min(axis=2)], axis=1
+    )
+
+
+@register_feature_set("decimated")
+def decimated_features(eeg, window=(100, 700), fs=250.0, target_fs=20.0):
+    """Block-averages the window down to ~target_fs (boxcar anti-aliasing + decimation)."""
+    seg = _window(eeg, window, fs)
+    factor = max(1, int(round(fs / target_fs)))
+    n_bins = seg.shape[2] // factor
+    binned = seg[:, :, : n_bins * factor].reshape(seg.shape[0], seg.shape[1], n_bins, factor)
+    return binned.mean(axis=3).reshape(seg.shape[0], -1)
+
+
+@register_feature_set("bandpower")
+def bandpower_features(eeg, window=(100, 700), fs=250.0, bands=BANDS):
+    """Hann-windowed periodogram summed into bands with one matrix product."""
+    seg = _window(eeg, window, fs)
+    n = seg.shape[2]
+    spectrum = np.fft.rfft(seg * np.hanning(n), axis=2)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+
+    freqs = np.fft.rfftfreq(n, d=1.0 / fs)
+    band_matrix = np.stack([(freqs >= lo) & (freqs < hi) for lo, hi in bands], axis=1).astype(float)
+    band_power = power @ band_matrix / np.maximum(1.0, band_matrix.sum(axis=0))
+    return np.log(band_power + 1e-12).reshape(seg.shape[0], -1)
+
+
+@register_feature_set("multiwindow")
+def multiwindow_features(eeg, window=(100, 700), fs=250.0, sub_windows=SUB_WINDOWS):
+    """Mean amplitude per sub-window, all windows at once from one cumulative sum."""
+    csum = np.concatenate([np.zeros(eeg.shape[:2] + (1,)), np.cumsum(eeg, axis=2)], axis=2)
+    starts = np.array([int(w[0] * fs / 1000) for w in sub_windows])
+    ends = np.array([int(w[1] * fs / 1000) for w in sub_windows])
+    means = (csum[:, :, ends] - csum[:, :, starts]) / (ends - starts)
+    return means.reshape(eeg.shape[0], -1)
+
+
+# =============================================================================
+# 2️⃣  Public entry points
+# =============================================================================
+def parse_feature_set(feature_set):
+    names = [n.strip() for n in (feature_set or DEFAULT_FEATURE_SET).split("+") if n.strip()]
+    unknown = [n for n in names if n not in FEATURE_SETS]
+    if unknown or not names:
+        raise ValueError(f"Unknown feature set '{feature_set}'. Available: {sorted(FEATURE_SETS)}")
+    return names
+
+
+def extract(eeg, feature_set=DEFAULT_FEATURE_SET, window=(100, 700), fs=250.0, spatial_filter=None):
+    """
+    (n_trials, n_channels, n_samples) -> (n_trials, n_features).
+    A spatial feature set ("decimated~1a2b3c4d") needs the filter it names;
+    it is applied here and checked against the suffix.
+    """
+    eeg = np.asarray(eeg, dtype=float)
+    if eeg.ndim != 3:
+        raise ValueError("Expected shape (n_trials, n_channels, n_samples)")
+    check_spatial_feature_set(feature_set, spatial_filter)
+    if spatial_filter is not None:
+        eeg = apply_spatial_filter(eeg, spatial_filter)
+    names = parse_feature_set(base_feature_set(feature_set))
+    parts = [FEATURE_SETS[name](eeg, window=window, fs=fs) for name in names]
+    return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+
+def apply_spatial_filter(eeg_data, spatial_filter):
+    """
+    (n_trials, n_channels, n_samples) -> (n_trials, n_filters, n_samples)
+    with one matrix product; spatial_filter has shape (n_channels, n_filters).
+    """
+    return np.matmul(np.asarray(spatial_filter).T, eeg_data)
+
+
+def spatial_feature_set(feature_set, spatial_filter=None):
+    """Feature-set ID for features computed after a spatial filter (unchanged without one)."""
+    feature_set = feature_set or DEFAULT_FEATURE_SET
+    if spatial_filter is None:
+        return feature_set
+    digest = hashlib.sha1(np.ascontiguousarray(spatial_filter, dtype=np.float64).tobytes()).hexdigest()
+    return f"{feature_set}~{digest[:8]}"
+
+
+def check_spatial_feature_set(feature_set, spatial_filter=None):
+    """Raises ValueError when a '~' feature set does not come with the filter it was computed with."""
+    if "~" not in (feature_set or ""):
+        return
+    if spatial_filter is None:
+        raise ValueError(f"Feature set '{feature_set}' needs its spatial filter")
+    expected = spatial_feature_set(base_feature_set(feature_set), spatial_filter)
+    if feature_set != expected:
+        raise ValueError(f"Spatial filter does not match feature set '{feature_set}' (it gives '{expected}')")
+
+
+def base_feature_set(feature_set):
+    """Strips the spatial-filter suffix: 'decimated~1a2b3c4d' -> 'decimated'."""
+    return (feature_set or DEFAULT_FEATURE_SET).split("~", 1)[0]
+
+
+def feature_filename(kind="train", feature_set=DEFAULT_FEATURE_SET):
+    """train_features.npz for the default set, train_features.<set>.npz otherwise."""
+    if not feature_set or feature_set == DEFAULT_FEATURE_SET:
+        return f"{kind}_features.npz"
+    return f"{kind}_features.{feature_set}.npz"
+
+
+def npz_feature_set(npz):
+    """Feature-set ID recorded in an opened npz (files written before it existed are 'stats')."""
+    if "info" not in npz.files:
+        return DEFAULT_FEATURE_SET
+    try:
+        info = json.loads(str(npz["info"]))
+    except (TypeError, ValueError):
+        return DEFAULT_FEATURE_SET
+    return info.get("feature_set", DEFAULT_FEATURE_SET)
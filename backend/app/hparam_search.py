@@ -0,0 +1,251 @@
+# backend/app/hparam_search.py
+"""
+Grid / random hyperparameter search for the subject-specific and LOSO models.
+
+Features are loaded once per subject (feature store + in-memory cache) and
+each (subject or fold, n_components) task fits its PCA once, then sweeps every
+C on the same projections. Tasks run in parallel across cores and the results
+are written as a leaderboard with AUC and fit time.
+
+n_components above what the data allows is clipped before the search, and
+settings that become identical are only run once. fit_time_s is the cost of
+one configuration on its own (PCA fit + projection + classifier fit);
+clf_fit_time_s is the classifier part only. The solver is the one the
+production trainer uses for the mode (SUBJECT_PARAMS / LOSO_PARAMS), so
+scores and fit times carry over to the deployed model.
+"""
+import itertools
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from app.features import DEFAULT_FEATURE_SET
+from app.train_models import (
+    FEATURE_STORE_DIR, LOSO_PARAMS, SUBJECT_PARAMS, FoldEngine, discover_subjects, load_subject_data,
+)
+
+DEFAULT_GRID = {
+    "n_components": [8, 16, 24, 32],
+    "C": [0.01, 0.1, 1.0, 10.0],
+}
+
+
+# =============================================================================
+# 🔧  Helpers
+# =============================================================================
+def expand_grid(grid, n_iter=None, random_state=42):
+    """All settings of the grid, or n_iter of them sampled without replacement."""
+    keys = sorted(grid)
+    settings = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if n_iter is not None and n_iter < len(settings):
+        rng = np.random.default_rng(random_state)
+        settings = [settings[i] for i in rng.choice(len(settings), size=n_iter, replace=False)]
+    return settings
+
+
+def clip_settings(settings, max_components):
+    """Caps n_components at max_components and drops the duplicates that creates (order kept)."""
+    clipped, seen = [], set()
+    for s in settings:
+        s = {**s, "n_components": min(s["n_components"], max_components)}
+        key = tuple(sorted(s.items()))
+        if key not in seen:
+            seen.add(key)
+            clipped.append(s)
+    return clipped
+
+
+def _group_by_components(settings):
+    groups = {}
+    for s in settings:
+        groups.setdefault(s["n_components"], []).append(s)
+    return groups
+
+
+def _sweep(name, pca, pca_time, X_train, y_train, X_test, y_test, settings, solver):
+    """Fits one classifier per setting on a single shared PCA projection."""
+    start = time.perf_counter()
+    X_train_pca = pca.transform(X_train)
+    X_test_pca = pca.transform(X_test)
+    pca_time += time.perf_counter() - start
+
+    rows = []
+    for setting in settings:
+        start = time.perf_counter()
+        model = LogisticRegression(
+            solver=solver, C=setting["C"], class_weight="balanced", max_iter=1000, random_state=42
+        )
+        model.fit(X_train_pca, y_train)
+        fit_time = time.perf_counter() - start
+
+        auc = roc_auc_score(y_test, model.predict_proba(X_test_pca)[:, 1])
+        rows.append({
+            "Subject": name,
+            **setting,
+            "AUC": auc,
+            "pca_time_s": pca_time,
+            "clf_fit_time_s": fit_time,
+            "fit_time_s": pca_time + fit_time,
+        })
+    return rows
+
+
+def _subject_split(X, y):
+    return train_test_split(
+        X, y, test_size=SUBJECT_PARAMS["test_size"], random_state=SUBJECT_PARAMS["random_state"], stratify=y
+    )
+
+
+def _subject_task(name, X, y, n_components, settings, solver):
+    X_train, X_test, y_train, y_test = _subject_split(X, y)
+    start = time.perf_counter()
+    pca = PCA(n_components=min(n_components, *X_train.shape), random_state=42).fit(X_train)
+    pca_time = time.perf_counter() - start
+    return _sweep(name, pca, pca_time, X_train, y_train, X_test, y_test, settings, solver)
+
+
+def _loso_task(name, pca, pca_time, X_train, y_train, X_test, y_test, settings, solver):
+    return _sweep(name, pca, pca_time, X_train, y_train, X_test, y_test, settings, solver)
+
+
+# =============================================================================
+# 🔎  Search driver
+# =============================================================================
+def run_search(
+    base_path,
+    mode="subject",
+    subjects=None,
+    sessions=range(1, 8),
+    grid=None,
+    n_iter=None,
+    n_jobs=-1,
+    output_dir="models/search",
+    feature_set=DEFAULT_FEATURE_SET,
+    feature_store=FEATURE_STORE_DIR,
+):
+    """
+    mode="subject": per-subject 75/25 split, like train_subject_specific.
+    mode="loso": leave-one-subject-out folds with PCA from the FoldEngine.
+    Returns the aggregated leaderboard (best setting first).
+    """
+    start_all = time.time()
+    settings = expand_grid(grid or DEFAULT_GRID, n_iter)
+    solver = (SUBJECT_PARAMS if mode == "subject" else LOSO_PARAMS)["solver"]
+
+    if subjects is None:
+        subjects = discover_subjects(base_path, feature_store) or range(1, 16)
+
+    all_data = {}
+    for sid in subjects:
+        X, y = load_subject_data(base_path, sid, sessions, feature_store=feature_store, feature_set=feature_set)
+        if X is not None:
+            all_data[sid] = (X, y)
+    if not all_data:
+        raise ValueError(f"No '{feature_set}' training data for subjects {list(subjects)}")
+
+    # PCA size is bounded by the features (and, per subject, by the training split)
+    max_components = min(X.shape[1] for X, _ in all_data.values())
+    if mode == "subject":
+        test_size = SUBJECT_PARAMS["test_size"]
+        max_components = min(
+            max_components, *(len(y) - math.ceil(test_size * len(y)) for _, y in all_data.values())
+        )
+    n_settings = len(settings)
+    settings = clip_settings(settings, max_components)
+    if len(settings) < n_settings:
+        print(f"✂️  n_components capped at {max_components}: {n_settings - len(settings)} duplicate settings dropped")
+    groups = _group_by_components(settings)
+    print(
+        f"🔎 {mode} search [{feature_set}]: {len(settings)} settings × {len(all_data)} subjects "
+        f"({len(groups)} PCA fits each)"
+    )
+
+    if mode == "subject":
+        tasks = (
+            delayed(_subject_task)(f"SBJ{sid:02d}", X, y, k, group, solver)
+            for sid, (X, y) in all_data.items()
+            for k, group in groups.items()
+        )
+    elif mode == "loso":
+        engine = FoldEngine(all_data)
+
+        def fold_tasks():
+            for test_sid, (X_test, y_test) in all_data.items():
+                X_train = np.vstack([X for sid, (X, _) in all_data.items() if sid != test_sid])
+                y_train = np.concatenate([y for sid, (_, y) in all_data.items() if sid != test_sid])
+                for k, group in groups.items():
+                    start = time.perf_counter()
+                    pca = engine.pca(min(k, X_train.shape[1]), exclude=test_sid)
+                    pca_time = time.perf_counter() - start
+                    yield delayed(_loso_task)(
+                        f"SBJ{test_sid:02d}", pca, pca_time, X_train, y_train, X_test, y_test, group, solver
+                    )
+
+        tasks = fold_tasks()
+    else:
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    rows = [row for chunk in Parallel(n_jobs=n_jobs)(tasks) for row in chunk]
+    trials = pd.DataFrame(rows)
+    trials["feature_set"] = feature_set
+
+    keys = sorted(settings[0])
+    leaderboard = (
+        trials.groupby(keys)
+        .agg(
+            mean_AUC=("AUC", "mean"),
+            std_AUC=("AUC", "std"),
+            min_AUC=("AUC", "min"),
+            fit_time_s=("fit_time_s", "sum"),
+            clf_fit_time_s=("clf_fit_time_s", "sum"),
+        )
+        .reset_index()
+        .sort_values("mean_AUC", ascending=False)
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    trials.to_csv(os.path.join(output_dir, f"{mode}_search_trials.csv"), index=False)
+    leaderboard.to_csv(os.path.join(output_dir, f"{mode}_leaderboard.csv"), index=False)
+
+    best = {k: leaderboard[k].iloc[0] for k in keys + ["mean_AUC"]}
+    print(f"🏆 Best {mode}: " + ", ".join(f"{k}={best[k]}" for k in keys) + f" | mean AUC = {best['mean_AUC']:.3f}")
+    print(f"🏁 Search completed in {(time.time() - start_all)/60:.1f} mins")
+    return leaderboard
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hyperparameter search for NeuroSense models")
+    parser.add_argument("--mode", choices=["subject", "loso"], default="subject")
+    parser.add_argument("--n-components", type=int, nargs="+", default=DEFAULT_GRID["n_components"])
+    parser.add_argument("--C", type=float, nargs="+", default=DEFAULT_GRID["C"])
+    parser.add_argument("--n-iter", type=int, default=None, help="Random search: sample this many settings")
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--feature-set", default=DEFAULT_FEATURE_SET, help="Feature set ID (see app.features)")
+    args = parser.parse_args()
+
+    BASE_PATH = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..", "data")
+    )
+    PROJECT_ROOT = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+
+    run_search(
+        BASE_PATH,
+        mode=args.mode,
+        grid={"n_components": args.n_components, "C": args.C},
+        n_iter=args.n_iter,
+        n_jobs=args.jobs,
+        output_dir=os.path.join(PROJECT_ROOT, "models", "search"),
+        feature_set=args.feature_set,
+    )
@@ -0,0 +1,104 @@
+# backend/app/http_cache.py
+"""
+HTTP caching helpers: ETags, conditional requests and byte ranges.
+"""
+import os
+from pathlib import Path
+
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+FILE_CHUNK = 64 * 1024
+
+
+def file_etag(path: Path) -> str:
+    st = os.stat(path)
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """RFC 7232 weak comparison against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return any(c.removeprefix("W/") == etag.removeprefix("W/") for c in candidates)
+
+
+def not_modified(etag: str, headers: dict = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def parse_range(range_header, size: int):
+    """
+    Parses a single 'bytes=start-end' range (suffix form 'bytes=-N' too).
+    Returns (start, end) inclusive, None to ignore the header, or raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        return None  # multipart ranges: left to FileResponse (multipart/byteranges on recent Starlette)
+
+    start_s, _, end_s = spec.partition("-")
+    if start_s == "":
+        length = int(end_s)
+        if length <= 0:
+            raise ValueError(range_header)
+        start, end = max(0, size - length), size - 1
+    else:
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+        end = min(end, size - 1)
+
+    if start >= size or start > end:
+        raise ValueError(range_header)
+    return start, end
+
+
+def _iter_file(path: Path, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(FILE_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def cached_file_response(path: Path, request_headers, cache_control="public, max-age=0, must-revalidate"):
+    """
+    FileResponse with ETag / If-None-Match (304) and Range / If-Range (206)
+    support so clients can cache npz files and resume downloads.
+    """
+    etag = file_etag(path)
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": cache_control}
+
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return not_modified(etag, {"Cache-Control": cache_control})
+
+    size = os.path.getsize(path)
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                _iter_file(path, start, end),
+                status_code=206,
+                media_type="application/octet-stream",
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                },
+            )
+
+    return FileResponse(path, headers=headers)
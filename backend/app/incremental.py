@@ -0,0 +1,213 @@
+# backend/app/incremental.py
+"""
+Incremental (warm-start) model updates.
+
+When a new session arrives, refresh a model bundle from ONLY that session's
+features instead of re-running train_subject_specific / train_loso:
+
+  - PCA  -> IncrementalPCA.partial_fit (seeded from the batch PCA state)
+  - clf  -> SGD logistic regression warm-started from the previous weights,
+            re-expressed in the updated PCA basis
+
+Every update is written as a new versioned artifact (the last
+NEUROSENSE_KEEP_VERSIONS per model are kept, default 10), then atomically swapped
+in as the current model file and re-exported as the fused .npz that
+models_serving hot-loads. Updates start from the .pkl audit copy, so models
+trained with --no-audit-pickle cannot be updated incrementally.
+"""
+import copy
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import roc_auc_score
+
+from app.artifacts import artifact_path, export_artifact, fuse_weights
+from app.models_serving import SUBJECT_MODELS_DIR, GENERALIZED_MODEL_PATH, bundle_feature_set
+from app.train_models import load_session_features
+
+ROOT = Path(__file__).resolve().parents[2]  # repo root
+DATA_DIR = ROOT / "data"
+KEEP_VERSIONS = int(os.getenv("NEUROSENSE_KEEP_VERSIONS", "10"))  # 0 keeps every version
+
+INCREMENTAL_PARAMS = {
+    "max_components": 150,
+    "alpha": 1e-4,
+    "eta0": 1e-4,
+    "epochs": 5,
+    "average": True,
+    "random_state": 42,
+}
+
+
+# =============================================================================
+# 🔧  Helpers: state conversion
+# =============================================================================
+def _ipca_from_pca(pca):
+    """
+    Seed an IncrementalPCA with the state of a fitted (batch) PCA so the next
+    partial_fit continues from it without replaying the old sessions.
+    An IncrementalPCA is copied, so the caller's bundle is left untouched.
+    """
+    if isinstance(pca, IncrementalPCA):
+        return copy.deepcopy(pca)
+
+    n = int(pca.n_samples_)
+    ipca = IncrementalPCA(n_components=pca.n_components_, whiten=getattr(pca, "whiten", False))
+    ipca.n_components_ = pca.n_components_
+    ipca.n_features_in_ = pca.n_features_in_
+    ipca.components_ = pca.components_.copy()
+    ipca.singular_values_ = pca.singular_values_.copy()
+    ipca.mean_ = pca.mean_.copy()
+    # per-feature variance (ddof=0) from the retained spectrum
+    cov = (pca.components_.T * pca.explained_variance_) @ pca.components_
+    ipca.var_ = np.diag(cov) * (n - 1) / n
+    ipca.n_samples_seen_ = n
+    ipca.explained_variance_ = pca.explained_variance_.copy()
+    ipca.explained_variance_ratio_ = pca.explained_variance_ratio_.copy()
+    ipca.noise_variance_ = getattr(pca, "noise_variance_", 0.0)
+    return ipca
+
+
+def _project_weights(coef, intercept, ipca):
+    """
+    Inverse of fuse_weights: raw-feature weights -> weights on ipca.transform().
+    A whitened basis scales component k by 1/sqrt(var_k), so w_k is scaled back.
+    """
+    w = ipca.components_ @ coef
+    if getattr(ipca, "whiten", False):
+        w = w * np.sqrt(ipca.explained_variance_)
+    b = intercept + float(coef @ ipca.mean_)
+    return w, b
+
+
+# =============================================================================
+# 🔁  Core update
+# =============================================================================
+def update_bundle(bundle, X_new, y_new, params=None):
+    """
+    Returns a new bundle updated with one session's (X_new, y_new).
+    The input bundle is left untouched.
+    """
+    params = {**INCREMENTAL_PARAMS, **(params or {})}
+    pca, model = bundle["pca"], bundle["model"]
+
+    # prequential AUC: how the current model scores the unseen session
+    update_auc = None
+    if len(np.unique(y_new)) == 2:
+        update_auc = float(roc_auc_score(y_new, model.predict_proba(pca.transform(X_new))[:, 1]))
+
+    coef, intercept = fuse_weights(pca, model)
+
+    ipca = _ipca_from_pca(pca)
+    ipca.partial_fit(X_new)
+
+    w0, b0 = _project_weights(coef, intercept, ipca)
+    clf = SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=params["alpha"],
+        learning_rate="constant",
+        eta0=params["eta0"],
+        max_iter=params["epochs"],
+        tol=None,
+        average=params["average"],
+        class_weight="balanced",
+        random_state=params["random_state"],
+    )
+    clf.fit(ipca.transform(X_new), y_new, coef_init=w0[np.newaxis, :], intercept_init=np.array([b0]))
+
+    return {
+        **bundle,
+        "model": clf,
+        "pca": ipca,
+        "incremental": True,
+        "version": int(bundle.get("version", 0)) + 1,
+        "n_samples_seen": int(ipca.n_samples_seen_),
+        "update_auc": update_auc,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _prune_versions(versions_dir: Path, stem: str, keep: int):
+    """Removes all but the `keep` newest versions/<stem>.v####.pkl."""
+    if keep <= 0:
+        return
+    versions = sorted(versions_dir.glob(f"{stem}.v*.pkl"), key=lambda p: int(p.stem.rsplit(".v", 1)[1]))
+    for old in versions[:-keep]:
+        old.unlink(missing_ok=True)
+
+
+def save_versioned(bundle, current_path: Path, keep=None):
+    """
+    Writes versions/<name>.v####.pkl, atomically swaps it in as current_path
+    and re-exports the serving artifact next to it. Only the `keep` newest
+    versions (default KEEP_VERSIONS) stay on disk.
+    """
+    current_path = Path(current_path)
+    versions_dir = current_path.parent / "versions"
+    versions_dir.mkdir(parents=True, exist_ok=True)
+
+    version_path = versions_dir / f"{current_path.stem}.v{bundle['version']:04d}.pkl"
+    joblib.dump(bundle, version_path)
+
+    tmp_path = current_path.with_suffix(".pkl.tmp")
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, current_path)
+    export_artifact(bundle, artifact_path(current_path))
+    _prune_versions(versions_dir, current_path.stem, KEEP_VERSIONS if keep is None else keep)
+    return version_path
+
+
+def _update_model_file(model_path: Path, subject_id, session_id, base_path, params):
+    model_path = Path(model_path)
+    if not model_path.exists():
+        raise FileNotFoundError(str(model_path))
+
+    current = joblib.load(model_path)
+    loaded = load_session_features(
+        str(base_path), subject_id, session_id, feature_set=bundle_feature_set(current),
+        spatial_filter=current.get("spatial_filter"),
+    )
+    if loaded is None:
+        raise FileNotFoundError(f"No features for SBJ{subject_id:02d}-S{session_id:02d}")
+    X_new, y_new = loaded
+
+    start = time.perf_counter()
+    bundle = update_bundle(current, X_new, y_new, params)
+    bundle["sessions"] = sorted(set(bundle.get("sessions", [])) | {f"SBJ{subject_id:02d}/S{session_id:02d}"})
+    version_path = save_versioned(bundle, model_path)
+
+    print(
+        f"✅ {model_path.name} → v{bundle['version']} from SBJ{subject_id:02d}-S{session_id:02d} "
+        f"({X_new.shape[0]} trials, {time.perf_counter() - start:.2f}s)"
+    )
+    return {"path": str(version_path), "version": bundle["version"], "update_auc": bundle["update_auc"]}
+
+
+def update_subject_model(subject_id: int, session_id: int, base_path=DATA_DIR, params=None):
+    model_path = SUBJECT_MODELS_DIR / f"SBJ{subject_id:02d}_model.pkl"
+    return _update_model_file(model_path, subject_id, session_id, base_path, params)
+
+
+def update_generalized_model(subject_id: int, session_id: int, base_path=DATA_DIR, params=None):
+    return _update_model_file(GENERALIZED_MODEL_PATH, subject_id, session_id, base_path, params)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm-start model update from one new session")
+    parser.add_argument("--subject", type=int, required=True, help="Subject number, e.g. 1 for SBJ01")
+    parser.add_argument("--session", type=int, required=True, help="Session number, e.g. 8 for S08")
+    parser.add_argument("--generalized", action="store_true", help="Also update the generalized (LOSO) model")
+    args = parser.parse_args()
+
+    update_subject_model(args.subject, args.session)
+    if args.generalized:
+        update_generalized_model(args.subject, args.session)
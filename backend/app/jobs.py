@@ -0,0 +1,495 @@
+# backend/app/jobs.py
+"""
+Background job queue for expensive recomputations.
+
+Jobs are submitted by kind + params (admin endpoints, or the API itself after
+a write) and run by a small pool of worker threads, never on the request
+threadpool:
+
+  - lower priority number first (high=0, normal=5, low=10), FIFO within one
+  - a job identical to one still queued (same kind + params) is not queued
+    twice; the queued one is returned, promoted if the new priority is higher
+  - handlers report progress with job.progress(fraction, message)
+
+Heavy kinds (retraining, feature rebuilds, backfill, store rebuild) run their
+existing CLI in a niced subprocess, so they hold neither the GIL nor a CPU
+the API needs; progress is parsed from their tqdm / "NN%" output.
+
+With NEUROSENSE_JOB_DB=<path> jobs are persisted in SQLite: history survives
+a restart and jobs that were queued or running are queued again. The queue is
+per process; with several uvicorn workers submit admin jobs to one of them.
+"""
+import heapq
+import inspect
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+from app.metrics import JOB_SECONDS, JOBS_QUEUED, JOBS_RUNNING
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+WORKERS = int(os.getenv("NEUROSENSE_JOB_WORKERS", "2"))
+JOB_DB = os.getenv("NEUROSENSE_JOB_DB")
+KEEP = int(os.getenv("NEUROSENSE_JOB_KEEP", "200"))  # finished jobs kept for GET /admin/jobs
+ADMIN_TOKEN = os.getenv("NEUROSENSE_ADMIN_TOKEN")
+
+PRIORITIES = {"high": 0, "normal": 5, "low": 10}
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+JOB_KINDS = {}  # kind -> {"run": fn(job, **params), "signature", "priority": int, "subprocess": bool}
+
+_PERCENT = re.compile(r"(\d{1,3})%")
+
+
+def admin_token_ok(value) -> bool:
+    return bool(ADMIN_TOKEN) and value == ADMIN_TOKEN
+
+
+def parse_priority(priority) -> int:
+    if isinstance(priority, str):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}' (use {', '.join(PRIORITIES)} or an int)")
+        return PRIORITIES[priority]
+    return int(priority)
+
+
+# =============================================================================
+# 1️⃣  Job kinds
+# =============================================================================
+def job_kind(name: str, priority="normal"):
+    """Registers fn(job, **params) as an in-process job kind."""
+    def register(fn):
+        signature = inspect.signature(fn)
+        signature = signature.replace(parameters=list(signature.parameters.values())[1:])  # drop `job`
+        JOB_KINDS[name] = {
+            "run": fn, "signature": signature, "priority": parse_priority(priority), "subprocess": False,
+        }
+        return fn
+    return register
+
+
+def command_job(name: str, priority="low"):
+    """Registers argv(**params) as a job kind that runs the returned command in a subprocess."""
+    def register(argv):
+        def run(job, **params):
+            return _run_command(job, argv(**params))
+        JOB_KINDS[name] = {
+            "run": run, "signature": inspect.signature(argv), "priority": parse_priority(priority), "subprocess": True,
+        }
+        return argv
+    return register
+
+
+def _lower_priority():
+    os.nice(10)  # interactive requests keep the CPU
+
+
+def _run_command(job, argv):
+    import subprocess
+
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR), "PYTHONUNBUFFERED": "1"}
+    proc = subprocess.Popen(
+        argv, cwd=BACKEND_DIR, env=env, text=True, bufsize=1,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        preexec_fn=_lower_priority if hasattr(os, "nice") else None,
+    )
+    job.proc = proc
+    try:
+        for line in proc.stdout:  # text mode: tqdm's \r updates arrive as lines
+            line = line.strip()
+            if not line:
+                continue
+            job.log.append(line)
+            match = _PERCENT.search(line)
+            job.progress(int(match.group(1)) / 100 if match else None, line[:200])
+        returncode = proc.wait()
+    finally:
+        job.proc = None
+    if job.cancel_requested:
+        return None
+    if returncode != 0:
+        raise RuntimeError(f"{' '.join(argv[1:3])} exited with {returncode}: {job.log[-1] if job.log else ''}")
+    return {"returncode": returncode}
+
+
+def _python(*args):
+    return [sys.executable, *map(str, args)]
+
+
+@command_job("retrain_subjects")
+def _retrain_subjects(subjects=None, force=False, feature_set=None):
+    argv = _python("-m", "app.train_models", "--train-subjects")
+    if subjects:
+        argv += ["--subjects", *map(str, subjects)]
+    if force:
+        argv.append("--force")
+    if feature_set:
+        argv += ["--feature-set", feature_set]
+    return argv
+
+
+@command_job("retrain_loso")
+def _retrain_loso(feature_set=None):
+    argv = _python("-m", "app.train_models", "--train-loso")
+    return argv + ["--feature-set", feature_set] if feature_set else argv
+
+
+@command_job("incremental_update", priority="normal")
+def _incremental_update(subject, session, generalized=False):
+    argv = _python("-m", "app.incremental", "--subject", int(subject), "--session", int(session))
+    return argv + ["--generalized"] if generalized else argv
+
+
+@command_job("rebuild_features")
+def _rebuild_features(feature_set=None):
+    argv = _python(BACKEND_DIR / "preprocess_all.py")
+    return argv + ["--feature-set", feature_set] if feature_set else argv
+
+
+@command_job("backfill_scores")
+def _backfill_scores():
+    return _python(BACKEND_DIR / "scripts" / "backfill_scores.py")
+
+
+@command_job("rebuild_shared_store", priority="normal")
+def _rebuild_shared_store():
+    return _python("-m", "app.shared_store", "build")
+
+
+# =============================================================================
+# 2️⃣  Jobs
+# =============================================================================
+class Job:
+    def __init__(self, kind, params, priority, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.key = dedup_key(kind, params)
+        self.status = QUEUED
+        self.fraction = None
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log = deque(maxlen=50)
+        self.proc = None
+        self.cancel_requested = False
+        self.interrupted = False
+
+    def progress(self, fraction=None, message=None):
+        """Called by handlers; fraction in [0, 1] (None keeps the last one)."""
+        if fraction is not None:
+            self.fraction = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def to_dict(self, log=False):
+        out = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": self.fraction,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if log:
+            out["log"] = list(self.log)
+        return out
+
+    @classmethod
+    def from_dict(cls, d):
+        job = cls(d["kind"], d["params"], d["priority"], job_id=d["id"])
+        for field in ("status", "message", "result", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, field, d.get(field))
+        job.fraction = d.get("progress")
+        return job
+
+
+def dedup_key(kind, params) -> str:
+    return f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class _SQLiteJobs:
+    """Optional persistence: one row per job, the job dict as JSON."""
+
+    def __init__(self, path):
+        import sqlite3
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, created_at REAL, data TEXT)"
+            )
+
+    def save(self, job):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, json.dumps(job.to_dict(), default=str)),
+            )
+
+    def delete(self, job_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in job_ids])
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM jobs ORDER BY created_at").fetchall()
+        return [Job.from_dict(json.loads(data)) for (data,) in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+# =============================================================================
+# 3️⃣  Queue + worker pool
+# =============================================================================
+class JobQueue:
+    def __init__(self, workers=WORKERS, db_path=JOB_DB, keep=KEEP):
+        self.n_workers = workers
+        self.keep = keep
+        self._db_path = db_path
+        self._db = None
+        self._jobs = {}       # id -> Job (queued, running, and the last `keep` finished)
+        self._pending = {}    # dedup key -> queued Job
+        self._heap = []       # (priority, seq, job); stale entries are skipped
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._stopping = False
+        self._loaded = False
+
+    # ---- submit / inspect --------------------------------------------------
+    def submit(self, kind, params=None, priority=None):
+        """Returns (job, created). An identical queued job is returned instead of a new one."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}' (known: {', '.join(sorted(JOB_KINDS))})")
+        params = params or {}
+        try:
+            JOB_KINDS[kind]["signature"].bind(**params)
+        except TypeError as exc:
+            raise ValueError(f"Bad params for '{kind}': {exc}") from None
+        priority = JOB_KINDS[kind]["priority"] if priority is None else parse_priority(priority)
+        self._ensure_started()
+        with self._cond:
+            job = self._pending.get(dedup_key(kind, params))
+            if job is not None:
+                if priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), job))
+                    self._save(job)
+                return job, False
+            job = Job(kind, params, priority)
+            self._enqueue(job)
+            self._save(job)
+            return job, True
+
+    def get(self, job_id):
+        self._ensure_loaded()
+        return self._jobs.get(job_id)
+
+    def list(self, status=None, kind=None, limit=100):
+        """Newest first."""
+        self._ensure_loaded()
+        with self._cond:
+            jobs = [
+                j for j in self._jobs.values()
+                if (status is None or j.status == status) and (kind is None or j.kind == kind)
+            ]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)[:limit]
+
+    def cancel(self, job_id):
+        """Queued jobs are dropped; running subprocess jobs are terminated."""
+        self._ensure_loaded()
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                self._pending.pop(job.key, None)
+                self._finish(job, CANCELLED)
+                return job
+            proc = job.proc
+        if proc is not None:
+            proc.terminate()
+        return job
+
+    # ---- lifecycle ------------------------------------------------------------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._cond:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self._db_path:
+                return
+            self._db = _SQLiteJobs(self._db_path)
+            for job in self._db.load():
+                if job.status in FINISHED:
+                    self._jobs[job.id] = job
+                elif job.key in self._pending:
+                    job.started_at = None
+                    self._finish(job, CANCELLED, message="duplicate of a requeued job")
+                else:
+                    job.status, job.started_at = QUEUED, None
+                    job.message = "requeued after restart"
+                    self._enqueue(job)
+                    self._save(job)
+
+    def _ensure_started(self):
+        # started lazily (and again after a fork): threads do not survive fork()
+        self._ensure_loaded()
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid, self._stopping = os.getpid(), False
+            self._threads = [
+                threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.n_workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def start(self):
+        """Starts the workers now if persisted jobs are waiting (app startup)."""
+        self._ensure_loaded()
+        if self._pending:
+            self._ensure_started()
+
+    def close(self, timeout=10.0):
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._stopping = True
+            running = [j for j in self._jobs.values() if j.status == RUNNING]
+            self._cond.notify_all()
+        for job in running:
+            job.interrupted = True  # stays "running" in the DB: requeued on the next start
+            if job.proc is not None:
+                job.proc.terminate()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads, self._pid = [], None
+        if self._db is not None:
+            self._db.close()
+            self._db, self._loaded = None, False
+
+    # ---- internals (callers hold self._cond) --------------------------------------
+    def _enqueue(self, job):
+        self._jobs[job.id] = job
+        self._pending[job.key] = job
+        heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+        JOBS_QUEUED.set(len(self._pending))
+        self._cond.notify()
+
+    def _save(self, job):
+        if self._db is not None:
+            self._db.save(job)
+
+    def _finish(self, job, status, result=None, error=None, message=None):
+        job.status, job.result, job.error = status, result, error
+        job.finished_at = time.time()
+        if message is not None:
+            job.message = message
+        if status == SUCCEEDED:
+            job.fraction = 1.0
+        if job.started_at is not None:
+            JOB_SECONDS.labels(job.kind, status).observe(job.finished_at - job.started_at)
+        JOBS_QUEUED.set(len(self._pending))
+        self._save(job)
+        self._trim()
+
+    def _trim(self):
+        finished = sorted((j for j in self._jobs.values() if j.status in FINISHED), key=lambda j: j.finished_at or 0)
+        dropped = [j.id for j in finished[: max(len(finished) - self.keep, 0)]]
+        for job_id in dropped:
+            del self._jobs[job_id]
+        if dropped and self._db is not None:
+            self._db.delete(dropped)
+
+    def _next(self):
+        while True:
+            while self._heap and not self._stopping:
+                priority, _, job = heapq.heappop(self._heap)
+                if job.status == QUEUED and priority == job.priority:
+                    return job
+            if self._stopping:
+                return None
+            self._cond.wait()
+
+    # ---- worker threads ----------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                job = self._next()
+                if job is None:
+                    return
+                self._pending.pop(job.key, None)
+                job.status, job.started_at = RUNNING, time.time()
+                JOBS_QUEUED.set(len(self._pending))
+                JOBS_RUNNING.inc()
+                self._save(job)
+
+            try:
+                result = JOB_KINDS[job.kind]["run"](job, **job.params)
+                status, error = (CANCELLED if job.cancel_requested else SUCCEEDED), None
+            except Exception as exc:
+                result, status, error = None, FAILED, f"{type(exc).__name__}: {exc}"
+            JOBS_RUNNING.dec()
+
+            with self._cond:
+                if job.interrupted and status != SUCCEEDED:
+                    continue
+                self._finish(job, status, result=result, error=error)
+
+
+_queue = JobQueue()
+
+
+def submit_job(kind, params=None, priority=None):
+    return _queue.submit(kind, params, priority)
+
+
+def get_job(job_id):
+    return _queue.get(job_id)
+
+
+def list_jobs(status=None, kind=None, limit=100):
+    return _queue.list(status, kind, limit)
+
+
+def cancel_job(job_id):
+    return _queue.cancel(job_id)
+
+
+def start_jobs():
+    _queue.start()
+
+
+def close_jobs():
+    _queue.close()
@@ -1,41 +1,83 @@
 # backend/app/main.py
 
+import hashlib
+import io
 import json
-import math
+import time
+import zipfile
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+import orjson
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi import Query
 from fastapi import Body
+from fastapi import Header
 from datetime import datetime
-from sklearn.metrics import roc_auc_score
-from app.models_serving import get_subject_model, get_generalized_model, predict_with_model
+from app.models_serving import (
+    get_subject_model,
+    get_generalized_model,
+    model_version,
+    model_file_version,
+    bundle_feature_set,
+    FeatureSetMismatch,
+    roc_auc,
+)
+from app.features import feature_filename, npz_feature_set
 from app.recommendation import recommend_next_game
+from app.metrics import MetricsMiddleware, record_cache_lookup, render_latest, set_model_type, stage
+from app.batching import close_batcher, predict_batched
+from app.jobs import admin_token_ok, cancel_job, close_jobs, get_job, job_kind, list_jobs, start_jobs, submit_job
+from app.shared_store import open_features
+from app.profiling import list_profiles, profile_path, profile_report, profiled, token_ok
+from app.nsi import clamp, compute_confidence_consistency, compute_nsi
+from app.streaming import OnlineP300Scorer
+from app.p300 import aggregate_p300, progressive_decode
+from app.encoding import array_response, NumpyJSONResponse
+from app.http_cache import cached_file_response, etag_matches, file_etag, not_modified
 from app.db import (
     check_db,
+    close_client,
     db_list_subjects,
     db_get_last_game,
     db_log_game,
+    get_session,
     get_sessions,
     insert_or_update_session,
-    get_cached_nsi, set_cached_nsi
+    get_cached_nsi, set_cached_nsi,
+    data_version,
 )
 
 ROOT = Path(__file__).resolve().parents[2]  # repo root
 STATIC_DIR = ROOT / "backend" / "static_data"
 
-app = FastAPI(title="NeuroSense Backend (dev)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the Mongo client is created lazily on first query, closed on shutdown
+    start_jobs()  # resumes persisted jobs, if any
+    yield
+    close_jobs()
+    close_batcher()
+    close_client()
+
+app = FastAPI(title="NeuroSense Backend (dev)", lifespan=lifespan)
 
 # Allow CORS from any origin for dev (you can lock this down later)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(FeatureSetMismatch)
+def feature_set_mismatch(request: Request, exc: FeatureSetMismatch):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
 
 # --- Utility functions ---
 def load_manifest():
@@ -57,49 +99,158 @@ def load_manifest():
         ]
     }
 
-def load_npz_as_json(npz_path: Path):
+def _read_npy_header(f):
+    """(shape, fortran_order, dtype) of an open .npy stream, positioned at the data."""
+    version = np.lib.format.read_magic(f)
+    read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    return read_header(f)
+
+def _npz_shape(d, key):
+    with d.zip.open(f"{key}.npy") as f:
+        return _read_npy_header(f)[0]
+
+def _npz_n_trials(d):
+    """Row count of X read from the .npy header only (no decompression of the data)."""
+    if "X" not in d.files:
+        return None
+    shape = _npz_shape(d, "X")
+    return shape[0] if shape else None
+
+def _iter_npz_rows(npz_path: Path, key: str, start: int, stop: int, chunk_size: int):
+    """
+    Rows [start, stop) of one npz array in blocks of chunk_size, read straight
+    from its zip member: only one block is decompressed and held at a time.
+    """
+    with zipfile.ZipFile(npz_path) as zf, zf.open(f"{key}.npy") as f:
+        shape, fortran_order, dtype = _read_npy_header(f)
+        if dtype.hasobject or (fortran_order and len(shape) > 1):
+            # pickled or column-major arrays cannot be read row by row
+            with np.load(npz_path, allow_pickle=True) as d:
+                v = d[key]
+            for s in range(start, stop, chunk_size):
+                yield v[s:min(s + chunk_size, stop)]
+            return
+        row_shape = tuple(shape[1:])
+        row_bytes = dtype.itemsize * int(np.prod(row_shape, dtype=np.int64))
+        f.seek(start * row_bytes, io.SEEK_CUR)
+        for s in range(start, stop, chunk_size):
+            n = min(chunk_size, stop - s)
+            yield np.frombuffer(f.read(n * row_bytes), dtype=dtype).reshape((n,) + row_shape)
+
+def _load_npz(npz_path: Path, offset: int = 0, limit: Optional[int] = None, columns=None):
+    """
+    Returns (payload, trial_keys). Per-trial arrays (same length as X) are
+    sliced to [offset, offset+limit); `columns` restricts which arrays are
+    read at all, so e.g. targets/events never decompress X.
+    """
     if not npz_path.exists():
         raise HTTPException(status_code=404, detail=f"{npz_path.name} not found")
     # load compressed npz
     with np.load(npz_path, allow_pickle=True) as d:
-        out = {}
-        for k, v in d.items():
-            # Attempt to convert arrays to lists; keep small metadata as-is
-            if isinstance(v, np.ndarray):
-                # convert to Python lists but keep shapes small
-                out[k] = v.tolist()
+        n_trials = _npz_n_trials(d)
+        trial_slice = slice(offset, None if limit is None else offset + limit)
+        out, trial_keys = {}, []
+        for k in d.files:
+            if columns is not None and k not in columns:
+                continue
+            v = d[k]
+            if isinstance(v, np.ndarray) and v.ndim >= 1:
+                if len(v) == n_trials:
+                    out[k] = v[trial_slice]
+                    trial_keys.append(k)
+                else:
+                    out[k] = v
+            elif isinstance(v, np.ndarray):
+                # 0-d metadata (info json string, runs_per_block)
+                out[k] = v.item()
             else:
                 # other types (int, str) -> convert
                 try:
                     out[k] = json.loads(v) if isinstance(v, (str, np.str_)) else v
                 except Exception:
                     out[k] = v.item() if hasattr(v, "item") else str(v)
-    return out
+    if n_trials is not None:
+        out["n_trials_total"] = int(n_trials)
+        out["offset"] = int(offset)
+    return out, trial_keys
 
-def get_session_probs(subject_id: str, session_id: str, prefer_subject_model: bool):
-    train_path = STATIC_DIR / subject_id / session_id / "train_features.npz"
-    if not train_path.exists():
-        raise FileNotFoundError
+def load_npz_as_json(npz_path: Path, offset: int = 0, limit: Optional[int] = None, columns=None):
+    """
+    Loads an npz into a dict ready for array_response: n-d arrays stay NumPy
+    (serialized natively by orjson / binary encoders), 0-d values become
+    plain Python values.
+    """
+    return _load_npz(npz_path, offset, limit, columns)[0]
 
-    with np.load(train_path, allow_pickle=True) as d:
-        X = d.get("X")
+def parse_columns(columns: Optional[str]):
+    if not columns:
+        return None
+    return {c.strip() for c in columns.split(",") if c.strip()}
 
+def stream_npz(npz_path: Path, offset: int, limit: Optional[int], columns, chunk_size: int):
+    """
+    NDJSON stream: one header line with the non-trial fields, then one line
+    per chunk of `chunk_size` trials. Per-trial arrays are read from the npz
+    chunk by chunk, so neither the arrays nor the JSON body are held in full.
+    """
+    if not npz_path.exists():
+        raise HTTPException(status_code=404, detail=f"{npz_path.name} not found")
+    with np.load(npz_path, allow_pickle=True) as d:
+        n_trials = _npz_n_trials(d)
+        wanted = [k for k in d.files if columns is None or k in columns]
+        shapes = {k: _npz_shape(d, k) for k in wanted}
+    trial_keys = [k for k in wanted if n_trials is not None and len(shapes[k]) >= 1 and shapes[k][0] == n_trials]
+    header, _ = _load_npz(npz_path, offset, limit, set(wanted) - set(trial_keys))
+    rows = len(range(n_trials or 0)[slice(offset, None if limit is None else offset + limit)]) if trial_keys else 0
+
+    def gen():
+        yield orjson.dumps({"type": "header", "rows": rows, **header}, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+        blocks = [_iter_npz_rows(npz_path, k, offset, offset + rows, chunk_size) for k in trial_keys]
+        for i, parts in enumerate(zip(*blocks)):
+            yield orjson.dumps(
+                {"type": "chunk", "offset": offset + i * chunk_size, **dict(zip(trial_keys, parts))},
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            ) + b"\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+def resolve_model_bundle(subject_id: str, prefer_subject_model: bool):
+    with stage("model_resolve"):
+        model_bundle, model_used = _resolve_model_bundle(subject_id, prefer_subject_model)
+        set_model_type(model_used)  # labels this stage too (read when it closes)
+    return model_bundle, model_used
+
+def _resolve_model_bundle(subject_id: str, prefer_subject_model: bool):
     try:
         subj_num = int(subject_id.replace("SBJ", ""))
     except:
         subj_num = None
 
-    model_bundle = None
     if prefer_subject_model and subj_num is not None:
         try:
             model_bundle = get_subject_model(subj_num)
         except FileNotFoundError:
-            pass
+            model_bundle = None
+        if model_bundle is not None:
+            return model_bundle, "subject"
 
-    if model_bundle is None:
-        model_bundle = get_generalized_model()
+    return get_generalized_model(), "loso"
+
+def session_feature_path(subject_id: str, session_id: str, kind: str = "train", model_bundle=None) -> Path:
+    """Feature file of a session built with the feature set the model was trained on."""
+    return STATIC_DIR / subject_id / session_id / feature_filename(kind, bundle_feature_set(model_bundle))
+
+def get_session_probs(subject_id: str, session_id: str, prefer_subject_model: bool):
+    model_bundle, _ = resolve_model_bundle(subject_id, prefer_subject_model)
+    train_path = session_feature_path(subject_id, session_id, "train", model_bundle)
+    if not train_path.exists():
+        raise FileNotFoundError
 
-    return predict_with_model(model_bundle, X)
+    with stage("npz_load"), open_features(train_path) as d:
+        X = d.get("X")
+        feature_set = npz_feature_set(d)
+
+    return predict_batched(model_bundle, X, feature_set)
 
 def load_session_scores(subject_id):
     sessions = get_sessions(subject_id)
@@ -112,14 +263,27 @@ def load_session_scores(subject_id):
 def load_nsi(subject_id: str):
     """
     STEP 7B
-    - Uses cached NSI if available
-    - Computes entropy-based confidence
+    - Cached NSI document ({"nsi", "components", "stale", ...}), never computed
+      on the request path
+    - On a miss or a stale entry the nsi_recompute job is queued (deduplicated
+      by the job queue); the stale value is served meanwhile, None on a miss
     """
 
     cached = get_cached_nsi(subject_id)
-    if cached:
-        return cached["nsi"]
+    fresh = bool(cached) and not cached.get("stale")
+    record_cache_lookup("nsi", fresh)
+    if not fresh:
+        submit_job("nsi_recompute", {"subject_id": subject_id})
+    return cached
+
+def nsi_stamp(cached) -> str:
+    return f"{cached.get('updated_at')}:{cached.get('stale', False)}" if cached else "pending"
 
+def compute_and_cache_nsi(subject_id: str, progress=None):
+    """
+    Entropy-based confidence over every session + the NSI formula, cached.
+    None below 3 scored sessions (cached too, so readers stop queueing jobs).
+    """
     sessions = get_sessions(subject_id)
     scores = [
         s["score"] for s in sessions
@@ -127,34 +291,44 @@ def load_nsi(subject_id: str):
     ]
 
     if len(scores) < 3:
+        set_cached_nsi(subject_id, None, None)
         return None
 
-    confidence_scores = []
+    # entropy over every session's probs + the NSI formula
+    with stage("nsi_compute"):
+        confidence_scores = []
 
-    for s in sessions:
-        session_id = s["session_id"]
+        for i, s in enumerate(sessions):
+            session_id = s["session_id"]
 
-        use_subject = len(sessions) >= 3
+            use_subject = len(sessions) >= 3
 
-        probs = get_session_probs(
-            subject_id,
-            session_id,
-            prefer_subject_model=use_subject
-        )
+            probs = get_session_probs(
+                subject_id,
+                session_id,
+                prefer_subject_model=use_subject
+            )
 
-        confidence_scores.append(
-            compute_confidence_consistency(probs)
-        )
+            confidence_scores.append(
+                compute_confidence_consistency(probs)
+            )
+            if progress:
+                progress((i + 1) / len(sessions), session_id)
 
-    nsi_value, components = compute_nsi(
-        scores,
-        confidence_scores
-    )
+        nsi_value, components = compute_nsi(
+            scores,
+            confidence_scores
+        )
 
     set_cached_nsi(subject_id, nsi_value, components)
 
     return nsi_value
 
+@job_kind("nsi_recompute", priority="low")
+def nsi_recompute_job(job, subject_id: str):
+    """Re-warms the NSI cache after a session score changed."""
+    return {"subject_id": subject_id, "nsi": compute_and_cache_nsi(subject_id, progress=job.progress)}
+
 def get_last_game(subject_id):
     try:
         return db_get_last_game(subject_id)
@@ -162,79 +336,213 @@ def get_last_game(subject_id):
         return None
 
 
-# NSI utilities
-def clamp(x, lo=0.0, hi=1.0):
-    return max(lo, min(hi, x))
+# --- Conditional GET (ETag) helpers ---
+CACHE_CONTROL = "private, no-cache"
 
-def compute_confidence_consistency(probs: np.ndarray) -> float:
-    """
-    Inverse entropy → higher = more confident / consistent
-    probs: array of probabilities for one session
-    """
-    eps = 1e-8
-    p = np.clip(probs, eps, 1 - eps)
-    entropy = -np.mean(p * np.log(p) + (1 - p) * np.log(1 - p))
-    max_entropy = -(
-        0.5 * math.log(0.5) + 0.5 * math.log(0.5)
-    )
-    return 1.0 - clamp(entropy / max_entropy)
+def compute_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
 
-def compute_nsi(session_scores, confidence_scores):
+def conditional_json(request: Request, etag: str, build):
     """
-    session_scores: list of mean probabilities per session
-    confidence_scores: list of confidence consistency per session
+    Returns 304 without calling build() when If-None-Match matches `etag`,
+    otherwise the built body with ETag + Cache-Control headers.
     """
-    n = len(session_scores)
-    if n < 3:
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, {"Cache-Control": CACHE_CONTROL})
+    return NumpyJSONResponse(build(), headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def subject_number(subject_id: str):
+    try:
+        return int(subject_id.replace("SBJ", ""))
+    except Exception:
         return None
 
-    scores = np.array(session_scores)
+def game_history_stamp():
+    path = STATIC_DIR / "game_history.json"
+    return file_etag(path) if path.exists() else ""
 
-    # A) Baseline
-    B = float(np.mean(scores[:2]))
-    B_norm = clamp(B)
 
-    # B) Variability
-    V = float(np.std(scores))
-    V_norm = clamp(V / 0.25)  # 0.25 ≈ high instability
+# --- API Endpoints ---
+@app.get("/health")
+def health():
+    # liveness only: no DB round-trip, no model load
+    return {"status": "ok"}
 
-    # C) Improvement
-    I = (scores[-1] - scores[0]) / max(1, n - 1)
-    I_norm = clamp((I + 0.2) / 0.4)
+@app.get("/health/db")
+def db_health():
+    return check_db()
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_latest()
+    return Response(body, media_type=content_type)
+
+# --- Profiling admin (requires NEUROSENSE_PROFILE_TOKEN) ---
+def require_profile_token(x_profile_token: Optional[str]):
+    if not token_ok(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling admin needs a valid X-Profile-Token")
+
+@app.get("/admin/profiles")
+def admin_list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """Stored request traces, slowest first."""
+    require_profile_token(x_profile_token)
+    return {"profiles": list_profiles()}
+
+@app.get("/admin/profiles/{profile_id}")
+def admin_get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    limit: int = Query(60, ge=1, le=1000),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """Call tree of one traced request: pstats text, or the raw .prof for snakeviz."""
+    require_profile_token(x_profile_token)
+    path = profile_path(profile_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            path.read_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{path.name}"'},
+        )
+    return Response(profile_report(profile_id, limit=limit, sort=sort), media_type="text/plain")
 
-    # D) Confidence consistency
-    C = float(np.mean(confidence_scores))
-    C_norm = clamp(C)
+# --- Background jobs admin (requires NEUROSENSE_ADMIN_TOKEN) ---
+def require_admin_token(x_admin_token: Optional[str]):
+    if not admin_token_ok(x_admin_token):
+        raise HTTPException(status_code=403, detail="Jobs admin needs a valid X-Admin-Token")
 
-    nsi_raw = (
-        0.30 * (1 - B_norm) +
-        0.30 * (1 - V_norm) +
-        0.25 * I_norm +
-        0.15 * C_norm
+@app.post("/admin/jobs", status_code=202)
+def admin_submit_job(payload: dict = Body(...), x_admin_token: Optional[str] = Header(None)):
+    """{"kind": ..., "params": {...}, "priority": "high" | "normal" | "low" | int}"""
+    require_admin_token(x_admin_token)
+    try:
+        job, created = submit_job(payload.get("kind"), payload.get("params"), payload.get("priority"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"created": created, "job": job.to_dict()}
+
+@app.get("/admin/jobs")
+def admin_list_jobs(
+    status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed|cancelled)$"),
+    kind: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Jobs newest first, with progress."""
+    require_admin_token(x_admin_token)
+    return {"jobs": [j.to_dict() for j in list_jobs(status, kind, limit)]}
+
+@app.get("/admin/jobs/{job_id}")
+def admin_get_job(job_id: str, x_admin_token: Optional[str] = Header(None)):
+    require_admin_token(x_admin_token)
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(log=True)
+
+@app.delete("/admin/jobs/{job_id}")
+def admin_cancel_job(job_id: str, x_admin_token: Optional[str] = Header(None)):
+    require_admin_token(x_admin_token)
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/manifest")
+def get_manifest(request: Request):
+    etag = compute_etag("manifest", data_version())
+    return conditional_json(request, etag, manifest_payload)
+
+@app.get("/subjects")
+def list_subjects(request: Request):
+    etag = compute_etag("subjects", data_version())
+    return conditional_json(request, etag, subjects_payload)
+
+@app.get("/nsi/{subject_id}")
+@profiled
+def get_nsi(subject_id: str, request: Request):
+    cached = load_nsi(subject_id)
+    etag = compute_etag(
+        "nsi", subject_id, data_version(subject_id), model_version(subject_number(subject_id)), nsi_stamp(cached)
     )
+    return conditional_json(request, etag, lambda: nsi_payload(subject_id, cached))
 
-    return round(nsi_raw * 100), {
-        "baseline": round(B_norm, 3),
-        "variability": round(V_norm, 3),
-        "improvement": round(I_norm, 3),
-        "consistency": round(C_norm, 3),
-    }
+@app.get("/recommend/next/{subject_id}")
+@profiled
+def recommend_next(subject_id: str, request: Request):
+    cached = load_nsi(subject_id)
+    etag = compute_etag(
+        "recommend",
+        subject_id,
+        data_version(subject_id, include_games=True),
+        model_version(subject_number(subject_id)),
+        game_history_stamp(),
+        nsi_stamp(cached),
+    )
+    return conditional_json(request, etag, lambda: recommend_payload(subject_id, cached))
+
+@app.get("/predict/compare/cohort")
+def compare_cohort_endpoint(
+    subjects: Optional[str] = Query(None, description="Comma-separated subject ids (default: all)"),
+    format: str = Query("json", pattern="^(json|csv|parquet)$"),
+):
+    """
+    Research-only: LOSO vs subject model for every session of the cohort,
+    scored in one batched pass per model. No DB writes.
+    """
+    from app.cohort import compare_cohort, summarize  # pandas + sklearn, research-only
 
+    subject_ids = [s.strip() for s in subjects.split(",") if s.strip()] if subjects else None
+    report = compare_cohort(subject_ids)
 
-# --- API Endpoints ---
-@app.get("/health/db")
-def db_health():
-    return check_db()
+    if format == "csv":
+        return Response(
+            report.to_csv(index=False),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="cohort_comparison.csv"'},
+        )
+    if format == "parquet":
+        buf = io.BytesIO()
+        try:
+            report.to_parquet(buf, index=False)
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Parquet export needs pyarrow or fastparquet installed")
+        return Response(
+            buf.getvalue(),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": 'attachment; filename="cohort_comparison.parquet"'},
+        )
 
-@app.get("/manifest")
-def get_manifest():
+    return NumpyJSONResponse({
+        "summary": summarize(report),
+        "columns": list(report.columns),
+        "rows": report.to_dict(orient="records"),
+    })
+
+@app.get("/predict/compare/{subject_id}/{session_id}")
+def compare_models(subject_id: str, session_id: str, request: Request):
+    features_stamp = compare_features_stamp(subject_id, session_id)
+    etag = compute_etag("compare", subject_id, session_id, features_stamp, model_version(subject_number(subject_id)))
+    return conditional_json(request, etag, lambda: compare_payload(subject_id, session_id))
+
+def compare_features_stamp(subject_id: str, session_id: str) -> str:
+    """Stamps of every feature file compare_payload reads (one per model's feature set)."""
+    subj_num = subject_number(subject_id)
+    bundles = [get_generalized_model(), get_subject_model(subj_num) if subj_num is not None else None]
+    paths = sorted({session_feature_path(subject_id, session_id, "train", b) for b in bundles})
+    return "|".join(f"{p.name}:{file_etag(p) if p.exists() else ''}" for p in paths)
+
+def manifest_payload():
     try:
         return load_manifest()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/subjects")
-def list_subjects():
+def subjects_payload():
     subjects = db_list_subjects()
 
     if not subjects:
@@ -263,28 +571,54 @@ def list_sessions(subject_id: str):
     }
 
 @app.get("/data/{subject_id}/{session_id}/train")
-def get_train_features(subject_id: str, session_id: str):
+def get_train_features(
+    subject_id: str,
+    session_id: str,
+    accept: Optional[str] = Header(None),
+    field: str = Query("X"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    columns: Optional[str] = Query(None, description="Comma-separated arrays, e.g. targets,events"),
+    stream: bool = Query(False),
+    chunk_size: int = Query(256, ge=1),
+):
     rel_path = STATIC_DIR / subject_id / session_id / "train_features.npz"
     if not rel_path.exists():
         raise HTTPException(status_code=404, detail="train_features.npz not found for this session")
-    payload = load_npz_as_json(rel_path)
-    return JSONResponse(payload)
+    cols = parse_columns(columns)
+    if stream:
+        return stream_npz(rel_path, offset, limit, cols, chunk_size)
+    payload = load_npz_as_json(rel_path, offset, limit, cols)
+    return array_response(payload, accept, field)
 
 @app.get("/data/{subject_id}/{session_id}/test")
-def get_test_features(subject_id: str, session_id: str):
+def get_test_features(
+    subject_id: str,
+    session_id: str,
+    accept: Optional[str] = Header(None),
+    field: str = Query("X"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    columns: Optional[str] = Query(None, description="Comma-separated arrays, e.g. targets,events"),
+    stream: bool = Query(False),
+    chunk_size: int = Query(256, ge=1),
+):
     rel_path = STATIC_DIR / subject_id / session_id / "test_features.npz"
     if not rel_path.exists():
         raise HTTPException(status_code=404, detail="test_features.npz not found for this session")
-    payload = load_npz_as_json(rel_path)
-    return JSONResponse(payload)
+    cols = parse_columns(columns)
+    if stream:
+        return stream_npz(rel_path, offset, limit, cols, chunk_size)
+    payload = load_npz_as_json(rel_path, offset, limit, cols)
+    return array_response(payload, accept, field)
 
 @app.get("/raw/static/{path:path}")
-def serve_static(path: str):
+def serve_static(path: str, request: Request):
     # if you want to serve the raw .npz or manifest file directly
-    file_path = STATIC_DIR / path
-    if not file_path.exists():
+    file_path = (STATIC_DIR / path).resolve()
+    if STATIC_DIR.resolve() not in file_path.parents or not file_path.is_file():
         raise HTTPException(status_code=404, detail="file not found")
-    return FileResponse(file_path)
+    return cached_file_response(file_path, request.headers)
 
 @app.get("/models/list")
 def list_models():
@@ -292,22 +626,32 @@ def list_models():
     # look for model files
     subj_dir = Path(ROOT) / "models" / "subject_models"
     if subj_dir.exists():
-        out["subject_models"] = sorted([p.name for p in subj_dir.glob("SBJ*_model.pkl")])
-    gen = Path(ROOT) / "models" / "generalized" / "generalized_model.pkl"
-    out["generalized_model"] = gen.exists()
+        files = {p.stem: p.name for p in subj_dir.glob("SBJ*_model.pkl")}
+        files.update({p.stem: p.name for p in subj_dir.glob("SBJ*_model.npz")})  # the artifact is what gets served
+        out["subject_models"] = sorted(files.values())
+    gen = Path(ROOT) / "models" / "generalized"
+    out["generalized_model"] = (gen / "generalized_model.npz").exists() or (gen / "generalized_model.pkl").exists()
     return out
 
 @app.get("/predict/session/{subject_id}/{session_id}")
+@profiled
 def predict_session(
     subject_id: str,
     session_id: str,
-    prefer_subject_model: Optional[bool] = Query(True)
+    prefer_subject_model: Optional[bool] = Query(True),
+    accept: Optional[str] = Header(None),
+    field: str = Query("probs"),
+    mode: str = Query("write", pattern="^(write|read|cached)$"),
 ):
     """
     Predict on precomputed features for a session.
     - subject_id: like 'SBJ01'
     - session_id: like 'S01'
     - prefer_subject_model: if true, try loading subject-specific model; otherwise use generalized
+    - mode: 'write' (default) predicts and upserts the score only if it changed,
+            'read' predicts without touching the database,
+            'cached' returns the stored score when it was produced by the current
+            model version (no probs, no write), else behaves like 'read'
     """
 
     # --------------------------------------------------
@@ -315,11 +659,7 @@ def predict_session(
     # --------------------------------------------------
     train_path = STATIC_DIR / subject_id / session_id / "train_features.npz"
     if not train_path.exists():
-        sessions = get_sessions(subject_id)
-        sess = next(
-            (s for s in sessions if s["session_id"] == session_id),
-            None
-        )
+        sess = get_session(subject_id, session_id)
         if not sess or sess.get("score") is None:
             raise HTTPException(
                 status_code=404,
@@ -335,10 +675,6 @@ def predict_session(
         })
 
 
-    with np.load(train_path, allow_pickle=True) as d:
-        X = d.get("X")
-        targets = d.get("targets") if "targets" in d else None
-
     # --------------------------------------------------
     # 2. Resolve model
     # --------------------------------------------------
@@ -353,88 +689,225 @@ def predict_session(
     model_bundle = None
     model_used = "loso"  # ✅ DEFAULT
 
-    # Use subject model only after enough data
-    if session_count >= 3 and subj_num is not None:
-        try:
-            model_bundle = get_subject_model(subj_num)
-            model_used = "subject"
-        except FileNotFoundError:
-            model_bundle = None
-
-    if model_bundle is None:
-        try:
-            model_bundle = get_generalized_model()
-            model_used = "loso"
-        except FileNotFoundError:
-            raise HTTPException(
-                status_code=404,
-                detail="No model found (subject or generalized)"
-            )
+    with stage("model_resolve"):
+        # Use subject model only after enough data
+        if session_count >= 3 and subj_num is not None:
+            try:
+                model_bundle = get_subject_model(subj_num)
+                model_used = "subject"
+            except FileNotFoundError:
+                model_bundle = None
+
+        if model_bundle is None:
+            try:
+                model_bundle = get_generalized_model()
+                model_used = "loso"
+            except FileNotFoundError:
+                raise HTTPException(
+                    status_code=404,
+                    detail="No model found (subject or generalized)"
+                )
+        set_model_type(model_used)
+
+    model_ver = model_file_version(model_used, subj_num)
+
+    if mode == "cached":
+        stored = next((s for s in sessions if s["session_id"] == session_id), None)
+        if (
+            stored
+            and stored.get("score") is not None
+            and stored.get("model_used") == model_used
+            and stored.get("model_version") == model_ver
+        ):
+            return JSONResponse({
+                "n_trials": 0,
+                "probs": [],
+                "score": stored["score"],
+                "model_used": model_used,
+                "note": "Loaded from database (cached score for current model)"
+            })
 
     # --------------------------------------------------
-    # 3. Predict
+    # 3. Predict (on features built with the model's feature set)
     # --------------------------------------------------
-    probs = predict_with_model(model_bundle, X)
-    probs_list = probs.tolist()
+    train_path = session_feature_path(subject_id, session_id, "train", model_bundle)
+    if not train_path.exists():
+        raise HTTPException(
+            status_code=409,
+            detail=f"No '{bundle_feature_set(model_bundle)}' features built for this session"
+        )
+
+    with stage("npz_load"), open_features(train_path) as d:
+        X = d.get("X")
+        targets = d.get("targets") if "targets" in d else None
+        feature_set = npz_feature_set(d)
+
+    probs = predict_batched(model_bundle, X, feature_set)
     mean_score = float(np.mean(probs))   # ✅ CANONICAL SESSION SCORE
 
     # --------------------------------------------------
     # 4. Persist session score (⭐ STEP 6 CORE)
+    #    conditional: no write / NSI invalidation if nothing changed
     # --------------------------------------------------
-    insert_or_update_session(
-        subject_id=subject_id,
-        session_id=session_id,
-        score=mean_score,
-        model_used=model_used,
-    )
+    if mode == "write":
+        with stage("mongo_upsert"):
+            changed = insert_or_update_session(
+                subject_id=subject_id,
+                session_id=session_id,
+                score=mean_score,
+                model_used=model_used,
+                model_version=model_ver,
+            )
+        if changed:
+            # NSI cache was invalidated: recompute off the request path
+            submit_job("nsi_recompute", {"subject_id": subject_id})
 
     # --------------------------------------------------
     # 5. Build response
     # --------------------------------------------------
     resp = {
-        "n_trials": int(len(probs_list)),
-        "probs": probs_list,
+        "n_trials": int(len(probs)),
+        "probs": probs,
         "score": mean_score,        # ✅ EXPLICIT SCORE
         "model_used": model_used,   # ✅ EXPLICIT MODEL
     }
 
     # Optional AUC (debug / dev)
-    if targets is not None and len(targets) == len(probs_list):
+    if targets is not None and len(targets) == len(probs):
         try:
-            resp["auc"] = float(
-                roc_auc_score(targets.astype(int), probs)
-            )
+            resp["auc"] = roc_auc(targets.astype(int), probs)
         except Exception as e:
             resp["auc_error"] = str(e)
 
-    return JSONResponse(resp)
+    return array_response(resp, accept, field)
 
-@app.get("/nsi/{subject_id}")
-def get_nsi(subject_id: str):
-    nsi = load_nsi(subject_id)
+@app.get("/p300/decode/{subject_id}/{session_id}")
+def decode_p300(
+    subject_id: str,
+    session_id: str,
+    prefer_subject_model: Optional[bool] = Query(True),
+    margin: Optional[float] = Query(None, ge=0.0, le=1.0),
+    min_runs: int = Query(1, ge=1),
+):
+    """
+    Scores the session's test trials and returns per-block object averages
+    and predicted objects. With `margin`, each block stops at the first run
+    where the best object leads the runner-up by at least that much.
+    """
+    model_bundle, model_used = resolve_model_bundle(subject_id, prefer_subject_model)
+    if model_bundle is None:
+        raise HTTPException(status_code=404, detail="No model found (subject or generalized)")
+
+    test_path = session_feature_path(subject_id, session_id, "test", model_bundle)
+    if not test_path.exists():
+        raise HTTPException(status_code=404, detail=f"{test_path.name} not found for this session")
 
+    with stage("npz_load"), open_features(test_path) as d:
+        X = d.get("X")
+        events = d.get("events")
+        runs_per_block = d.get("runs_per_block")
+        runs_per_block = int(runs_per_block) if runs_per_block is not None else 0
+        feature_set = npz_feature_set(d)
+
+    if X is None or events is None or len(events) == 0 or runs_per_block <= 0:
+        raise HTTPException(status_code=422, detail="Session has no events / runs_per_block to decode")
+
+    probs = predict_batched(model_bundle, X, feature_set)
+
+    try:
+        if margin is None:
+            blocks = aggregate_p300(probs, events, runs_per_block)
+        else:
+            blocks = progressive_decode(probs, events, runs_per_block, margin=margin, min_runs=min_runs)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {
+        "subject_id": subject_id,
+        "session_id": session_id,
+        "model_used": model_used,
+        "runs_per_block": runs_per_block,
+        "n_blocks": len(blocks),
+        "blocks": blocks,
+    }
+
+@app.websocket("/stream/predict/{subject_id}")
+async def stream_predict(websocket: WebSocket, subject_id: str, prefer_subject_model: bool = True):
+    """
+    Online P300 scoring.
+    Client sends JSON chunks: {"samples": [[ch1..ch8], ...], "events": [[offset, code], ...]}
+    (event offsets relative to the first sample of the chunk).
+    Server pushes {"type": "trial", "event_index", "code", "onset", "prob", "latency_ms"}
+    for each event as soon as its 1.4 s trial is complete (features from 100–700 ms,
+    filtered and demeaned per trial exactly as in training).
+    """
+    await websocket.accept()
+
+    # model loads, filtering and the model call run in the threadpool, never on the event loop
+    model_bundle, model_used = await run_in_threadpool(resolve_model_bundle, subject_id, prefer_subject_model)
+    if model_bundle is None:
+        await websocket.send_json({"type": "error", "detail": "No model found (subject or generalized)"})
+        await websocket.close()
+        return
+
+    scorer = OnlineP300Scorer(model_bundle)
+    await websocket.send_json({"type": "ready", "model_used": model_used, "fs": scorer.fs})
+
+    try:
+        while True:
+            try:
+                msg = await websocket.receive_json()
+            except (ValueError, KeyError):  # not JSON, or a binary frame
+                await websocket.send_json({"type": "error", "detail": "Expected a JSON text message"})
+                continue
+            if not isinstance(msg, dict):
+                await websocket.send_json({"type": "error", "detail": "Expected a JSON object"})
+                continue
+
+            received = time.perf_counter()
+            try:
+                trials = await run_in_threadpool(scorer.push, msg.get("samples", []), msg.get("events", []))
+            except (ValueError, TypeError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            latency_ms = round((time.perf_counter() - received) * 1000, 3)
+            for trial in trials:
+                await websocket.send_json({"type": "trial", **trial, "latency_ms": latency_ms})
+    except WebSocketDisconnect:
+        pass
+
+def nsi_payload(subject_id: str, cached):
     sessions = get_sessions(subject_id)
 
-    if nsi is None:
+    if cached is None:
         return {
             "subject": subject_id,
             "n_sessions": len(sessions),
             "nsi": None,
-            "message": "NSI available after at least 3 scored sessions",
+            "status": "pending",
+            "message": "NSI is being computed, retry shortly",
         }
 
-    cached = get_cached_nsi(subject_id)
+    if cached.get("nsi") is None:
+        return {
+            "subject": subject_id,
+            "n_sessions": len(sessions),
+            "nsi": None,
+            "status": "pending" if cached.get("stale") else "ok",
+            "message": "NSI available after at least 3 scored sessions",
+        }
 
     return {
         "subject": subject_id,
         "n_sessions": len(sessions),
-        "nsi": nsi,
+        "nsi": cached["nsi"],
+        "status": "stale" if cached.get("stale") else "ok",
         "components": cached.get("components"),
         "interpretation": "Higher NSI indicates more stable and adaptive neural responses",
     }
 
-@app.get("/recommend/next/{subject_id}")
-def recommend_next(subject_id: str):
+def recommend_payload(subject_id: str, cached):
     scores = load_session_scores(subject_id)
 
     if len(scores) < 3:
@@ -443,15 +916,17 @@ def recommend_next(subject_id: str):
             detail="Not enough sessions"
         )
 
-    nsi = load_nsi(subject_id)
+    nsi = cached.get("nsi") if cached else None
 
     if nsi is None:
         raise HTTPException(
-            status_code=400,
-            detail="NSI not available yet"
+            status_code=503,
+            detail="NSI not available yet, retry shortly",
+            headers={"Retry-After": "1"},
         )
 
-    return recommend_next_game(nsi, scores, subject_id)
+    with stage("recommend"):
+        return recommend_next_game(nsi, scores, subject_id)
 
 @app.post("/game/log")
 def log_game(payload: dict = Body(...)):
@@ -473,8 +948,7 @@ def log_game(payload: dict = Body(...)):
 
 
 # COMPARISON
-@app.get("/predict/compare/{subject_id}/{session_id}")
-def compare_models(subject_id: str, session_id: str):
+def compare_payload(subject_id: str, session_id: str):
     """
     Research-only endpoint
     Compares LOSO vs Subject-specific model on the SAME session
@@ -482,20 +956,23 @@ def compare_models(subject_id: str, session_id: str):
     """
 
     # --------------------------------------------------
-    # 1. Load features
+    # 1. Load features (each model gets its own feature set)
     # --------------------------------------------------
-    train_path = STATIC_DIR / subject_id / session_id / "train_features.npz"
-    if not train_path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail="train_features.npz not found for this session"
-        )
+    def load_features(model_bundle):
+        train_path = session_feature_path(subject_id, session_id, "train", model_bundle)
+        if not train_path.exists():
+            raise HTTPException(
+                status_code=404,
+                detail=f"{train_path.name} not found for this session"
+            )
 
-    with np.load(train_path, allow_pickle=True) as d:
-        X = d.get("X")
+        with stage("npz_load"), open_features(train_path) as d:
+            X = d.get("X")
+            feature_set = npz_feature_set(d)
 
-    if X is None:
-        raise HTTPException(500, "Invalid feature file")
+        if X is None:
+            raise HTTPException(500, "Invalid feature file")
+        return X, feature_set
 
     # --------------------------------------------------
     # 2. Resolve subject number
@@ -509,7 +986,7 @@ def compare_models(subject_id: str, session_id: str):
     # 3. LOSO model
     # --------------------------------------------------
     loso_model = get_generalized_model()
-    loso_probs = predict_with_model(loso_model, X)
+    loso_probs = predict_batched(loso_model, *load_features(loso_model))
 
     loso_score = float(np.mean(loso_probs))
     loso_conf = compute_confidence_consistency(loso_probs)
@@ -518,7 +995,7 @@ def compare_models(subject_id: str, session_id: str):
     # 4. Subject model
     # --------------------------------------------------
     subject_model = get_subject_model(subj_num)
-    subject_probs = predict_with_model(subject_model, X)
+    subject_probs = predict_batched(subject_model, *load_features(subject_model))
 
     subject_score = float(np.mean(subject_probs))
     subject_conf = compute_confidence_consistency(subject_probs)
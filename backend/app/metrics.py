@@ -0,0 +1,162 @@
+# backend/app/metrics.py
+"""
+Prometheus instrumentation for the serving hot path.
+
+MetricsMiddleware records the request and remembers its ASGI scope in a
+contextvar, so stage() timers anywhere below (including sync endpoints in
+the threadpool) are labelled with the matched route template. Endpoints tag
+the model type with set_model_type("subject" | "loso").
+
+Overhead is one perf_counter pair and one histogram observe per stage.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+_scope = ContextVar("metrics_scope", default=None)
+_model_type = ContextVar("metrics_model_type", default="none")
+
+# 0.1 ms … 10 s
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    "neurosense_request_seconds",
+    "HTTP request latency",
+    ["endpoint", "method", "status"],
+    buckets=BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "neurosense_stage_seconds",
+    "Time spent in a hot-path stage",
+    ["stage", "endpoint", "model_type"],
+    buckets=BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "neurosense_cache_lookups_total",
+    "Cache lookups by result",
+    ["cache", "result"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "neurosense_cache_hit_ratio",
+    "Hits / lookups since process start",
+    ["cache"],
+)
+
+MODEL_CACHE_ENTRIES = Gauge(
+    "neurosense_model_cache_entries",
+    "Model bundles held in models_serving._loaded_cache",
+)
+
+# micro-batching (app.batching)
+BATCH_ROWS = Histogram(
+    "neurosense_batch_rows",
+    "Feature rows per batched model call",
+    buckets=(100, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000),
+)
+BATCH_REQUESTS = Histogram(
+    "neurosense_batch_requests",
+    "Requests merged into one batched model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+BATCH_QUEUE_SECONDS = Histogram(
+    "neurosense_batch_queue_seconds",
+    "Time a request waits for its batch to start",
+    buckets=BUCKETS,
+)
+BATCH_FALLBACKS = Counter(
+    "neurosense_batch_fallbacks_total",
+    "Batched requests predicted on their own instead",
+    ["reason"],
+)
+BATCH_MAX_WAIT_SECONDS = Gauge("neurosense_batch_max_wait_seconds", "Configured extra wait under load")
+BATCH_MAX_ROWS = Gauge("neurosense_batch_max_rows", "Configured rows per batch")
+
+# background jobs (app.jobs)
+JOBS_QUEUED = Gauge("neurosense_jobs_queued", "Background jobs waiting for a worker")
+JOBS_RUNNING = Gauge("neurosense_jobs_running", "Background jobs being run")
+JOB_SECONDS = Histogram(
+    "neurosense_job_seconds",
+    "Background job run time",
+    ["kind", "status"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+
+_cache_counts = {}  # cache -> [hits, misses]
+
+
+# =============================================================================
+# 1️⃣  Labels
+# =============================================================================
+def current_scope():
+    """ASGI scope of the request being handled (None outside a request)."""
+    return _scope.get()
+
+
+def current_endpoint() -> str:
+    scope = _scope.get()
+    if scope is None:
+        return "none"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def set_model_type(model_type: str):
+    _model_type.set(model_type or "none")
+
+
+# =============================================================================
+# 2️⃣  Stage timers and cache counters
+# =============================================================================
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name, current_endpoint(), _model_type.get()).observe(time.perf_counter() - start)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    counts = _cache_counts.get(cache)
+    if counts is None:
+        counts = _cache_counts[cache] = [0, 0]
+        CACHE_HIT_RATIO.labels(cache).set_function(lambda c=counts: c[0] / max(1, c[0] + c[1]))
+    counts[0 if hit else 1] += 1
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+# =============================================================================
+# 3️⃣  ASGI middleware + exposition
+# =============================================================================
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        scope_token = _scope.set(scope)
+        model_token = _model_type.set("none")
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.labels(current_endpoint(), scope["method"], str(status["code"])).observe(
+                time.perf_counter() - start
+            )
+            _scope.reset(scope_token)
+            _model_type.reset(model_token)
+
+
+def render_latest():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,58 +1,143 @@
 # backend/app/models_serving.py
 import os
 from pathlib import Path
-import joblib
 import numpy as np
 
+from app.artifacts import artifact_path, load_artifact, predict_fused
+from app.features import DEFAULT_FEATURE_SET, extract
+from app.shared_store import shared_model_path
+from app.metrics import MODEL_CACHE_ENTRIES, record_cache_lookup, stage
+
 ROOT = Path(__file__).resolve().parents[2]  # repo root
 MODELS_DIR = ROOT / "models"
 SUBJECT_MODELS_DIR = MODELS_DIR / "subject_models"
 GENERALIZED_MODEL_PATH = MODELS_DIR / "generalized" / "generalized_model.pkl"
 
 _loaded_cache = {}
+MODEL_CACHE_ENTRIES.set_function(lambda: len(_loaded_cache))
+
+def _model_source(pkl_path: Path) -> Path:
+    """The file served for a model: its fused .npz artifact, else the legacy .pkl bundle."""
+    npz_path = artifact_path(pkl_path)
+    return npz_path if npz_path.exists() else Path(pkl_path)
 
-def _load_joblib(path: Path):
+def _model_file(pkl_path: Path) -> Path:
+    """Where to load it from: the shared store's copy when it is up to date, else the source."""
+    source = _model_source(pkl_path)
+    return shared_model_path(source) or source
+
+def _load_model_file(path: Path):
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(str(path))
-    # simple cache by path
+    # cache by path, reloaded when the file is replaced (hot-load of new versions)
     key = str(path.resolve())
-    if key in _loaded_cache:
-        return _loaded_cache[key]
-    obj = joblib.load(str(path))
-    _loaded_cache[key] = obj
+    mtime = path.stat().st_mtime_ns
+    cached = _loaded_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        record_cache_lookup("model", True)
+        return cached[1]
+    record_cache_lookup("model", False)
+    if path.suffix == ".npz":
+        obj = load_artifact(path)
+    else:
+        import joblib  # legacy bundles need joblib + sklearn, loaded on first use
+
+        obj = joblib.load(str(path))
+    _loaded_cache[key] = (mtime, obj)
     return obj
 
 def get_subject_model(subject_id: int):
-    # e.g., SBJ01_model.pkl
-    fname = f"SBJ{subject_id:02d}_model.pkl"
-    p = SUBJECT_MODELS_DIR / fname
+    # e.g., SBJ01_model.npz (or SBJ01_model.pkl before export)
+    p = _model_file(SUBJECT_MODELS_DIR / f"SBJ{subject_id:02d}_model.pkl")
     if p.exists():
-        return _load_joblib(p)
+        return _load_model_file(p)
     return None
 
 def get_generalized_model():
-    p = Path(GENERALIZED_MODEL_PATH)
+    p = _model_file(GENERALIZED_MODEL_PATH)
     if p.exists():
-        return _load_joblib(p)
+        return _load_model_file(p)
     return None
 
-def predict_with_model(model_bundle, X):
+def _file_stamp(p: Path) -> str:
+    if not p.exists():
+        return ""
+    st = p.stat()
+    return f"{p.name}:{st.st_size}:{st.st_mtime_ns}"
+
+def model_file_version(model_used: str, subject_id: int = None) -> str:
+    """Version stamp of the single model file behind model_used ('subject' / 'loso')."""
+    if model_used == "subject" and subject_id is not None:
+        return _file_stamp(_model_source(SUBJECT_MODELS_DIR / f"SBJ{subject_id:02d}_model.pkl"))
+    return _file_stamp(_model_source(GENERALIZED_MODEL_PATH))
+
+def model_version(subject_id: int = None) -> str:
+    """
+    Cheap version stamp (size + mtime) of the model files a subject's
+    responses depend on: its subject model and the generalized model.
+    """
+    parts = [model_file_version("loso")]
+    if subject_id is not None:
+        parts.append(model_file_version("subject", subject_id))
+    return "|".join(p for p in parts if p)
+
+class FeatureSetMismatch(ValueError):
+    """Features were built with a different feature set than the model expects."""
+
+def bundle_feature_set(model_bundle) -> str:
+    # bundles trained before feature sets existed used the legacy stats features
+    return (model_bundle or {}).get("feature_set", DEFAULT_FEATURE_SET)
+
+def features_from_epochs(model_bundle, epochs, window=(100, 700), fs=250.0):
+    """
+    Filtered epochs (n_trials, n_channels, n_samples) -> the feature matrix the
+    bundle was trained on: spatial filter (if any) as one matrix product, then
+    the bundle's feature set.
+    """
+    return extract(
+        epochs, feature_set=bundle_feature_set(model_bundle), window=window, fs=fs,
+        spatial_filter=(model_bundle or {}).get("spatial_filter"),
+    )
+
+def roc_auc(y_true, scores) -> float:
+    """Rank (Mann-Whitney) ROC AUC with tie averaging, same value as sklearn's roc_auc_score."""
+    y_true = np.asarray(y_true).astype(bool)
+    n_pos = int(y_true.sum())
+    n_neg = y_true.size - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("ROC AUC needs both classes in y_true")
+    _, inverse, counts = np.unique(np.asarray(scores), return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return float((ranks[y_true].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+def predict_with_model(model_bundle, X, feature_set: str = None):
     """
     model_bundle is expected to be a dict with {'model': clf, 'pca': pca, ...}
+    or a fused artifact {'weights': w, 'bias': b, ...} (see app.artifacts)
     X: numpy array shape (n_samples, n_features)
+    feature_set: ID the features were built with (checked against the bundle when given)
     returns probs (n_samples,)
     """
+    if feature_set is not None and feature_set != bundle_feature_set(model_bundle):
+        raise FeatureSetMismatch(
+            f"Model expects feature set '{bundle_feature_set(model_bundle)}', got '{feature_set}'"
+        )
     if isinstance(X, list):
         X = np.array(X, dtype=float)
     if not hasattr(X, "shape"):
         X = np.array(X, dtype=float)
+    if "weights" in model_bundle:
+        with stage("predict_proba"):
+            return predict_fused(model_bundle, X)
     # find pca & model keys
     pca = model_bundle.get("pca") or model_bundle.get("PCA") or None
     model = model_bundle.get("model") or model_bundle.get("clf") or model_bundle.get("estimator")
     if pca is not None:
-        Xp = pca.transform(X)
+        with stage("pca_transform"):
+            Xp = pca.transform(X)
     else:
         Xp = X
-    probs = model.predict_proba(Xp)[:, 1]
+    with stage("predict_proba"):
+        probs = model.predict_proba(Xp)[:, 1]
     return probs
@@ -0,0 +1,77 @@
+# backend/app/nsi.py
+"""
+Neural Stability Index (NSI) utilities.
+"""
+import math
+import numpy as np
+
+
+def clamp(x, lo=0.0, hi=1.0):
+    return max(lo, min(hi, x))
+
+def compute_confidence_consistency(probs: np.ndarray) -> float:
+    """
+    Inverse entropy → higher = more confident / consistent
+    probs: array of probabilities for one session
+    """
+    eps = 1e-8
+    p = np.clip(probs, eps, 1 - eps)
+    entropy = -np.mean(p * np.log(p) + (1 - p) * np.log(1 - p))
+    max_entropy = -(
+        0.5 * math.log(0.5) + 0.5 * math.log(0.5)
+    )
+    return 1.0 - clamp(entropy / max_entropy)
+
+def compute_nsi(session_scores, confidence_scores):
+    """
+    session_scores: list of mean probabilities per session
+    confidence_scores: list of confidence consistency per session
+    """
+    n = len(session_scores)
+    if n < 3:
+        return None
+
+    scores = np.array(session_scores)
+
+    # A) Baseline
+    B = float(np.mean(scores[:2]))
+    B_norm = clamp(B)
+
+    # B) Variability
+    V = float(np.std(scores))
+    V_norm = clamp(V / 0.25)  # 0.25 ≈ high instability
+
+    # C) Improvement
+    I = (scores[-1] - scores[0]) / max(1, n - 1)
+    I_norm = clamp((I + 0.2) / 0.4)
+
+    # D) Confidence consistency
+    C = float(np.mean(confidence_scores))
+    C_norm = clamp(C)
+
+    nsi_raw = (
+        0.30 * (1 - B_norm) +
+        0.30 * (1 - V_norm) +
+        0.25 * I_norm +
+        0.15 * C_norm
+    )
+
+    return round(nsi_raw * 100), {
+        "baseline": round(B_norm, 3),
+        "variability": round(V_norm, 3),
+        "improvement": round(I_norm, 3),
+        "consistency": round(C_norm, 3),
+    }
+
+
+def confidence_consistency_segments(probs: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Vectorized compute_confidence_consistency for many sessions at once.
+    probs: concatenated probabilities; offsets: start index of each session.
+    """
+    eps = 1e-8
+    p = np.clip(probs, eps, 1 - eps)
+    ent = -(p * np.log(p) + (1 - p) * np.log(1 - p))
+    counts = np.diff(np.append(offsets, len(p)))
+    entropy = np.add.reduceat(ent, offsets) / counts
+    return 1.0 - np.clip(entropy / math.log(2), 0.0, 1.0)
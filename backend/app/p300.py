@@ -0,0 +1,81 @@
+# backend/app/p300.py
+"""
+P300 speller decoding: per-block object averages and progressive decoding.
+
+Trials are grouped as blocks of runs_per_block runs, each run flashing every
+object once (events are 1-based object codes). Everything is a handful of
+NumPy reductions over (blocks, runs, objects).
+"""
+import numpy as np
+
+
+def _run_sums(probs, events, runs_per_block, n_objects):
+    """
+    Returns per-run (sums, counts) with shape (n_blocks, runs_per_block, n_objects).
+    Raises ValueError on event codes outside 1..n_objects.
+    """
+    probs = np.asarray(probs, dtype=float)
+    events = np.asarray(events, dtype=int)
+    per_block = n_objects * runs_per_block
+    n_blocks = min(len(probs), len(events)) // per_block
+    n = n_blocks * per_block
+    if n and (events[:n].min() < 1 or events[:n].max() > n_objects):
+        raise ValueError(f"Event codes must be object numbers 1..{n_objects}")
+
+    # flat bin = (block, run, object)
+    run_idx = np.arange(n) // n_objects
+    bins = run_idx * n_objects + (events[:n] - 1)
+    size = n_blocks * runs_per_block * n_objects
+    shape = (n_blocks, runs_per_block, n_objects)
+
+    sums = np.bincount(bins, weights=probs[:n], minlength=size).reshape(shape)
+    counts = np.bincount(bins, minlength=size).reshape(shape)
+    return sums, counts
+
+
+def aggregate_p300(probs, events, runs_per_block, n_objects=8):
+    """
+    Per-block average probability per object and the predicted object
+    (same result as frontend/app/utils/p300.aggregateP300).
+    """
+    sums, counts = _run_sums(probs, events, runs_per_block, n_objects)
+    averages = sums.sum(axis=1) / np.maximum(1, counts.sum(axis=1))
+    predicted = np.argmax(averages, axis=1) + 1
+
+    return [
+        {"block": b + 1, "averages": averages[b].tolist(), "predictedObject": int(predicted[b])}
+        for b in range(averages.shape[0])
+    ]
+
+
+def progressive_decode(probs, events, runs_per_block, margin=0.1, min_runs=1, n_objects=8):
+    """
+    Decodes each block run by run and stops at the first run where the best
+    object's running average leads the runner-up by at least `margin`.
+    Blocks that never reach the margin use all runs.
+    """
+    sums, counts = _run_sums(probs, events, runs_per_block, n_objects)
+    averages = np.cumsum(sums, axis=1) / np.maximum(1, np.cumsum(counts, axis=1))
+
+    top2 = np.sort(averages, axis=2)[:, :, -2:]
+    margins = top2[:, :, 1] - top2[:, :, 0]
+
+    confident = margins >= margin
+    confident[:, : max(0, min_runs - 1)] = False
+    stop = np.where(confident.any(axis=1), confident.argmax(axis=1), runs_per_block - 1)
+
+    blocks = np.arange(averages.shape[0])
+    final = averages[blocks, stop]
+    predicted = np.argmax(final, axis=1) + 1
+
+    return [
+        {
+            "block": int(b) + 1,
+            "averages": final[b].tolist(),
+            "predictedObject": int(predicted[b]),
+            "runs_used": int(stop[b]) + 1,
+            "margin": float(margins[b, stop[b]]),
+            "early_stop": bool(confident[b].any()),
+        }
+        for b in blocks
+    ]
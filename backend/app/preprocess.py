@@ -3,6 +3,9 @@ import numpy as np
 import scipy.io as sio
 from scipy.signal import butter, filtfilt, iirnotch
 
+from app.features import DEFAULT_FEATURE_SET, base_feature_set, extract, spatial_feature_set
+from app.stages import stage as report_stage
+
 # =============================================================================
 # 1️⃣  Loading utilities
 # =============================================================================
@@ -121,30 +124,24 @@ def preprocess_eeg(raw_data, fs=250.0):
 # =============================================================================
 # 3️⃣  Feature extraction
 # =============================================================================
-def extract_features(eeg_data, window=(100, 700), fs=250.0):
-    start = int(window[0] * fs / 1000)
-    end = int(window[1] * fs / 1000)
-    if eeg_data.ndim != 3:
-        raise ValueError("Expected shape (n_trials, n_channels, n_samples)")
-
-    seg = eeg_data[:, :, start:end]
-    mean_f = np.mean(seg, axis=2)
-    std_f = np.std(seg, axis=2)
-    max_f = np.max(seg, axis=2)
-    min_f = np.min(seg, axis=2)
-    feats = np.concatenate([mean_f, std_f, max_f, min_f], axis=1)
-    return feats
+def extract_features(eeg_data, window=(100, 700), fs=250.0, feature_set=DEFAULT_FEATURE_SET, spatial_filter=None):
+    """Delegates to the feature-set registry in app.features (default: legacy stats)."""
+    return extract(eeg_data, feature_set=feature_set, window=window, fs=fs, spatial_filter=spatial_filter)
 
 
 # =============================================================================
 # 4️⃣  Quick utility for testing
 # =============================================================================
-def process_mat_file(filepath, fs=250.0, window=(100, 700)):
+def process_mat_file(filepath, fs=250.0, window=(100, 700), feature_set=DEFAULT_FEATURE_SET, spatial_filter=None):
     """
     Loads the mat, reorders to (n_trials, n_channels, n_samples),
-    applies preprocessing per-trial and returns features + info.
+    filters all trials at once and returns features + info.
+    With spatial_filter (n_channels, n_filters), e.g. a subject's xDAWN filters,
+    features are computed on the spatially filtered epochs. feature_set may be
+    the plain or the '~' spatial ID; a '~' ID without its filter is an error.
     """
-    raw = load_mat(filepath)
+    with report_stage("read_mat"):
+        raw = load_mat(filepath)
     # enforce shape (n_trials, n_channels, n_samples)
     try:
         raw_tcs = _to_trials_channels_samples(raw)
@@ -153,42 +150,13 @@ def process_mat_file(filepath, fs=250.0, window=(100, 700)):
 
     n_trials, n_channels, n_samples = raw_tcs.shape
 
-    # now reuse your existing preprocess function logic:
-    # we'll import local helpers here to avoid duplication
-    from scipy.signal import butter, filtfilt, iirnotch
-
-    def notch_filter(data, notch_freq=50.0, fs=250.0, q=30.0):
-        b, a = iirnotch(notch_freq / (fs / 2.0), q)
-        return filtfilt(b, a, data, axis=-1)
-
-    def bandpass_filter(data, low=1.0, high=40.0, fs=250.0, order=4):
-        nyq = 0.5 * fs
-        b, a = butter(order, [low / nyq, high / nyq], btype="band")
-        return filtfilt(b, a, data, axis=-1)
-
-    def preprocess_eeg_epoch(epoch, fs=250.0):
-        # epoch shape: (n_channels, n_samples)
-        data = notch_filter(epoch, 50.0, fs)
-        data = bandpass_filter(data, 1.0, 40.0, fs)
-        data = data - np.mean(data, axis=-1, keepdims=True)
-        return data
-
-    # apply preprocessing per trial
-    processed = np.zeros_like(raw_tcs, dtype=float)
-    for i in range(n_trials):
-        processed[i] = preprocess_eeg_epoch(raw_tcs[i], fs)
-
-    # feature extraction (same simple features as before)
-    start = int(window[0] * fs / 1000)
-    end = int(window[1] * fs / 1000)
-    if processed.ndim != 3:
-        raise ValueError("Expected processed shape (n_trials, n_channels, n_samples)")
-    seg = processed[:, :, start:end]
-    mean_f = np.mean(seg, axis=2)
-    std_f = np.std(seg, axis=2)
-    max_f = np.max(seg, axis=2)
-    min_f = np.min(seg, axis=2)
-    feats = np.concatenate([mean_f, std_f, max_f, min_f], axis=1)
+    # filtfilt runs along the last axis, so the whole tensor is filtered in one call
+    with report_stage("filter"):
+        processed = preprocess_eeg(raw_tcs.astype(float), fs)
+    if spatial_filter is not None and "~" not in (feature_set or ""):
+        feature_set = spatial_feature_set(base_feature_set(feature_set), spatial_filter)
+    with report_stage("features"):
+        feats = extract_features(processed, window=window, fs=fs, feature_set=feature_set, spatial_filter=spatial_filter)
 
     info = {
         "filepath": filepath,
@@ -198,9 +166,10 @@ def process_mat_file(filepath, fs=250.0, window=(100, 700)):
         "n_trials": int(n_trials),
         "n_channels": int(n_channels),
         "n_samples": int(n_samples),
+        "feature_set": feature_set,
     }
 
     # print short diagnostic so you can confirm
     print(f"Processed {filepath} -> raw_shape={raw.shape}, normalized={info['normalized_shape']} feats={feats.shape}")
 
-    return feats, info
\ No newline at end of file
+    return feats, info
@@ -0,0 +1,147 @@
+# backend/app/profiling.py
+"""
+Opt-in, request-scoped cProfile traces for slow endpoints.
+
+Decorate a sync endpoint with @profiled: the profiler runs in the threadpool
+thread that executes the endpoint, so the trace is that request's call tree.
+
+A request is profiled when
+  - NEUROSENSE_PROFILE_SAMPLE_RATE > 0 and it is sampled (e.g. 0.01 = 1%), or
+  - it sends `X-Profile: <NEUROSENSE_PROFILE_TOKEN>` (token must be configured).
+
+Only the NEUROSENSE_PROFILE_KEEP slowest traces (default 20) are kept in
+NEUROSENSE_PROFILE_DIR, as .prof (pstats / snakeviz) + .json metadata.
+"""
+import cProfile
+import functools
+import io
+import itertools
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from app.metrics import current_endpoint, current_scope
+
+ROOT = Path(__file__).resolve().parents[2]  # repo root
+
+PROFILE_DIR = Path(os.getenv("NEUROSENSE_PROFILE_DIR", ROOT / "profiles"))
+SAMPLE_RATE = float(os.getenv("NEUROSENSE_PROFILE_SAMPLE_RATE", "0"))
+KEEP = int(os.getenv("NEUROSENSE_PROFILE_KEEP", "20"))
+TOKEN = os.getenv("NEUROSENSE_PROFILE_TOKEN")
+
+PROFILE_HEADER = b"x-profile"
+
+_lock = threading.Lock()
+_seq = itertools.count()  # keeps ids unique for requests finishing in the same millisecond
+_active = ContextVar("profiling_active", default=False)
+
+
+# =============================================================================
+# 1️⃣  Sampling decision
+# =============================================================================
+def _header(scope, name: bytes):
+    for key, value in (scope or {}).get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def token_ok(value) -> bool:
+    return bool(TOKEN) and value == TOKEN
+
+
+def profiling_active() -> bool:
+    """True inside a request being profiled (work must stay on this thread to be traced)."""
+    return _active.get()
+
+
+def should_profile(scope) -> bool:
+    if token_ok(_header(scope, PROFILE_HEADER)):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+# =============================================================================
+# 2️⃣  Trace store (N slowest on disk)
+# =============================================================================
+def list_profiles():
+    """Metadata of stored traces, slowest first."""
+    if not PROFILE_DIR.exists():
+        return []
+    metas = []
+    for path in PROFILE_DIR.glob("*.json"):
+        try:
+            metas.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return sorted(metas, key=lambda m: m["duration_ms"], reverse=True)
+
+
+def profile_path(profile_id: str) -> Path:
+    return PROFILE_DIR / f"{Path(profile_id).name}.prof"
+
+
+def profile_report(profile_id: str, limit=60, sort="cumulative") -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(str(profile_path(profile_id)), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _store(profiler, meta):
+    with _lock:
+        stored = list_profiles()
+        if len(stored) >= KEEP and meta["duration_ms"] <= stored[-1]["duration_ms"]:
+            return None  # faster than everything we keep: no disk write
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_path(meta["id"])))
+        (PROFILE_DIR / f"{meta['id']}.json").write_text(json.dumps(meta))
+
+        ranked = sorted(stored + [meta], key=lambda m: m["duration_ms"], reverse=True)
+        for old in ranked[KEEP:]:
+            for suffix in (".prof", ".json"):
+                (PROFILE_DIR / f"{old['id']}{suffix}").unlink(missing_ok=True)
+        return meta["id"]
+
+
+# =============================================================================
+# 3️⃣  Endpoint decorator
+# =============================================================================
+def profiled(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        scope = current_scope()
+        if not should_profile(scope):
+            return fn(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is active in this interpreter (3.12+ sys.monitoring)
+            return fn(*args, **kwargs)
+
+        token = _active.set(True)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            _active.reset(token)
+            duration_ms = (time.perf_counter() - start) * 1000
+            finished = time.time()
+            _store(profiler, {
+                "id": f"{int(finished * 1000)}-{os.getpid()}-{next(_seq)}",
+                "endpoint": current_endpoint(),
+                "path": (scope or {}).get("path"),
+                "query": (scope or {}).get("query_string", b"").decode("latin-1"),
+                "duration_ms": round(duration_ms, 3),
+                "timestamp": finished,
+            })
+    return wrapper
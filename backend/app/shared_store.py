@@ -0,0 +1,256 @@
+# backend/app/shared_store.py
+"""
+Shared-memory store for multi-worker serving.
+
+A supervisor decodes every session feature file and exports every model as a
+fused artifact (app.artifacts) into one directory on tmpfs, once:
+
+    <store>/current -> gen-<timestamp>/
+        manifest.json
+        features/SBJ01/S01/train_features/X.npy, targets.npy, ...
+        models/subject_models/SBJ01_model.npz, ...
+
+Workers started with NEUROSENSE_SHARED_STORE=<store> memory-map those files
+read-only, so all workers on a host share one copy of the pages instead of
+each holding its own decoded arrays and unpickled models.
+
+Every entry records the size / mtime of its source file; a worker falls back
+to the source as soon as it changes (retrained model, rebuilt features), so
+the store can never serve stale data. Rebuilding swaps `current` atomically.
+
+    python -m app.shared_store build
+    python -m app.shared_store serve --workers 4
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]  # repo root
+STATIC_DIR = ROOT / "backend" / "static_data"
+MODELS_DIR = ROOT / "models"
+
+STORE_ENV = "NEUROSENSE_SHARED_STORE"
+# tmpfs when available: the pages are RAM either way, no disk round-trip
+DEFAULT_STORE_DIR = (
+    Path("/dev/shm/neurosense") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir()) / "neurosense-store"
+)
+
+_lock = threading.Lock()
+_attached = {}  # store dir -> SharedStore
+
+
+def _stamp(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _fresh(entry, source: Path) -> bool:
+    try:
+        return entry["stamp"] == _stamp(source)
+    except OSError:
+        return False
+
+
+# =============================================================================
+# 1️⃣  Supervisor: build a generation
+# =============================================================================
+def _write_features(npz_path: Path, out_dir: Path):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {}
+    with np.load(npz_path, allow_pickle=False) as d:
+        for name in d.files:
+            np.save(out_dir / f"{name}.npy", d[name], allow_pickle=False)
+            arrays[name] = str(out_dir / f"{name}.npy")
+    return arrays
+
+
+def _write_model(source: Path, out_path: Path):
+    from app.artifacts import export_artifact
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if source.suffix == ".npz":
+        shutil.copyfile(source, out_path)
+    else:
+        import joblib  # legacy bundle: fuse it here once, not in every worker
+
+        export_artifact(joblib.load(source), out_path)
+    return str(out_path)
+
+
+def _model_sources(models_dir: Path):
+    """Served file per model: the .npz artifact, else the .pkl bundle (versions/ skipped)."""
+    sources = {}
+    for path in sorted(models_dir.rglob("*_model.pkl")) + sorted(models_dir.rglob("*_model.npz")):
+        if "versions" not in path.parts:
+            sources[path.with_suffix("")] = path  # .npz overrides .pkl
+    return list(sources.values())
+
+
+def build_store(store_dir=None, static_dir=STATIC_DIR, models_dir=MODELS_DIR, keep=2):
+    """Writes a new generation and points `current` at it. Returns its manifest."""
+    store_dir = Path(store_dir or os.getenv(STORE_ENV) or DEFAULT_STORE_DIR)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    gen_dir = Path(tempfile.mkdtemp(prefix=f"gen-{time.strftime('%Y%m%d-%H%M%S')}-", dir=store_dir))
+    manifest = {"created_at": time.time(), "features": {}, "models": {}}
+
+    for npz_path in sorted(Path(static_dir).glob("SBJ*/S*/*.npz")):
+        rel = npz_path.relative_to(static_dir).with_suffix("")
+        manifest["features"][str(npz_path.resolve())] = {
+            "stamp": _stamp(npz_path),
+            "arrays": _write_features(npz_path, gen_dir / "features" / rel),
+        }
+
+    for source in _model_sources(Path(models_dir)):
+        rel = source.relative_to(models_dir).with_suffix(".npz")
+        manifest["models"][str(source.resolve())] = {
+            "stamp": _stamp(source),
+            "path": _write_model(source, gen_dir / "models" / rel),
+        }
+
+    (gen_dir / "manifest.json").write_text(json.dumps(manifest))
+    gen_dir.chmod(0o755)
+
+    # atomic swap: workers attaching from now on see the new generation
+    link_tmp = store_dir / f".current-{os.getpid()}"
+    os.symlink(gen_dir.name, link_tmp)
+    os.replace(link_tmp, store_dir / "current")
+
+    # old generations: unlinking is safe, mapped pages live until workers unmap them
+    generations = sorted(store_dir.glob("gen-*"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in generations[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+    size_mb = sum(f.stat().st_size for f in gen_dir.rglob("*") if f.is_file()) / 2**20
+    print(
+        f"🧠 Shared store → {gen_dir} ({len(manifest['features'])} feature files, "
+        f"{len(manifest['models'])} models, {size_mb:.1f} MB, {time.perf_counter() - start:.1f}s)"
+    )
+    return manifest
+
+
+# =============================================================================
+# 2️⃣  Workers: attach read-only
+# =============================================================================
+class SharedArrays(Mapping):
+    """np.load(npz)-like view (files / [] / get / with) over mmap'd .npy files."""
+
+    def __init__(self, arrays):
+        self._arrays = arrays
+        self.files = list(arrays)
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __iter__(self):
+        return iter(self._arrays)
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SharedStore:
+    def __init__(self, store_dir: Path, generation: str):
+        self.generation = generation
+        self.gen_dir = Path(store_dir) / generation
+        self.manifest = json.loads((self.gen_dir / "manifest.json").read_text())
+        self._features = {}
+
+    def features(self, source: Path):
+        key = str(source.resolve())
+        entry = self.manifest["features"].get(key)
+        if entry is None or not _fresh(entry, source):
+            return None
+        arrays = self._features.get(key)
+        if arrays is None:
+            arrays = {}
+            for name, path in entry["arrays"].items():
+                arr = np.load(path, mmap_mode="r")
+                # 0-d metadata (info, runs_per_block) is copied; arrays stay views on the mapping
+                arrays[name] = np.array(arr) if arr.ndim == 0 else arr.view(np.ndarray)
+            self._features[key] = arrays
+        return SharedArrays(arrays)
+
+    def model_path(self, source: Path):
+        entry = self.manifest["models"].get(str(source.resolve()))
+        if entry is None or not _fresh(entry, source):
+            return None
+        return Path(entry["path"])
+
+
+def attached_store():
+    """
+    The store named by NEUROSENSE_SHARED_STORE (None when unset or not built
+    yet). Re-attaches when the supervisor has swapped in a new generation.
+    """
+    store_dir = os.getenv(STORE_ENV)
+    if not store_dir:
+        return None
+    try:
+        generation = os.readlink(Path(store_dir) / "current")
+    except OSError:
+        return None
+    store = _attached.get(store_dir)
+    if store is None or store.generation != generation:
+        with _lock:
+            store = _attached.get(store_dir)
+            if store is None or store.generation != generation:
+                try:
+                    store = SharedStore(Path(store_dir), generation)
+                except (OSError, ValueError):
+                    return None
+                _attached[store_dir] = store
+    return store
+
+
+def open_features(npz_path: Path):
+    """Shared arrays of a session feature file when the store has it fresh, else np.load."""
+    store = attached_store()
+    shared = store.features(Path(npz_path)) if store is not None else None
+    if shared is not None:
+        return shared
+    return np.load(npz_path, allow_pickle=True)
+
+
+def shared_model_path(source: Path):
+    store = attached_store()
+    return store.model_path(Path(source)) if store is not None else None
+
+
+# =============================================================================
+# ▶️  CLI
+# =============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared-memory store for multi-worker serving")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Build a new store generation")
+    serve_cmd = sub.add_parser("serve", help="Build the store, then run uvicorn workers attached to it")
+    for cmd in (build_cmd, serve_cmd):
+        cmd.add_argument("--store", default=os.getenv(STORE_ENV) or str(DEFAULT_STORE_DIR))
+    serve_cmd.add_argument("--workers", type=int, default=4)
+    serve_cmd.add_argument("--host", default="0.0.0.0")
+    serve_cmd.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    build_store(args.store)
+    if args.command == "serve":
+        import uvicorn
+
+        os.environ[STORE_ENV] = str(Path(args.store).resolve())  # inherited by the workers
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
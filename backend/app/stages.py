@@ -0,0 +1,32 @@
+# backend/app/stages.py
+"""
+Stage markers for library code (preprocessing, training helpers).
+
+    with stage("filter", session="S01"):
+        ...
+
+stage() is a no-op until a recorder is installed with record_to(); the
+training report (app.train_report) is the only recorder. This module has no
+dependencies, so serving and preprocessing code can mark their steps without
+importing the report, pandas or the sampler.
+"""
+from contextlib import contextmanager, nullcontext
+
+_active = None  # recorder with .stage(name, **labels), if any
+
+
+@contextmanager
+def record_to(recorder):
+    """Sends stage() calls to recorder.stage() inside the block."""
+    global _active
+    previous, _active = _active, recorder
+    try:
+        yield recorder
+    finally:
+        _active = previous
+
+
+def stage(name, **labels):
+    if _active is None:
+        return nullcontext({})
+    return _active.stage(name, **labels)
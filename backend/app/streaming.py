@@ -0,0 +1,108 @@
+# backend/app/streaming.py
+"""
+Online P300 scoring for a live EEG stream.
+
+One OnlineP300Scorer lives per WebSocket connection. Incoming raw sample
+chunks are written to a ring buffer; once the whole 1400 ms trial after a
+stimulus event has arrived, the trial is preprocessed exactly like a training
+trial (preprocess_eeg: notch + band-pass over the trial, demeaned over the
+trial) and scored. Online features are therefore the ones process_mat_file
+computes offline for the same trial.
+"""
+import numpy as np
+
+from app.models_serving import features_from_epochs, predict_with_model
+
+TRIAL_MS = 1400  # epoch length of the training .mat trials (350 samples at 250 Hz)
+
+
+# =============================================================================
+# 1️⃣  Ring buffer indexed by absolute sample number
+# =============================================================================
+class RingBuffer:
+    def __init__(self, n_channels, capacity):
+        self.data = np.zeros((n_channels, capacity))
+        self.capacity = capacity
+        self.written = 0  # absolute index of the next sample
+
+    def write(self, chunk):
+        n = chunk.shape[1]
+        idx = np.arange(self.written, self.written + n) % self.capacity
+        self.data[:, idx[-self.capacity:]] = chunk[:, -self.capacity:]
+        self.written += n
+
+    def read(self, start, end):
+        """Samples [start, end) by absolute index, or None if already overwritten."""
+        if start < self.written - self.capacity or end > self.written:
+            return None
+        return self.data[:, np.arange(start, end) % self.capacity]
+
+
+# =============================================================================
+# 2️⃣  Per-connection scorer
+# =============================================================================
+class OnlineP300Scorer:
+    """
+    push(samples, events) takes
+      samples: (n_samples, n_channels) raw EEG chunk
+      events:  [(offset, code), ...] with offset relative to the chunk start
+    and returns a list of {"event_index", "code", "onset", "prob"} for every
+    trial (default 0–1400 ms after onset, features from 100–700 ms) that is
+    now complete.
+    """
+
+    def __init__(
+        self, model_bundle, n_channels=8, fs=250.0, window=(100, 700), trial_ms=TRIAL_MS, buffer_seconds=4.0
+    ):
+        self.model_bundle = model_bundle
+        self.n_channels = n_channels
+        self.fs = fs
+        self.window = window
+        self.epoch_len = int(max(trial_ms, window[1]) * fs / 1000)
+        # scipy.signal is only needed once a stream opens
+        from app.preprocess import preprocess_eeg
+
+        self._preprocess = preprocess_eeg
+        self.buffer = RingBuffer(n_channels, int(buffer_seconds * fs))
+        self.pending = []  # (absolute onset, code, event index)
+        self.n_events = 0
+
+    def push(self, samples, events=()):
+        samples = np.asarray(samples, dtype=float)
+        chunk_start = self.buffer.written
+
+        if samples.size:
+            if samples.ndim != 2 or samples.shape[1] != self.n_channels:
+                raise ValueError(f"Expected samples of shape (n, {self.n_channels}), got {samples.shape}")
+            self.buffer.write(samples.T)
+
+        for offset, code in events:
+            self.pending.append((chunk_start + int(offset), int(code), self.n_events))
+            self.n_events += 1
+
+        return self._score_ready()
+
+    def _score_ready(self):
+        ready, waiting, epochs = [], [], []
+        for onset, code, idx in self.pending:
+            if onset + self.epoch_len > self.buffer.written:
+                waiting.append((onset, code, idx))
+                continue
+            epoch = self.buffer.read(onset, onset + self.epoch_len)
+            if epoch is None:
+                continue  # fell out of the buffer, cannot be scored any more
+            ready.append((onset, code, idx))
+            epochs.append(epoch)
+        self.pending = waiting
+
+        if not ready:
+            return []
+
+        # all ready trials filtered in one call, as process_mat_file does for a session
+        epochs = self._preprocess(np.stack(epochs), self.fs)
+        feats = features_from_epochs(self.model_bundle, epochs, window=self.window, fs=self.fs)
+        probs = predict_with_model(self.model_bundle, feats)
+        return [
+            {"event_index": idx, "code": code, "onset": onset, "prob": float(p)}
+            for (onset, code, idx), p in zip(ready, probs)
+        ]
@@ -1,37 +1,118 @@
 import os
+import json
+import hashlib
+import tracemalloc
 import numpy as np
 import pandas as pd
 import joblib
 import time
-from sklearn.decomposition import PCA
-from sklearn.linear_model import LogisticRegression
+from contextlib import nullcontext
+from joblib import Parallel, delayed
+from scipy.linalg import eigh
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import roc_auc_score
 from sklearn.model_selection import train_test_split
-from app.preprocess import process_mat_file
+from app.artifacts import artifact_path, export_artifact
+from app.train_report import StackSampler, TrainingReport, activate, stage
+from app.features import DEFAULT_FEATURE_SET, feature_filename, npz_feature_set, spatial_feature_set
+from app.preprocess import (
+    _to_trials_channels_samples,
+    extract_features,
+    load_mat,
+    preprocess_eeg,
+    process_mat_file,
+)
+
+
+FEATURE_STORE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "static_data")
+)
+
+# (subject_id, session_id, train_mode, feature_set) -> (features, labels) shared by every
+# trainer in the process, so LOSO + subject training load each subject once
+_feature_cache = {}
 
 
 # =============================================================================
-# 🔧  Helper: load subject data (all sessions)
+# 🔧  Helper: load one session (feature store first, raw .mat as fallback)
 # =============================================================================
-def load_subject_data(base_path, subject_id, sessions, train_mode=True):
-    features_list, labels_list = [], []
+def _is_stale(npz_path, sources):
+    npz_mtime = os.path.getmtime(npz_path)
+    return any(os.path.exists(src) and os.path.getmtime(src) > npz_mtime for src in sources)
+
+
+def load_session_features(
+    base_path, subject_id, session_id, train_mode=True, feature_store=FEATURE_STORE_DIR,
+    feature_set=DEFAULT_FEATURE_SET, spatial_filter=None,
+):
+    """
+    Returns (features, labels) for one session or None.
+    Reads the npz written by preprocess_all.py; only re-filters the raw .mat
+    when the npz is missing, has no targets, was built with another feature
+    set or is older than its sources. A spatial ('~') feature set needs the
+    model's spatial_filter for that raw fallback.
+    """
+    key = (subject_id, session_id, train_mode, feature_set)
+    if key in _feature_cache:
+        return _feature_cache[key]
+
+    folder = "Train" if train_mode else "Test"
+    data_path = os.path.join(base_path, f"SBJ{subject_id:02d}", f"S{session_id:02d}", folder)
+    mat_file = os.path.join(data_path, "trainData.mat" if train_mode else "testData.mat")
+    target_file = os.path.join(data_path, "trainTargets.txt")
+
+    result = None
+    npz_path = None
+    if feature_store:
+        npz_path = os.path.join(
+            feature_store,
+            f"SBJ{subject_id:02d}",
+            f"S{session_id:02d}",
+            feature_filename("train" if train_mode else "test", feature_set),
+        )
 
-    for session_id in sessions:
-        folder = "Train" if train_mode else "Test"
-        data_path = os.path.join(base_path, f"SBJ{subject_id:02d}", f"S{session_id:02d}", folder)
-        mat_file = os.path.join(data_path, "trainData.mat" if train_mode else "testData.mat")
-        target_file = os.path.join(data_path, "trainTargets.txt")
+    if npz_path and os.path.exists(npz_path) and not _is_stale(npz_path, (mat_file, target_file)):
+        with stage("read_npz", session=f"S{session_id:02d}"), np.load(npz_path, allow_pickle=True) as d:
+            targets = d["targets"] if "targets" in d else None
+            if targets is not None and len(targets) > 0 and npz_feature_set(d) == feature_set:
+                result = (d["X"].astype(np.float64), targets.astype(int))
 
+    if result is None:
         if not os.path.exists(mat_file) or not os.path.exists(target_file):
-            continue
+            return None
+        with stage("preprocess", session=f"S{session_id:02d}"):
+            feats, info = process_mat_file(mat_file, feature_set=feature_set, spatial_filter=spatial_filter)
+        result = (feats, np.loadtxt(target_file, dtype=int))
+
+    feats, labels = result
+    if len(labels) != feats.shape[0]:
+        print(f"⚠️ Mismatch in trials/labels for SBJ{subject_id:02d}-S{session_id:02d}")
+        return None
+
+    _feature_cache[key] = result
+    return result
+
+
+def clear_feature_cache():
+    _feature_cache.clear()
 
-        feats, info = process_mat_file(mat_file)
-        labels = np.loadtxt(target_file, dtype=int)
 
-        if len(labels) != feats.shape[0]:
-            print(f"⚠️ Mismatch in trials/labels for SBJ{subject_id:02d}-S{session_id:02d}")
+# =============================================================================
+# 🔧  Helper: load subject data (all sessions)
+# =============================================================================
+def load_subject_data(
+    base_path, subject_id, sessions, train_mode=True, feature_store=FEATURE_STORE_DIR,
+    feature_set=DEFAULT_FEATURE_SET,
+):
+    features_list, labels_list = [], []
+
+    for session_id in sessions:
+        loaded = load_session_features(base_path, subject_id, session_id, train_mode, feature_store, feature_set)
+        if loaded is None:
             continue
 
+        feats, labels = loaded
         features_list.append(feats)
         labels_list.append(labels)
 
@@ -44,71 +125,449 @@ def load_subject_data(base_path, subject_id, sessions, train_mode=True):
 
 
 # =============================================================================
-# 🧠  Subject-Specific Model Training
+# 🧭  Spatial filters (xDAWN) from raw train epochs
 # =============================================================================
-def train_subject_specific(base_path, subject_id, sessions=range(1, 8), output_dir="models/subject_models"):
-    X, y = load_subject_data(base_path, subject_id, sessions)
-    if X is None:
-        print(f"⚠️ No data found for Subject {subject_id:02d}")
+def load_session_epochs(base_path, subject_id, session_id):
+    """
+    Returns (epochs, labels) for one session from the raw .mat, band-passed
+    like the feature store, or None. Not cached: epochs are ~10x the features.
+    """
+    data_path = os.path.join(base_path, f"SBJ{subject_id:02d}", f"S{session_id:02d}", "Train")
+    mat_file = os.path.join(data_path, "trainData.mat")
+    target_file = os.path.join(data_path, "trainTargets.txt")
+    if not os.path.exists(mat_file) or not os.path.exists(target_file):
         return None
 
-    print(f"Training Subject-Specific Model for SBJ{subject_id:02d} | Samples: {X.shape}")
+    with stage("read_mat", session=f"S{session_id:02d}"):
+        raw = load_mat(mat_file)
+    with stage("filter", session=f"S{session_id:02d}"):
+        epochs = preprocess_eeg(_to_trials_channels_samples(raw).astype(float))
+    labels = np.loadtxt(target_file, dtype=int)
+    if len(labels) != epochs.shape[0]:
+        print(f"⚠️ Mismatch in trials/labels for SBJ{subject_id:02d}-S{session_id:02d}")
+        return None
+    return epochs.astype(np.float32), labels
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=42, stratify=y
-    )
 
-    n_components = min(150, X_train.shape[0], X_train.shape[1])
+def load_subject_epochs(base_path, subject_id, sessions):
+    loaded = [load_session_epochs(base_path, subject_id, session_id) for session_id in sessions]
+    loaded = [l for l in loaded if l is not None]
+    if not loaded:
+        return None, None
+    return np.concatenate([e for e, _ in loaded]), np.concatenate([y for _, y in loaded])
+
+
+def fit_xdawn(epochs, y, n_filters=4, window=(100, 700), fs=250.0, reg=1e-6):
+    """
+    xDAWN filters (n_channels, n_filters): maximise the target-evoked response
+    power relative to the total signal power, i.e. the top generalized
+    eigenvectors of (P Pᵀ, Σ_X) with P the average target epoch.
+    """
+    start = int(window[0] * fs / 1000)
+    end = int(window[1] * fs / 1000)
+    seg = np.asarray(epochs, dtype=np.float64)[:, :, start:end]
+    n_trials, n_channels, n_samples = seg.shape
+
+    evoked = seg[np.asarray(y) == 1].mean(axis=0)
+    signal_cov = evoked @ evoked.T / n_samples
+    total_cov = np.einsum("tcs,tds->cd", seg, seg) / (n_trials * n_samples)
+    total_cov += reg * np.trace(total_cov) / n_channels * np.eye(n_channels)
+
+    _, vectors = eigh(signal_cov, total_cov)
+    return vectors[:, ::-1][:, : min(n_filters, n_channels)].copy()
+
+
+# =============================================================================
+# 🧠  Subject-Specific Model Training
+# =============================================================================
+SUBJECT_PARAMS = {
+    "max_components": 150,
+    "test_size": 0.25,
+    "solver": "liblinear",
+    "C": 1.0,
+    "random_state": 42,
+    "feature_set": DEFAULT_FEATURE_SET,
+    "spatial_filter": None,  # None or "xdawn" (needs the raw .mat epochs)
+    "n_filters": 4,
+}
+
+
+def save_model(bundle, pkl_path, audit_pickle=True):
+    """
+    Writes the fused .npz artifact that serving loads and, with audit_pickle,
+    the full joblib bundle beside it (needed for audits and incremental
+    updates). Without it a stale .pkl of the same model is removed.
+    """
+    if audit_pickle:
+        joblib.dump(bundle, pkl_path)
+    elif os.path.exists(pkl_path):
+        os.remove(pkl_path)
+    return export_artifact(bundle, artifact_path(pkl_path))
+
+
+def train_subject_specific(
+    base_path, subject_id, sessions=range(1, 8), output_dir="models/subject_models", params=None, audit_pickle=True
+):
+    params = {**SUBJECT_PARAMS, **(params or {})}
+    subject = f"SBJ{subject_id:02d}"
+
+    spatial_filter = None
+    if params["spatial_filter"] == "xdawn":
+        with stage("load", subject=subject):
+            epochs, y = load_subject_epochs(base_path, subject_id, sessions)
+        if epochs is None:
+            print(f"⚠️ No raw epochs found for Subject {subject_id:02d}")
+            return None
+
+        # filters are estimated on the training split only
+        idx_train, idx_test = train_test_split(
+            np.arange(len(y)), test_size=params["test_size"], random_state=params["random_state"], stratify=y
+        )
+        with stage("xdawn_fit", subject=subject):
+            spatial_filter = fit_xdawn(epochs[idx_train], y[idx_train], params["n_filters"])
+        with stage("features", subject=subject):
+            X = extract_features(epochs, feature_set=params["feature_set"], spatial_filter=spatial_filter)
+        X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y[idx_train], y[idx_test]
+    elif params["spatial_filter"]:
+        raise ValueError(f"Unknown spatial filter: {params['spatial_filter']}")
+    else:
+        with stage("load", subject=subject):
+            X, y = load_subject_data(base_path, subject_id, sessions, feature_set=params["feature_set"])
+        if X is None:
+            print(f"⚠️ No data found for Subject {subject_id:02d}")
+            return None
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=params["test_size"], random_state=params["random_state"], stratify=y
+        )
+
+    print(f"Training Subject-Specific Model for SBJ{subject_id:02d} | Samples: {X.shape}")
+
+    n_components = min(params["max_components"], X_train.shape[0], X_train.shape[1])
     if n_components <= 0:
         n_components = min(1, X_train.shape[1])
 
-    pca = PCA(n_components=n_components, random_state=42)
-    X_train_pca = pca.fit_transform(X_train)
-    X_test_pca = pca.transform(X_test)
+    with stage("pca_fit", subject=subject) as extra:
+        pca = PCA(n_components=n_components, random_state=params["random_state"])
+        X_train_pca = pca.fit_transform(X_train)
+        X_test_pca = pca.transform(X_test)
+        extra["n_components"] = int(pca.n_components_)
 
     model = LogisticRegression(
-        solver="liblinear", class_weight="balanced", random_state=42
+        solver=params["solver"], C=params["C"], class_weight="balanced", random_state=params["random_state"]
     )
-    model.fit(X_train_pca, y_train)
+    _fit_logreg(model, X_train_pca, y_train, subject=subject)
 
-    y_prob = model.predict_proba(X_test_pca)[:, 1]
-    auc = roc_auc_score(y_test, y_prob)
+    with stage("score", subject=subject):
+        y_prob = model.predict_proba(X_test_pca)[:, 1]
+        auc = roc_auc_score(y_test, y_prob)
     print(f"✅ SBJ{subject_id:02d} AUC = {auc:.3f}")
 
     os.makedirs(output_dir, exist_ok=True)
     save_path = os.path.join(output_dir, f"SBJ{subject_id:02d}_model.pkl")
-    joblib.dump({"model": model, "pca": pca, "auc": auc}, save_path)
+    bundle = {"model": model, "pca": pca, "auc": auc, "feature_set": params["feature_set"]}
+    if spatial_filter is not None:
+        bundle["spatial_filter"] = spatial_filter
+        bundle["feature_set"] = spatial_feature_set(params["feature_set"], spatial_filter)
+    with stage("dump", subject=subject):
+        save_path = save_model(bundle, save_path, audit_pickle)
     print(f"💾 Saved Subject Model → {save_path}\n")
 
     return {"Subject": f"SBJ{subject_id:02d}", "AUC": auc}
 
 
+# =============================================================================
+# ⚡  Parallel driver for all subject-specific models
+# =============================================================================
+TRAINING_STATE_FILE = "training_state.json"
+
+
+def _subject_fingerprint(base_path, subject_id, sessions, params, feature_store=FEATURE_STORE_DIR):
+    """
+    Hash of hyperparameters + size/mtime of every input file of a subject.
+    Cheap to compute (stat only) and changes whenever data or params change.
+    """
+    h = hashlib.sha1(json.dumps(params, sort_keys=True).encode())
+    for session_id in sessions:
+        sess = os.path.join(f"SBJ{subject_id:02d}", f"S{session_id:02d}")
+        candidates = [
+            os.path.join(feature_store, sess, feature_filename("train", params.get("feature_set"))),
+            os.path.join(base_path, sess, "Train", "trainData.mat"),
+            os.path.join(base_path, sess, "Train", "trainTargets.txt"),
+        ]
+        for path in candidates:
+            if os.path.exists(path):
+                st = os.stat(path)
+                h.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def _subject_features(base_path, subject_id, sessions, feature_set, feature_store=FEATURE_STORE_DIR):
+    """{cache key: (features, labels)} of one subject, loaded through this process's cache."""
+    out = {}
+    for session_id in sessions:
+        loaded = load_session_features(base_path, subject_id, session_id, True, feature_store, feature_set)
+        if loaded is not None:
+            key = (subject_id, session_id, True, feature_set)
+            out[key] = _feature_cache[key]
+    return out
+
+
+def _train_subject_job(base_path, subject_id, sessions, output_dir, params, audit_pickle=True, features=None):
+    # features preloaded by the parent (memmapped by joblib): no second load in the worker
+    _feature_cache.update(features or {})
+    report = TrainingReport()
+    start = time.perf_counter()
+    with activate(report):
+        res = train_subject_specific(
+            base_path, subject_id, sessions, output_dir=output_dir, params=params, audit_pickle=audit_pickle
+        )
+
+    if res is None:
+        return None
+    res["wall_time_s"] = round(time.perf_counter() - start, 3)
+    res["peak_mem_mb"] = round(report.peak_mb, 2)
+    res["stages"] = report.rows
+    return res
+
+
+def train_all_subjects(
+    base_path,
+    subjects=range(1, 16),
+    sessions=range(1, 8),
+    output_dir="models/subject_models",
+    params=None,
+    n_jobs=-1,
+    force=False,
+    audit_pickle=True,
+    feature_store=FEATURE_STORE_DIR,
+):
+    """
+    Trains subject models concurrently (one process per subject), skipping
+    subjects whose inputs and hyperparameters match the last saved artifact.
+    Features are loaded once in this process and handed to the workers, so a
+    LOSO run after this one finds every subject in _feature_cache. The xDAWN
+    path reads raw epochs in the workers instead.
+
+    Writes subject_auc_summary.csv with AUC, wall time, peak memory and a
+    trained/skipped/failed status, plus subject_training_report.json/.csv with the per-stage breakdown of
+    the subjects trained in this run.
+    """
+    params = {**SUBJECT_PARAMS, **(params or {})}
+    start_all = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+
+    state_path = os.path.join(output_dir, TRAINING_STATE_FILE)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+
+    fingerprints, todo = {}, []
+    for sid in subjects:
+        name = f"SBJ{sid:02d}"
+        fingerprints[name] = _subject_fingerprint(base_path, sid, sessions, params, feature_store)
+        artifact = os.path.join(output_dir, f"{name}_model.npz")
+        prev = state.get(name)
+        if not force and prev and prev.get("fingerprint") == fingerprints[name] and os.path.exists(artifact):
+            print(f"⏭️  {name} unchanged, skipping")
+            continue
+        todo.append(sid)
+
+    features = {}
+    if not params["spatial_filter"]:
+        for sid in todo:
+            features[sid] = _subject_features(base_path, sid, sessions, params["feature_set"], feature_store)
+
+    print(f"🚀 Training {len(todo)} subject model(s) with n_jobs={n_jobs}\n")
+    trained = Parallel(n_jobs=n_jobs)(
+        delayed(_train_subject_job)(
+            base_path, sid, sessions, output_dir, params, audit_pickle, features.get(sid)
+        )
+        for sid in todo
+    )
+
+    report = TrainingReport(track_memory=False)
+    ran = {}
+    for sid, res in zip(todo, trained):
+        if res is None:
+            continue
+        report.rows.extend(res.pop("stages", []))
+        state[res["Subject"]] = {**res, "fingerprint": fingerprints[res["Subject"]]}
+        ran[sid] = state[res["Subject"]]
+
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent=2)
+
+    # status comes from this run: a scheduled subject that produced no model is
+    # "failed", never reported with the AUC of an earlier run
+    rows = []
+    for sid in subjects:
+        name = f"SBJ{sid:02d}"
+        if sid in ran:
+            entry, status = ran[sid], "trained"
+        elif sid in todo:
+            entry, status = {}, "failed"
+        elif name in state:
+            entry, status = state[name], "skipped"
+        else:
+            continue
+        rows.append({
+            "Subject": name,
+            "AUC": entry.get("AUC"),
+            "wall_time_s": entry.get("wall_time_s"),
+            "peak_mem_mb": entry.get("peak_mem_mb"),
+            "status": status,
+        })
+
+    summary = pd.DataFrame(rows)
+    if not summary.empty:
+        summary.to_csv(os.path.join(output_dir, "subject_auc_summary.csv"), index=False)
+    if report.rows:
+        report.write(output_dir, "subject_training_report")
+
+    print(f"🏁 Subject models done in {(time.time() - start_all)/60:.1f} mins")
+    return summary
+
+
+# =============================================================================
+# 🧮  Fold engine: PCA from cached per-subject moments
+# =============================================================================
+def subject_moments(X, shift):
+    """Sufficient statistics of one subject, centred on a shared shift."""
+    Xc = X - shift
+    return {"n": X.shape[0], "sum": Xc.sum(axis=0), "scatter": Xc.T @ Xc}
+
+
+class FoldEngine:
+    """
+    Computes (count, sum, scatter) once per subject so every LOSO fold's PCA
+    is a d×d eigenproblem on (total - held-out) instead of a pass over the
+    training data. Moments are taken around the cohort mean for numerical
+    stability.
+    """
+
+    def __init__(self, all_data):
+        n = sum(X.shape[0] for X, _ in all_data.values())
+        self.shift = sum(X.sum(axis=0) for X, _ in all_data.values()) / n
+        self.moments = {sid: subject_moments(X, self.shift) for sid, (X, _) in all_data.items()}
+        self.total = {
+            "n": n,
+            "sum": sum(m["sum"] for m in self.moments.values()),
+            "scatter": sum(m["scatter"] for m in self.moments.values()),
+        }
+
+    def pca(self, n_components, exclude=None, random_state=42):
+        n, s1, s2 = self.total["n"], self.total["sum"], self.total["scatter"]
+        if exclude is not None:
+            held = self.moments[exclude]
+            n, s1, s2 = n - held["n"], s1 - held["sum"], s2 - held["scatter"]
+        return pca_from_moments(n, s1, s2, n_components, self.shift, random_state)
+
+
+def pca_from_moments(n, s1, s2, n_components, shift=0.0, random_state=42):
+    """
+    Returns a fitted sklearn PCA equivalent to PCA(n_components).fit(X) where
+    n, s1, s2 are count, sum and scatter of (X - shift).
+    """
+    d = s1 / n
+    cov = (s2 - n * np.outer(d, d)) / (n - 1)
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    order = np.argsort(eigvals)[::-1]
+    eigvals = np.clip(eigvals[order], 0.0, None)
+    components = eigvecs[:, order].T
+
+    # same deterministic sign convention as sklearn (svd_flip on Vt)
+    max_abs = np.argmax(np.abs(components), axis=1)
+    components *= np.sign(components[np.arange(components.shape[0]), max_abs])[:, np.newaxis]
+
+    n_features = cov.shape[0]
+    pca = PCA(n_components=n_components, random_state=random_state)
+    pca.n_features_in_ = n_features
+    pca.n_samples_ = n
+    pca.n_components_ = n_components
+    pca.mean_ = shift + d
+    pca.components_ = components[:n_components]
+    pca.explained_variance_ = eigvals[:n_components]
+    pca.explained_variance_ratio_ = eigvals[:n_components] / eigvals.sum()
+    pca.singular_values_ = np.sqrt(eigvals[:n_components] * (n - 1))
+    pca.noise_variance_ = float(eigvals[n_components:].mean()) if n_components < n_features else 0.0
+    return pca
+
+
 # =============================================================================
 # 🌍  LOSO Generalized Model Training
 # =============================================================================
-def train_loso(base_path, subjects=range(1, 16), sessions=range(1, 8), output_dir="models/generalized"):
+LOSO_PARAMS = {
+    "solver": "saga",
+    "C": 0.1,  # fold models; the final generalized model keeps sklearn's default C
+    "max_iter": 1000,
+}
+
+
+def train_loso(
+    base_path, subjects=range(1, 16), sessions=range(1, 8), output_dir="models/generalized", fold_engine=True,
+    feature_set=DEFAULT_FEATURE_SET, report=True, flamegraph=False, audit_pickle=True,
+):
+    """
+    LOSO evaluation + final generalized model. With report=True, writes
+    loso_training_report.json/.csv (wall time and memory per stage, subject
+    and fold) next to loso_results.csv; flamegraph=True also samples the
+    run into loso_flamegraph.folded.
+    """
+    if not report and not flamegraph:
+        return _train_loso(base_path, subjects, sessions, output_dir, fold_engine, feature_set, audit_pickle)
+
+    training_report = TrainingReport(track_memory=report)
+    sampler = StackSampler() if flamegraph else nullcontext()
+    with activate(training_report), sampler:
+        results_df = _train_loso(base_path, subjects, sessions, output_dir, fold_engine, feature_set, audit_pickle)
+
+    path = training_report.write(output_dir, "loso_training_report")
+    top = ", ".join(f"{k} {v:.1f}s" for k, v in list(training_report.summary().items())[:4])
+    print(f"⏱️  Stage report → {path} ({top})")
+    if flamegraph:
+        print(f"🔥 Flame graph → {sampler.write(os.path.join(output_dir, 'loso_flamegraph.folded'))}")
+    return results_df
+
+
+def _fit_logreg(model, X, y, **labels):
+    with stage("classifier_fit", **labels) as extra:
+        model.fit(X, y)
+        n_iter = int(np.max(model.n_iter_))
+        extra.update({"n_iter": n_iter, "converged": n_iter < model.max_iter, "n_samples": int(X.shape[0])})
+    return model
+
+
+def _train_loso(base_path, subjects, sessions, output_dir, fold_engine, feature_set, audit_pickle=True):
     start_all = time.time()
     results = []
     all_data = {}
 
     print("📦 Loading all subjects' data...")
     for sid in subjects:
-        X, y = load_subject_data(base_path, sid, sessions)
+        with stage("load", subject=f"SBJ{sid:02d}"):
+            X, y = load_subject_data(base_path, sid, sessions, feature_set=feature_set)
         if X is not None:
             all_data[sid] = (X, y)
             print(f"✅ Loaded SBJ{sid:02d}: {X.shape[0]} trials")
         else:
             print(f"⚠️ SBJ{sid:02d} skipped.")
 
+    with stage("fold_engine"):
+        engine = FoldEngine(all_data) if fold_engine and all_data else None
+
     print("\n🚀 Starting LOSO training...\n")
 
     for test_sid in subjects:
         if test_sid not in all_data:
             continue
+        fold = f"SBJ{test_sid:02d}"
 
-        X_test, y_test = all_data[test_sid]
-        X_train = np.vstack([X for sid, (X, _) in all_data.items() if sid != test_sid])
-        y_train = np.concatenate([y for sid, (_, y) in all_data.items() if sid != test_sid])
+        with stage("split", fold=fold):
+            X_test, y_test = all_data[test_sid]
+            X_train = np.vstack([X for sid, (X, _) in all_data.items() if sid != test_sid])
+            y_train = np.concatenate([y for sid, (_, y) in all_data.items() if sid != test_sid])
 
         print(f"Training LOSO fold: leaving out SBJ{test_sid:02d}")
         print(f"Train: {X_train.shape}, Test: {X_test.shape}")
@@ -117,54 +576,245 @@ def train_loso(base_path, subjects=range(1, 16), sessions=range(1, 8), output_di
         if n_components <= 0:
             n_components = min(1, X_train.shape[1])
 
-        pca_final = PCA(n_components=n_components, random_state=42)
-
-        X_train_pca = pca_final.fit_transform(X_train)
-        X_test_pca = pca_final.transform(X_test)
+        with stage("pca_fit", fold=fold) as extra:
+            if engine is not None:
+                pca_final = engine.pca(n_components, exclude=test_sid)
+                X_train_pca = pca_final.transform(X_train)
+            else:
+                pca_final = PCA(n_components=n_components, random_state=42)
+                X_train_pca = pca_final.fit_transform(X_train)
+            X_test_pca = pca_final.transform(X_test)
+            extra["n_components"] = int(pca_final.n_components_)
 
         model = LogisticRegression(
-            solver="saga",
+            solver=LOSO_PARAMS["solver"],
             penalty="l2",
             class_weight="balanced",
             random_state=42,
-            C=0.1,
-            max_iter=1000,
+            C=LOSO_PARAMS["C"],
+            max_iter=LOSO_PARAMS["max_iter"],
         )
-        model.fit(X_train_pca, y_train)
+        _fit_logreg(model, X_train_pca, y_train, fold=fold)
 
-        y_prob = model.predict_proba(X_test_pca)[:, 1]
-        auc = roc_auc_score(y_test, y_prob)
+        with stage("score", fold=fold):
+            y_prob = model.predict_proba(X_test_pca)[:, 1]
+            auc = roc_auc_score(y_test, y_prob)
         results.append({"Subject": f"SBJ{test_sid:02d}", "AUC": auc})
 
         print(f"✅ LOSO SBJ{test_sid:02d} AUC = {auc:.3f}\n")
 
     print("🔁 Retraining on all subjects to finalize generalized model...")
-    X_all = np.vstack([X for X, _ in all_data.values()])
-    y_all = np.concatenate([y for _, y in all_data.values()])
+    with stage("split", fold="final"):
+        X_all = np.vstack([X for X, _ in all_data.values()])
+        y_all = np.concatenate([y for _, y in all_data.values()])
 
     n_components = min(150, X_all.shape[0], X_all.shape[1])
     if n_components <= 0:
         n_components = min(1, X_all.shape[1])
 
-    pca_final = PCA(n_components=n_components, random_state=42)
-    X_all_pca = pca_final.fit_transform(X_all)
+    with stage("pca_fit", fold="final") as extra:
+        if engine is not None:
+            pca_final = engine.pca(n_components)
+            X_all_pca = pca_final.transform(X_all)
+        else:
+            pca_final = PCA(n_components=n_components, random_state=42)
+            X_all_pca = pca_final.fit_transform(X_all)
+        extra["n_components"] = int(pca_final.n_components_)
 
     final_model = LogisticRegression(
-        solver="saga", penalty="l2", class_weight="balanced", random_state=42, max_iter=1000
+        solver=LOSO_PARAMS["solver"], penalty="l2", class_weight="balanced", random_state=42,
+        max_iter=LOSO_PARAMS["max_iter"],
     )
-    final_model.fit(X_all_pca, y_all)
+    _fit_logreg(final_model, X_all_pca, y_all, fold="final")
+
+    with stage("dump", fold="final"):
+        os.makedirs(output_dir, exist_ok=True)
+        save_model(
+            {"model": final_model, "pca": pca_final, "feature_set": feature_set},
+            os.path.join(output_dir, "generalized_model.pkl"),
+            audit_pickle,
+        )
+
+    results_df = pd.DataFrame(results)
+    results_df.to_csv(os.path.join(output_dir, "loso_results.csv"), index=False)
+
+    print(f"🏁 Completed in {(time.time() - start_all)/60:.1f} mins")
+    return results_df
+
+
+# =============================================================================
+# 🌊  Out-of-core LOSO training over the feature store
+# =============================================================================
+STREAMING_PARAMS = {
+    "max_components": 150,
+    "chunk_size": 2048,
+    "epochs": 5,
+    "alpha": 1e-4,
+    "random_state": 42,
+    "feature_set": DEFAULT_FEATURE_SET,
+}
+
+
+def discover_subjects(base_path=None, feature_store=FEATURE_STORE_DIR):
+    """Subject numbers found in the feature store (and raw data dir, if given)."""
+    found = set()
+    for root in (feature_store, base_path):
+        if root and os.path.isdir(root):
+            for name in os.listdir(root):
+                if name.startswith("SBJ") and name[3:].isdigit() and os.path.isdir(os.path.join(root, name)):
+                    found.add(int(name[3:]))
+    return sorted(found)
+
+
+def _subject_feature_files(subject_id, feature_store=FEATURE_STORE_DIR, feature_set=DEFAULT_FEATURE_SET):
+    subj_dir = os.path.join(feature_store, f"SBJ{subject_id:02d}")
+    if not os.path.isdir(subj_dir):
+        return []
+    files = [
+        os.path.join(subj_dir, sess, feature_filename("train", feature_set))
+        for sess in sorted(os.listdir(subj_dir))
+    ]
+    return [f for f in files if os.path.exists(f)]
+
+
+def iter_feature_chunks(files, chunk_size=2048):
+    """
+    Yields (X, y) chunks one session file at a time, so peak memory is bounded
+    by a single session regardless of cohort size. A file's tail is merged
+    into its previous chunk instead of being yielded as a tiny batch, which
+    keeps IncrementalPCA.partial_fit happy.
+    """
+    for path in files:
+        with np.load(path, allow_pickle=True) as d:
+            X, y = d["X"], d["targets"]
+        if len(y) == 0 or len(y) != X.shape[0]:
+            continue
+        n_chunks = max(1, X.shape[0] // chunk_size)
+        for idx in np.array_split(np.arange(X.shape[0]), n_chunks):
+            yield X[idx].astype(np.float64), y[idx].astype(int)
+
+
+def _fit_streaming(files, params):
+    """Two passes: IncrementalPCA, then `epochs` passes of mini-batch SGD."""
+    counts = np.zeros(2)
+    n_features = None
+    for X, y in iter_feature_chunks(files, params["chunk_size"]):
+        n_features = X.shape[1]
+        counts += np.bincount(y, minlength=2)[:2]
+    if n_features is None:
+        return None, None
+
+    n_components = min(params["max_components"], n_features, params["chunk_size"])
+    ipca = IncrementalPCA(n_components=n_components, whiten=True)
+    for X, _ in iter_feature_chunks(files, params["chunk_size"]):
+        if X.shape[0] >= n_components:
+            ipca.partial_fit(X)
+
+    # "balanced" class weights from the global counts (partial_fit can't do it)
+    class_weight = counts.sum() / (2 * np.maximum(counts, 1))
+    clf = SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=params["alpha"],
+        average=True,
+        random_state=params["random_state"],
+    )
+    rng = np.random.default_rng(params["random_state"])
+    for _ in range(params["epochs"]):
+        for X, y in iter_feature_chunks(rng.permutation(files), params["chunk_size"]):
+            clf.partial_fit(ipca.transform(X), y, classes=np.array([0, 1]), sample_weight=class_weight[y])
+
+    return ipca, clf
+
+
+def _streaming_fold(files, test_sid, params):
+    """AUC of one held-out subject, None (reported) when a side has no usable data."""
+    name = f"SBJ{test_sid:02d}"
+    train_files = [f for sid, fs in files.items() if sid != test_sid for f in fs]
+    ipca, clf = _fit_streaming(train_files, params)
+    if ipca is None:
+        print(f"⚠️ LOSO {name}: no training data outside this subject, fold skipped")
+        return None
+
+    probs, targets = [], []
+    for X, y in iter_feature_chunks(files[test_sid], params["chunk_size"]):
+        probs.append(clf.predict_proba(ipca.transform(X))[:, 1])
+        targets.append(y)
+    if not targets or len(np.unique(np.concatenate(targets))) < 2:
+        print(f"⚠️ LOSO {name}: no labelled trials of both classes, fold skipped")
+        return None
+
+    auc = roc_auc_score(np.concatenate(targets), np.concatenate(probs))
+    print(f"✅ LOSO {name} AUC = {auc:.3f}")
+    return {"Subject": name, "AUC": auc}
+
+
+def train_loso_streaming(
+    feature_store=FEATURE_STORE_DIR,
+    subjects=None,
+    output_dir="models/generalized",
+    params=None,
+    run_folds=True,
+    audit_pickle=True,
+):
+    """
+    Out-of-core variant of train_loso: never holds more than one session file
+    in memory. Reports tracemalloc peak alongside the per-fold AUCs (None
+    when another tracemalloc session is already running).
+    """
+    params = {**STREAMING_PARAMS, **(params or {})}
+    start_all = time.time()
+
+    if subjects is None:
+        subjects = discover_subjects(feature_store=feature_store)
+    files = {sid: _subject_feature_files(sid, feature_store, params["feature_set"]) for sid in subjects}
+    files = {sid: f for sid, f in files.items() if f}
+    print(f"🌊 Streaming LOSO over {len(files)} subjects, {sum(map(len, files.values()))} session files")
+
+    # only measure when we own the tracemalloc session (an outer one, e.g. the
+    # benchmark harness, keeps running); always stopped, even if a fold fails
+    owns_tracing = not tracemalloc.is_tracing()
+    if owns_tracing:
+        tracemalloc.start()
+    try:
+        results = []
+        if run_folds:
+            for test_sid in files:
+                result = _streaming_fold(files, test_sid, params)
+                if result is not None:
+                    results.append(result)
+
+        print("🔁 Streaming fit on all subjects to finalize generalized model...")
+        ipca, clf = _fit_streaming([f for fs in files.values() for f in fs], params)
+        peak = tracemalloc.get_traced_memory()[1] if owns_tracing else None
+    finally:
+        if owns_tracing:
+            tracemalloc.stop()
+
+    if ipca is None:
+        raise ValueError(f"No labelled '{params['feature_set']}' training data in {feature_store}")
 
     os.makedirs(output_dir, exist_ok=True)
-    joblib.dump(
-        {"model": final_model, "pca": pca_final},
+    save_model(
+        {
+            "model": clf,
+            "pca": ipca,
+            "streaming": True,
+            "n_samples_seen": int(ipca.n_samples_seen_),
+            "feature_set": params["feature_set"],
+        },
         os.path.join(output_dir, "generalized_model.pkl"),
+        audit_pickle,
     )
 
     results_df = pd.DataFrame(results)
-    results_df.to_csv(os.path.join(output_dir, "loso_results.csv"), index=False)
+    if run_folds:
+        results_df.to_csv(os.path.join(output_dir, "loso_results.csv"), index=False)
 
+    if peak is not None:
+        print(f"📉 Peak traced memory: {peak / 2**20:.1f} MB")
     print(f"🏁 Completed in {(time.time() - start_all)/60:.1f} mins")
-    return results_df
+    return results_df, peak
 
 
 # =============================================================================
@@ -176,6 +826,17 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--train-subjects", action="store_true", help="Train subject-specific models")
     parser.add_argument("--train-loso", action="store_true", help="Train LOSO generalized model")
+    parser.add_argument("--train-loso-streaming", action="store_true", help="Train LOSO generalized model out-of-core")
+    parser.add_argument("--subjects", type=int, nargs="+", default=None, help="Subject numbers (default: all)")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel workers for subject training (-1 = all cores)")
+    parser.add_argument("--force", action="store_true", help="Retrain subjects even if inputs are unchanged")
+    parser.add_argument("--feature-set", default=DEFAULT_FEATURE_SET, help="Feature set ID (see app.features)")
+    parser.add_argument("--spatial-filter", choices=["xdawn"], default=None, help="Per-subject spatial filter")
+    parser.add_argument("--n-filters", type=int, default=SUBJECT_PARAMS["n_filters"])
+    parser.add_argument("--flamegraph", action="store_true", help="Sample LOSO training into loso_flamegraph.folded")
+    parser.add_argument(
+        "--no-audit-pickle", action="store_true", help="Only write the .npz serving artifacts, no .pkl bundles"
+    )
     args = parser.parse_args()
 
     BASE_PATH = os.path.abspath(
@@ -186,50 +847,37 @@ if __name__ == "__main__":
         os.path.join(os.path.dirname(__file__), "..", "..")
     )
 
-    if args.train_subjects:
-        SUBJECTS = range(1, 16)
-        results = []
+    SUBJECTS = args.subjects or discover_subjects(BASE_PATH) or range(1, 16)
 
-        for sid in SUBJECTS:
-            res = train_subject_specific(
-                BASE_PATH,
-                sid,
-                output_dir=os.path.join(PROJECT_ROOT, "models", "subject_models")
-            )
-            if res:
-                results.append(res)
-
-        if results:
-            pd.DataFrame(results).to_csv(
-                os.path.join(PROJECT_ROOT, "models", "subject_models", "subject_auc_summary.csv"),
-                index=False
-            )
+    if args.train_subjects:
+        train_all_subjects(
+            BASE_PATH,
+            subjects=SUBJECTS,
+            output_dir=os.path.join(PROJECT_ROOT, "models", "subject_models"),
+            params={
+                "feature_set": args.feature_set,
+                "spatial_filter": args.spatial_filter,
+                "n_filters": args.n_filters,
+            },
+            n_jobs=args.jobs,
+            force=args.force,
+            audit_pickle=not args.no_audit_pickle,
+        )
 
     if args.train_loso:
         train_loso(
             BASE_PATH,
-            subjects=range(1, 16),
-            output_dir=os.path.join(PROJECT_ROOT, "models", "generalized")
+            subjects=SUBJECTS,
+            output_dir=os.path.join(PROJECT_ROOT, "models", "generalized"),
+            feature_set=args.feature_set,
+            flamegraph=args.flamegraph,
+            audit_pickle=not args.no_audit_pickle,
         )
 
-    BASE_PATH = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "..", "data")
-    )
-    PROJECT_ROOT = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "..")
-    )
-
-    SUBJECTS = range(1, 16)
-
-    results = []
-
-    for sid in SUBJECTS:
-        res = train_subject_specific(BASE_PATH, sid, output_dir=os.path.join(PROJECT_ROOT, "models", "subject_models"))
-        if res:
-            results.append(res)
-
-    if results:
-        pd.DataFrame(results).to_csv(
-            os.path.join(PROJECT_ROOT, "models", "subject_models", "subject_auc_summary.csv"),
-            index=False
+    if args.train_loso_streaming:
+        train_loso_streaming(
+            subjects=SUBJECTS,
+            output_dir=os.path.join(PROJECT_ROOT, "models", "generalized"),
+            params={"feature_set": args.feature_set},
+            audit_pickle=not args.no_audit_pickle,
         )
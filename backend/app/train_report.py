@@ -0,0 +1,172 @@
+# backend/app/train_report.py
+"""
+Per-stage timing / memory report for the training pipeline.
+
+    report = TrainingReport()
+    with activate(report):
+        with stage("pca_fit", fold="SBJ03") as extra:
+            ...
+            extra["n_components"] = 32
+    report.write(output_dir, "loso_training_report")   # .json + .csv
+
+stage() (from app.stages) is a no-op outside activate(), so library code
+(e.g. preprocess) can mark its steps unconditionally without importing this
+module. Stages nest ("load/filter"); memory is the
+tracemalloc peak reached inside the stage and the part of it allocated there.
+
+StackSampler writes an optional flame graph in collapsed-stack format
+(flamegraph.pl / speedscope / inferno).
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+import pandas as pd
+
+from app.stages import record_to, stage  # noqa: F401  (stage re-exported for the training code)
+
+
+# =============================================================================
+# 1️⃣  Report
+# =============================================================================
+class TrainingReport:
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.rows = []
+        self._stack = []
+        self._peak = 0
+        self._tracing = False  # True while activate() owns a tracemalloc session
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, **labels):
+        tracing = self._tracing
+        parent = self._stack[-1] if self._stack else None
+        start_mem = 0
+        if tracing:
+            start_mem, peak = tracemalloc.get_traced_memory()
+            self._fold_peak(parent, peak)
+            tracemalloc.reset_peak()
+
+        entry = {"name": name if parent is None else f"{parent['name']}/{name}", "peak": 0, "extra": {}}
+        labels = {**(parent["labels"] if parent else {}), **labels}
+        entry["labels"] = labels
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield entry["extra"]
+        finally:
+            wall = time.perf_counter() - start
+            self._stack.pop()
+            row = {"stage": entry["name"], **labels, "wall_s": round(wall, 4)}
+            if tracing:
+                end_mem, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, entry["peak"])
+                self._fold_peak(parent, peak)
+                tracemalloc.reset_peak()
+                row["peak_mb"] = round(peak / 2**20, 2)
+                row["alloc_mb"] = round(max(0, peak - start_mem) / 2**20, 2)
+                row["retained_mb"] = round((end_mem - start_mem) / 2**20, 2)
+            row.update(entry["extra"])
+            self.rows.append(row)
+
+    def _fold_peak(self, entry, peak):
+        self._peak = max(self._peak, peak)
+        if entry is not None:
+            entry["peak"] = max(entry["peak"], peak)
+
+    @property
+    def peak_mb(self):
+        peak = self._peak
+        if self._tracing:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        return peak / 2**20
+
+    def summary(self):
+        """Inclusive wall time per stage name, summed over labels (parents include their children)."""
+        df = pd.DataFrame(self.rows)
+        if df.empty:
+            return {}
+        leaf = df["stage"].str.split("/").str[-1]
+        return {k: round(float(v), 4) for k, v in df.groupby(leaf)["wall_s"].sum().sort_values(ascending=False).items()}
+
+    def write(self, output_dir, name="training_report"):
+        os.makedirs(output_dir, exist_ok=True)
+        payload = {
+            "wall_s": round(time.perf_counter() - self._start, 3),
+            "peak_mb": round(self.peak_mb, 2) if self._peak else None,
+            "time_by_stage_s": self.summary(),
+            "stages": self.rows,
+        }
+        json_path = os.path.join(output_dir, f"{name}.json")
+        with open(json_path, "w") as f:
+            json.dump(payload, f, indent=2, default=str)
+        pd.DataFrame(self.rows).to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
+        return json_path
+
+
+@contextmanager
+def activate(report):
+    """
+    Makes `report` receive stage() calls. Memory is only tracked when this
+    call starts tracemalloc: stages reset its peak, which would corrupt an
+    outer measurement (e.g. the benchmark harness), so under one we report
+    wall time only.
+    """
+    report._tracing = report.track_memory and not tracemalloc.is_tracing()
+    if report._tracing:
+        tracemalloc.start()
+    try:
+        with record_to(report):
+            yield report
+    finally:
+        if report._tracing:
+            report._fold_peak(None, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            report._tracing = False
+
+
+# =============================================================================
+# 2️⃣  Sampling flame graph
+# =============================================================================
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds."""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        """Collapsed stacks: 'outer;inner;leaf <samples>' per line."""
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
@@ -0,0 +1,9 @@
+# backend/benchmarks/__init__.py
+"""
+Benchmarks for the preprocessing, training and serving hot paths.
+
+    cd backend
+    python -m benchmarks                      # run + compare against baseline.json
+    python -m benchmarks --save-baseline      # record a new baseline
+    python -m benchmarks --filter predict     # only matching benchmarks
+"""
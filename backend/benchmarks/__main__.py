@@ -0,0 +1,47 @@
+# backend/benchmarks/__main__.py
+import argparse
+import sys
+import time
+
+from benchmarks import harness, suite  # noqa: F401  (suite registers the benchmarks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NeuroSense hot-path benchmarks")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=None, help="Override the per-benchmark repeat count")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--baseline", default=str(harness.BASELINE_PATH))
+    args = parser.parse_args()
+
+    print(f"🏎️  Running {len(harness.BENCHMARKS)} registered benchmarks\n")
+    results = harness.run(args.filter, args.repeat)
+    latest = harness.save_results(results, harness.RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    print(f"\n💾 Results → {latest}")
+
+    if args.save_baseline:
+        baseline = harness.load_baseline(args.baseline) or {"results": {}}
+        merged = {**baseline.get("results", {}), **{r["name"]: r for r in results}}
+        harness.save_results(list(merged.values()), args.baseline)
+        print(f"📌 Baseline updated → {args.baseline}")
+        return 0
+
+    baseline = harness.load_baseline(args.baseline)
+    if baseline is None:
+        print("⚠️ No baseline yet; run with --save-baseline to record one")
+        return 0
+    if baseline.get("machine") != harness.machine_info():
+        print(f"⚠️ Baseline was recorded on {baseline.get('machine')}; timings may not be comparable")
+
+    regressions = harness.compare(results, baseline)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
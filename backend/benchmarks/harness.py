@@ -0,0 +1,144 @@
+# backend/benchmarks/harness.py
+"""
+Minimal asv-style runner: registered benchmarks build their inputs once, are
+timed over a few repeats (median wall time → throughput), run once more under
+tracemalloc for peak memory, and are compared against a stored baseline.
+"""
+import contextlib
+import io
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARKS = {}
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# a benchmark regresses when it is slower / hungrier than baseline by more than
+# the relative tolerance AND by more than the absolute floor (filters out noise)
+TIME_TOLERANCE = 0.30
+TIME_FLOOR_S = 0.002
+MEM_TOLERANCE = 0.20
+MEM_FLOOR_MB = 1.0
+
+
+def benchmark(name, items=1, unit="items", number=1, repeat=5):
+    """
+    Registers setup(ctx) -> fn. fn() is the timed call; it processes `items`
+    units per call and is called `number` times per timing (for micro paths).
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = {"setup": setup, "items": items, "unit": unit, "number": number, "repeat": repeat}
+        return setup
+    return decorator
+
+
+def fixture(ctx, key, build):
+    """Builds an input once per run and shares it between benchmarks."""
+    if key not in ctx:
+        ctx[key] = build()
+    return ctx[key]
+
+
+def _quiet(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def run_one(name, spec, ctx, repeat=None):
+    fn = _quiet(lambda: spec["setup"](ctx))
+    number = spec["number"]
+
+    def call():
+        for _ in range(number):
+            fn()
+
+    _quiet(call)  # warm-up: imports, caches, lazy model loads
+
+    times = []
+    for _ in range(repeat or spec["repeat"]):
+        start = time.perf_counter()
+        _quiet(call)
+        times.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        _quiet(fn)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "name": name,
+        "median_s": median,
+        "min_s": min(times),
+        "throughput": spec["items"] / median if median > 0 else float("inf"),
+        "unit": f"{spec['unit']}/s",
+        "peak_mb": peak / 2**20,
+        "repeat": len(times),
+    }
+
+
+def run(pattern=None, repeat=None):
+    ctx = {}
+    results = []
+    try:
+        for name, spec in BENCHMARKS.items():
+            if pattern and pattern not in name:
+                continue
+            result = run_one(name, spec, ctx, repeat)
+            print(
+                f"⏱️  {name:<42} {result['median_s'] * 1000:>10.3f} ms"
+                f"  {result['throughput']:>12.1f} {result['unit']:<12} peak {result['peak_mb']:>8.2f} MB"
+            )
+            results.append(result)
+    finally:
+        for cleanup in ctx.get("_cleanup", []):
+            cleanup()
+    return results
+
+
+def machine_info():
+    # no hostname: the baseline is committed
+    return {"python": platform.python_version(), "machine": platform.machine()}
+
+
+def save_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"machine": machine_info(), "results": {r["name"]: r for r in results}}, indent=2))
+    return path
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def compare(results, baseline):
+    """Returns a list of human-readable regressions against the baseline."""
+    regressions = []
+    base = baseline.get("results", {})
+    for r in results:
+        b = base.get(r["name"])
+        if b is None:
+            continue
+        slower = r["median_s"] - b["median_s"]
+        if slower > TIME_FLOOR_S and r["median_s"] > b["median_s"] * (1 + TIME_TOLERANCE):
+            regressions.append(
+                f"{r['name']}: {r['median_s'] * 1000:.3f} ms vs baseline {b['median_s'] * 1000:.3f} ms "
+                f"(+{100 * slower / b['median_s']:.0f}%)"
+            )
+        grown = r["peak_mb"] - b["peak_mb"]
+        if grown > MEM_FLOOR_MB and r["peak_mb"] > b["peak_mb"] * (1 + MEM_TOLERANCE):
+            regressions.append(
+                f"{r['name']}: peak {r['peak_mb']:.2f} MB vs baseline {b['peak_mb']:.2f} MB"
+            )
+    return regressions
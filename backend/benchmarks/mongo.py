@@ -0,0 +1,34 @@
+# backend/benchmarks/mongo.py
+"""
+mongomock stand-in for app.db so the db.py paths can be benchmarked without
+a running MongoDB (pip install -r requirements-dev.txt).
+"""
+from datetime import datetime
+
+import mongomock
+
+import app.db as dbm
+
+def install_mongomock(n_subjects=15, n_sessions=7, seed_scores=True):
+    """Points app.db's client at an in-memory database and seeds it."""
+    dbm.set_client(mongomock.MongoClient())
+    db = dbm.get_db()
+
+    now = datetime.utcnow()
+    for s in range(1, n_subjects + 1):
+        subject_id = f"SBJ{s:02d}"
+        dbm.subjects_col.insert_one({"subject_id": subject_id, "created_at": now})
+        if not seed_scores:
+            continue
+        dbm.sessions_col.insert_many([
+            {
+                "subject_id": subject_id,
+                "session_id": f"S{k:02d}",
+                "session_index": k,
+                "score": 0.4 + 0.02 * k,
+                "model_used": "loso",
+                "created_at": now,
+            }
+            for k in range(1, n_sessions + 1)
+        ])
+    return db
@@ -0,0 +1,154 @@
+# backend/benchmarks/shared_memory.py
+"""
+Per-worker memory with and without the shared store (app.shared_store).
+
+Starts N worker processes (spawned, like uvicorn workers) that each hold
+every model and every session's feature arrays:
+
+  private  joblib-loaded bundles + decoded feature arrays per process
+           (what each worker's caches hold without the store)
+  shared   the same data attached read-only from one store generation
+
+and reads RSS / PSS / private memory from /proc/self/smaps_rollup while all
+N are alive. PSS splits shared pages between the processes mapping them, so
+PSS per worker is the number that must stay flat as workers are added.
+
+    python -m benchmarks.shared_memory --workers 1 4 16
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.harness import RESULTS_DIR
+
+FIELDS = {"Rss": "rss_mb", "Pss": "pss_mb", "Private_Clean": "private_mb", "Private_Dirty": "private_mb"}
+
+
+def smaps_rollup():
+    """{rss_mb, pss_mb, private_mb} of this process (Linux)."""
+    out = {"rss_mb": 0.0, "pss_mb": 0.0, "private_mb": 0.0}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in FIELDS:
+                out[FIELDS[key]] += int(value.split()[0]) / 1024
+    return out
+
+
+def _touch(arr):
+    # fault every page in, as serving all sessions eventually does
+    return float(arr.sum()) if arr.ndim and arr.dtype.kind in "fiu" else 0.0
+
+
+def _hold_private(static_dir, models_dir):
+    import joblib
+    import numpy as np
+
+    from app.shared_store import _model_sources
+
+    models = [joblib.load(p) if p.suffix == ".pkl" else dict(np.load(p)) for p in _model_sources(models_dir)]
+    features = []
+    for path in sorted(static_dir.glob("SBJ*/S*/*.npz")):
+        with np.load(path) as d:
+            arrays = {k: d[k] for k in d.files}
+        for arr in arrays.values():
+            _touch(arr)
+        features.append(arrays)
+    return models, features
+
+
+def _hold_shared(static_dir, models_dir):
+    from app.artifacts import load_artifact
+    from app.shared_store import _model_sources, open_features, shared_model_path
+
+    models = [load_artifact(shared_model_path(p)) for p in _model_sources(models_dir)]
+    features = []
+    for path in sorted(static_dir.glob("SBJ*/S*/*.npz")):
+        with open_features(path) as d:
+            arrays = dict(d)
+        for arr in arrays.values():
+            _touch(arr)
+        features.append(arrays)
+    return models, features
+
+
+def _worker(mode, static_dir, models_dir, loaded, measured, results):
+    import numpy  # noqa: F401  (baseline includes the interpreter + numpy)
+
+    before = smaps_rollup()
+    held = (_hold_shared if mode == "shared" else _hold_private)(Path(static_dir), Path(models_dir))
+    loaded.wait()  # every worker holds its data: PSS now reflects the sharing
+    after = smaps_rollup()
+    results.put({**after, "data_pss_mb": after["pss_mb"] - before["pss_mb"]})
+    measured.wait()
+    del held
+
+
+def measure(mode, n_workers, static_dir, models_dir):
+    ctx = mp.get_context("spawn")
+    loaded, measured = ctx.Barrier(n_workers + 1), ctx.Barrier(n_workers + 1)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, str(static_dir), str(models_dir), loaded, measured, results))
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+    loaded.wait()
+    rows = [results.get() for _ in procs]
+    measured.wait()
+    for p in procs:
+        p.join()
+
+    mean = {k: sum(r[k] for r in rows) / len(rows) for k in rows[0]}
+    return {
+        "mode": mode,
+        "workers": n_workers,
+        **{f"{k}_per_worker": round(v, 1) for k, v in mean.items()},
+        "pss_total_mb": round(sum(r["pss_mb"] for r in rows), 1),
+    }
+
+
+def main():
+    from app.shared_store import MODELS_DIR, STATIC_DIR, STORE_ENV, build_store
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--modes", nargs="+", choices=["private", "shared"], default=["private", "shared"])
+    parser.add_argument("--static-dir", default=str(STATIC_DIR))
+    parser.add_argument("--models-dir", default=str(MODELS_DIR))
+    args = parser.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        raise SystemExit("❌ Needs Linux /proc/self/smaps_rollup")
+
+    store_dir = tempfile.mkdtemp(prefix="neurosense-shm-", dir="/dev/shm" if Path("/dev/shm").is_dir() else None)
+    os.environ[STORE_ENV] = store_dir  # inherited by the spawned workers
+    build_store(store_dir, args.static_dir, args.models_dir)
+
+    rows = []
+    print(f"\n{'mode':<8} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} {'private/worker':>15} {'PSS total':>10}")
+    for mode in args.modes:
+        for n in args.workers:
+            row = measure(mode, n, args.static_dir, args.models_dir)
+            rows.append(row)
+            print(
+                f"{mode:<8} {n:>7} {row['rss_mb_per_worker']:>8.1f} MB {row['pss_mb_per_worker']:>8.1f} MB "
+                f"{row['private_mb_per_worker']:>12.1f} MB {row['pss_total_mb']:>7.1f} MB"
+            )
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"shared_memory-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(json.dumps({"results": rows}, indent=2))
+    print(f"\n💾 Results → {out}")
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# backend/benchmarks/suite.py
+"""
+Benchmark definitions. Importing this module registers them with the harness.
+Inputs are synthetic (benchmarks.synthetic) and written to a temp directory.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import benchmark, fixture
+from benchmarks.synthetic import N_TRIALS, make_epochs, write_cohort, write_feature_npz, write_mat
+
+LOSO_SUBJECTS = (91, 92, 93)  # ids absent from the real feature store → raw .mat path
+LOSO_SESSIONS = (1, 2)
+LOSO_TRIALS = 400
+
+
+# =============================================================================
+# 🔧  Shared inputs
+# =============================================================================
+def _tmp(ctx):
+    def build():
+        path = Path(tempfile.mkdtemp(prefix="neurosense-bench-"))
+        ctx.setdefault("_cleanup", []).append(lambda: shutil.rmtree(path, ignore_errors=True))
+        return path
+    return fixture(ctx, "tmp", build)
+
+
+def _epochs(ctx):
+    return fixture(ctx, "epochs", lambda: make_epochs(N_TRIALS))
+
+
+def _filtered_epochs(ctx):
+    from app.preprocess import preprocess_eeg
+
+    return fixture(ctx, "filtered", lambda: preprocess_eeg(_epochs(ctx)[0]))
+
+
+def _features(ctx):
+    from app.preprocess import extract_features
+
+    return fixture(ctx, "features", lambda: extract_features(_filtered_epochs(ctx)))
+
+
+def _bundle(ctx):
+    def build():
+        from sklearn.decomposition import PCA
+        from sklearn.linear_model import LogisticRegression
+
+        X, (_, targets, _) = _features(ctx), _epochs(ctx)
+        pca = PCA(n_components=32, random_state=42).fit(X)
+        model = LogisticRegression(class_weight="balanced", max_iter=1000).fit(pca.transform(X), targets)
+        return {"model": model, "pca": pca, "feature_set": "stats"}
+    return fixture(ctx, "bundle", build)
+
+
+def _mongo(ctx):
+    from benchmarks.mongo import install_mongomock
+
+    return fixture(ctx, "mongo", install_mongomock)
+
+
+# =============================================================================
+# 1️⃣  Preprocessing
+# =============================================================================
+@benchmark("preprocess.process_mat_file", items=N_TRIALS, unit="trials", repeat=3)
+def bench_process_mat_file(ctx):
+    from app.preprocess import process_mat_file
+
+    path = fixture(ctx, "mat", lambda: write_mat(_tmp(ctx) / "trainData.mat", _epochs(ctx)[0]))
+    return lambda: process_mat_file(str(path))
+
+
+def _register_feature_set(feature_set):
+    @benchmark(f"features.extract[{feature_set}]", items=N_TRIALS, unit="trials")
+    def bench_extract(ctx):
+        from app.preprocess import extract_features
+
+        eeg = _filtered_epochs(ctx)
+        return lambda: extract_features(eeg, feature_set=feature_set)
+
+
+for _feature_set in ("stats", "decimated", "bandpower", "multiwindow"):
+    _register_feature_set(_feature_set)
+
+
+# =============================================================================
+# 2️⃣  Serving
+# =============================================================================
+@benchmark("models_serving.predict_with_model", items=N_TRIALS, unit="trials", repeat=10)
+def bench_predict(ctx):
+    from app.models_serving import predict_with_model
+
+    bundle, X = _bundle(ctx), _features(ctx)
+    return lambda: predict_with_model(bundle, X)
+
+
+def _artifact(ctx):
+    from app.artifacts import export_artifact
+
+    return fixture(ctx, "artifact", lambda: export_artifact(_bundle(ctx), _tmp(ctx) / "SBJ01_model.npz"))
+
+
+@benchmark("models_serving.predict_with_model[fused]", items=N_TRIALS, unit="trials", repeat=10)
+def bench_predict_fused(ctx):
+    from app.artifacts import load_artifact
+    from app.models_serving import predict_with_model
+
+    bundle, X = load_artifact(_artifact(ctx)), _features(ctx)
+    return lambda: predict_with_model(bundle, X)
+
+
+@benchmark("artifacts.load_artifact", items=1, unit="loads", number=200)
+def bench_load_artifact(ctx):
+    from app.artifacts import load_artifact
+
+    path = _artifact(ctx)
+    return lambda: load_artifact(path)
+
+
+@benchmark("joblib.load[bundle]", items=1, unit="loads", number=50)
+def bench_load_pickle(ctx):
+    import joblib
+
+    path = fixture(ctx, "pickle", lambda: joblib.dump(_bundle(ctx), _tmp(ctx) / "SBJ01_model.pkl")[0])
+    return lambda: joblib.load(path)
+
+
+@benchmark("nsi.compute_nsi", items=1, unit="calls", number=1000)
+def bench_compute_nsi(ctx):
+    from app.nsi import compute_confidence_consistency, compute_nsi
+
+    rng = np.random.default_rng(0)
+    scores = list(rng.uniform(0.3, 0.7, size=7))
+    confidence = [compute_confidence_consistency(rng.uniform(size=N_TRIALS)) for _ in range(7)]
+    return lambda: compute_nsi(scores, confidence)
+
+
+@benchmark("recommendation.recommend_next_game", items=1, unit="calls", number=200)
+def bench_recommend(ctx):
+    from app.recommendation import recommend_next_game
+
+    scores = [0.42, 0.45, 0.44, 0.5, 0.48, 0.52, 0.55]
+    return lambda: recommend_next_game(62, scores, "SBJ01")
+
+
+@benchmark("main.load_npz_as_json", items=N_TRIALS, unit="trials", repeat=10)
+def bench_load_npz_as_json(ctx):
+    from app.main import load_npz_as_json
+
+    _, targets, events = _epochs(ctx)
+    path = write_feature_npz(_tmp(ctx) / "train_features.npz", _features(ctx), targets, events)
+    return lambda: load_npz_as_json(path)
+
+
+# =============================================================================
+# 3️⃣  Training
+# =============================================================================
+@benchmark(
+    "train_models.train_loso[3x2x400]",
+    items=len(LOSO_SUBJECTS) * len(LOSO_SESSIONS) * LOSO_TRIALS,
+    unit="trials",
+    repeat=2,
+)
+def bench_train_loso(ctx):
+    from app.train_models import clear_feature_cache, train_loso
+
+    data_dir = write_cohort(_tmp(ctx) / "data", LOSO_SUBJECTS, LOSO_SESSIONS, n_trials=LOSO_TRIALS)
+    out_dir = _tmp(ctx) / "models"
+
+    def run():
+        clear_feature_cache()  # time the full load → PCA → LR path every call
+        return train_loso(str(data_dir), subjects=LOSO_SUBJECTS, sessions=LOSO_SESSIONS, output_dir=str(out_dir))
+    return run
+
+
+# =============================================================================
+# 4️⃣  Database paths (mongomock)
+# =============================================================================
+@benchmark("db.get_sessions", items=1, unit="calls", number=200)
+def bench_get_sessions(ctx):
+    _mongo(ctx)
+    from app import db
+
+    return lambda: db.get_sessions("SBJ01")
+
+
+@benchmark("db.insert_or_update_session", items=3, unit="writes", number=100)
+def bench_upsert_session(ctx):
+    _mongo(ctx)
+    from app import db
+
+    def run():
+        # one real change + one no-op (the conditional branch)
+        db.insert_or_update_session("SBJ02", "S08", 0.51, "loso", "v1")
+        db.insert_or_update_session("SBJ02", "S08", 0.51, "loso", "v1")
+        db.insert_or_update_session("SBJ02", "S08", 0.52, "loso", "v1")
+    return run
+
+
+@benchmark("db.data_version", items=1, unit="calls", number=200)
+def bench_data_version(ctx):
+    _mongo(ctx)
+    from app import db
+
+    return lambda: db.data_version("SBJ03", include_games=True)
+
+
+@benchmark("db.nsi_cache_roundtrip", items=1, unit="calls", number=200)
+def bench_nsi_cache(ctx):
+    _mongo(ctx)
+    from app import db
+
+    components = {"baseline": 0.4, "variability": 0.2, "improvement": 0.6, "consistency": 0.1}
+
+    def run():
+        db.set_cached_nsi("SBJ04", 61, components)
+        return db.get_cached_nsi("SBJ04")
+    return run
@@ -0,0 +1,66 @@
+# backend/benchmarks/synthetic.py
+"""
+Synthetic EEG shaped like the real recordings: 8 channels × 350 samples
+(1400 ms @ 250 Hz) × 1600 trials per session, 1 target in 8 flashes with a
+P300-like bump on the targets.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import scipy.io as sio
+
+N_CHANNELS = 8
+N_SAMPLES = 350
+N_TRIALS = 1600
+FS = 250.0
+
+
+def make_epochs(n_trials=N_TRIALS, n_channels=N_CHANNELS, n_samples=N_SAMPLES, seed=0):
+    """Returns (epochs (n_trials, n_channels, n_samples), targets, events)."""
+    rng = np.random.default_rng(seed)
+    events = np.tile(np.arange(1, 9), n_trials // 8 + 1)[:n_trials]
+    targets = (events == rng.integers(1, 9)).astype(int)
+
+    t = np.arange(n_samples) / FS
+    bump = np.exp(-((t - 0.35) ** 2) / (2 * 0.05**2))
+    epochs = rng.normal(scale=5.0, size=(n_trials, n_channels, n_samples)).cumsum(axis=2) * 0.2
+    epochs += rng.normal(size=(n_trials, n_channels, n_samples))
+    epochs[targets == 1] += 2.0 * bump
+    return epochs, targets, events
+
+
+def write_mat(path, epochs):
+    """Saves epochs in the raw file layout: trainData as (channels, samples, trials)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sio.savemat(path, {"trainData": epochs.transpose(1, 2, 0)})
+    return path
+
+
+def write_cohort(data_dir, subjects, sessions, n_trials=N_TRIALS, seed=0):
+    """Raw data/ layout (SBJxx/Syy/Train/trainData.mat + trainTargets.txt)."""
+    data_dir = Path(data_dir)
+    for i, sid in enumerate(subjects):
+        for j, sess in enumerate(sessions):
+            epochs, targets, events = make_epochs(n_trials, seed=seed + 100 * i + j)
+            folder = data_dir / f"SBJ{sid:02d}" / f"S{sess:02d}" / "Train"
+            write_mat(folder / "trainData.mat", epochs)
+            np.savetxt(folder / "trainTargets.txt", targets, fmt="%d")
+            np.savetxt(folder / "trainEvents.txt", events, fmt="%d")
+    return data_dir
+
+
+def write_feature_npz(path, X, targets, events):
+    """Same layout as preprocess_all.py writes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        X=X.astype(np.float32),
+        targets=targets,
+        events=events,
+        labels=np.array([]),
+        info=json.dumps({"n_trials": int(len(X)), "n_features": int(X.shape[1]), "feature_set": "stats"}),
+    )
+    return path
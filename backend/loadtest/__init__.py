@@ -0,0 +1,13 @@
+# backend/loadtest/__init__.py
+"""
+End-to-end HTTP load test for app.main:app.
+
+    cd backend
+    python -m loadtest --concurrency 16 --duration 30            # embedded server + mongomock
+    python -m loadtest --mix nsi_stampede --concurrency 64
+    python -m loadtest --url http://staging:8000 --duration 60   # existing deployment
+
+The embedded server runs in its own process (python -m loadtest.server) so the
+load generator does not compete with it for the GIL. It uses a mongomock
+database seeded from backend/static_data and the committed models.
+"""
@@ -0,0 +1,80 @@
+# backend/loadtest/__main__.py
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from loadtest.runner import print_report, run_load, start_embedded_server, summarize
+from loadtest.scenarios import MIXES
+
+
+def parse_slo(values):
+    """['GET /nsi=150', 'ALL=300'] -> {'GET /nsi': 150.0, 'ALL': 300.0}"""
+    slo = {}
+    for value in values or []:
+        label, _, ms = value.rpartition("=")
+        slo[label] = float(ms)
+    return slo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NeuroSense HTTP load test")
+    parser.add_argument("--url", default=None, help="Target an existing server instead of the embedded one")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--threadpool", type=int, default=None, help="Embedded server threadpool size")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-warmup", action="store_true", help="Skip scoring every session before the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Write the report as JSON")
+    parser.add_argument(
+        "--slo", action="append", metavar="ENDPOINT=P95_MS",
+        help="Fail if an endpoint's p95 exceeds this, e.g. --slo 'GET /nsi=150' --slo ALL=300",
+    )
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        print("🚀 Starting embedded server (mongomock + static_data)...")
+        proc, url = start_embedded_server(args.port, args.threadpool)
+
+    try:
+        print(f"🔥 Mix '{args.mix}': {MIXES[args.mix]}")
+        samples, elapsed = asyncio.run(run_load(
+            url, MIXES[args.mix], args.concurrency, args.duration, args.requests, args.seed,
+            warm=not args.no_warmup,
+        ))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = summarize(samples, elapsed)
+    print_report(report, elapsed, args.concurrency)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({
+            "url": url, "mix": args.mix, "concurrency": args.concurrency,
+            "elapsed_s": elapsed, "endpoints": report,
+        }, indent=2))
+        print(f"\n💾 Report → {args.out}")
+
+    failed = [
+        f"{label}: p95 {report[label]['p95_ms']:.1f} ms > {limit:.1f} ms"
+        for label, limit in parse_slo(args.slo).items()
+        if label in report and report[label]["p95_ms"] > limit
+    ]
+    if report["ALL"]["errors"]:
+        failed.append(f"{report['ALL']['errors']} failed requests (5xx / connection errors)")
+    if failed:
+        print("\n❌ " + "\n❌ ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
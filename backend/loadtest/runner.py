@@ -0,0 +1,135 @@
+# backend/loadtest/runner.py
+"""
+Async load generator: `concurrency` virtual users issue requests from a
+traffic mix back to back until the duration (or request budget) runs out.
+"""
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from loadtest.scenarios import pick
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+# =============================================================================
+# 1️⃣  Embedded server
+# =============================================================================
+def start_embedded_server(port=8765, threadpool=None, timeout=60.0):
+    """Starts python -m loadtest.server in a subprocess and waits until it answers."""
+    cmd = [sys.executable, "-m", "loadtest.server", "--port", str(port)]
+    if threadpool:
+        cmd += ["--threadpool", str(threadpool)]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env={**os.environ, "PYTHONUNBUFFERED": "1"})
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Embedded server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/health/db", timeout=1.0).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Embedded server did not start in time")
+
+
+# =============================================================================
+# 2️⃣  Load generation
+# =============================================================================
+async def discover_sessions(client: httpx.AsyncClient):
+    subjects = (await client.get("/subjects")).json()["subjects"]
+    sessions = {}
+    for subject_id in subjects:
+        r = await client.get(f"/subjects/{subject_id}/sessions")
+        if r.status_code == 200:
+            sessions[subject_id] = [s["session_id"] for s in r.json()["sessions"]]
+    return {k: v for k, v in sessions.items() if v}
+
+
+async def warm_up(client: httpx.AsyncClient, sessions):
+    """Scores every session once (mode=write) so NSI / recommend have data."""
+    for subject_id, session_ids in sessions.items():
+        await asyncio.gather(*(
+            client.get(f"/predict/session/{subject_id}/{s}") for s in session_ids
+        ))
+
+
+async def _user(client, rng, mix, sessions, deadline, budget, samples):
+    while time.perf_counter() < deadline and budget[0] > 0:
+        budget[0] -= 1
+        label, method, path, body = pick(rng, mix)(rng, sessions)
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, path, json=body)
+            status = r.status_code
+        except httpx.HTTPError:
+            status = 0
+        samples.append((label, status, time.perf_counter() - start))
+
+
+async def run_load(url, mix, concurrency=16, duration=30.0, max_requests=None, seed=0, warm=True):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        sessions = await discover_sessions(client)
+        if not sessions:
+            raise RuntimeError("No subjects / sessions found on the server")
+        if warm:
+            await warm_up(client, sessions)
+
+        samples = []
+        budget = [max_requests or float("inf")]
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            _user(client, random.Random(seed + i), mix, sessions, deadline, budget, samples)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+# =============================================================================
+# 3️⃣  Report
+# =============================================================================
+def summarize(samples, elapsed):
+    """Per endpoint (and overall): count, errors, throughput, p50/p95/p99 in ms."""
+    by_label = {}
+    for label, status, latency in samples:
+        by_label.setdefault(label, []).append((status, latency))
+    by_label["ALL"] = [(status, latency) for _, status, latency in samples]
+
+    report = {}
+    for label, rows in by_label.items():
+        statuses = np.array([s for s, _ in rows])
+        latencies = np.array([l for _, l in rows]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+        report[label] = {
+            "count": int(len(rows)),
+            "errors": int(np.sum((statuses == 0) | (statuses >= 500))),
+            "rps": len(rows) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+    return report
+
+
+def print_report(report, elapsed, concurrency):
+    print(f"\n📊 {report['ALL']['count']} requests in {elapsed:.1f}s at concurrency {concurrency}\n")
+    print(f"{'endpoint':<32} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for label, r in sorted(report.items(), key=lambda kv: (kv[0] == "ALL", kv[0])):
+        print(
+            f"{label:<32} {r['count']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
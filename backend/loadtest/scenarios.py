@@ -0,0 +1,70 @@
+# backend/loadtest/scenarios.py
+"""
+Request kinds and traffic mixes. A request kind picks its own subject /
+session and returns (endpoint label, method, path, json body or None).
+"""
+import random
+
+GAME_IDS = ("follow_animal", "color_focus", "find_the_star", "memory_match")
+
+
+def manifest(rng: random.Random, sessions):
+    return "GET /manifest", "GET", "/manifest", None
+
+
+def predict(rng: random.Random, sessions):
+    subject_id = rng.choice(list(sessions))
+    session_id = rng.choice(sessions[subject_id])
+    return "GET /predict/session", "GET", f"/predict/session/{subject_id}/{session_id}", None
+
+
+def predict_read(rng: random.Random, sessions):
+    subject_id = rng.choice(list(sessions))
+    session_id = rng.choice(sessions[subject_id])
+    return "GET /predict/session?mode=read", "GET", f"/predict/session/{subject_id}/{session_id}?mode=read", None
+
+
+def nsi(rng: random.Random, sessions):
+    return "GET /nsi", "GET", f"/nsi/{rng.choice(list(sessions))}", None
+
+
+def recommend(rng: random.Random, sessions):
+    return "GET /recommend/next", "GET", f"/recommend/next/{rng.choice(list(sessions))}", None
+
+
+def game_log(rng: random.Random, sessions):
+    subject_id = rng.choice(list(sessions))
+    body = {
+        "subject_id": subject_id,
+        "session_id": rng.choice(sessions[subject_id]),
+        "game_id": rng.choice(GAME_IDS),
+        "source": "loadtest",
+    }
+    return "POST /game/log", "POST", "/game/log", body
+
+
+REQUEST_KINDS = {
+    "manifest": manifest,
+    "predict": predict,
+    "predict_read": predict_read,
+    "nsi": nsi,
+    "recommend": recommend,
+    "game_log": game_log,
+}
+
+# relative weights per request kind
+MIXES = {
+    # a child finishing sessions while the parent dashboard polls
+    "default": {"manifest": 10, "predict": 35, "nsi": 20, "recommend": 20, "game_log": 15},
+    # dashboards only, no writes: everything should come from caches
+    "read_only": {"manifest": 20, "predict_read": 30, "nsi": 30, "recommend": 20},
+    # many NSI reads racing score writes that invalidate the NSI cache
+    "nsi_stampede": {"nsi": 80, "predict": 20},
+    # predict only: npz reads + model inference
+    "predict_heavy": {"predict": 70, "predict_read": 30},
+}
+
+
+def pick(rng: random.Random, mix: dict):
+    kinds = list(mix)
+    return REQUEST_KINDS[rng.choices(kinds, weights=[mix[k] for k in kinds])[0]]
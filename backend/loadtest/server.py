@@ -0,0 +1,67 @@
+# backend/loadtest/server.py
+"""
+Runs app.main:app with uvicorn against an in-memory Mongo stand-in seeded
+from static_data (subjects + sessions, scores left empty so the first
+predict/session calls write them like in production).
+
+    python -m loadtest.server --port 8765 [--threadpool 40]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+STATIC_DIR = ROOT / "backend" / "static_data"
+
+
+def static_sessions(static_dir: Path = STATIC_DIR):
+    """{subject_id: [session_id, ...]} for every session with a train feature file."""
+    found = {}
+    for path in sorted(Path(static_dir).glob("SBJ*/S*/train_features.npz")):
+        found.setdefault(path.parent.parent.name, []).append(path.parent.name)
+    return found
+
+
+def seed_from_static(static_dir: Path = STATIC_DIR):
+    from benchmarks.mongo import install_mongomock
+    import app.db as dbm
+
+    install_mongomock(n_subjects=0)
+    now = datetime.utcnow()
+    for subject_id, sessions in static_sessions(static_dir).items():
+        dbm.subjects_col.insert_one({"subject_id": subject_id, "created_at": now})
+        dbm.sessions_col.insert_many([
+            {"subject_id": subject_id, "session_id": s, "session_index": int(s[1:]), "created_at": now}
+            for s in sessions
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedded NeuroSense server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--threadpool", type=int, default=None, help="Max concurrent sync endpoints (anyio default: 40)")
+    args = parser.parse_args()
+
+    import anyio.to_thread
+    import uvicorn
+
+    seed_from_static()
+    from app.main import app
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+    )
+
+    async def serve():
+        # the limiter is per event loop, so it is sized inside the server's loop
+        if args.threadpool:
+            anyio.to_thread.current_default_thread_limiter().total_tokens = args.threadpool
+        await server.serve()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 
+import argparse
 import json
 import numpy as np
 from pathlib import Path
 from tqdm import tqdm
 
 # ensure this import matches your package structure
+from app.artifacts import load_artifact
+from app.features import DEFAULT_FEATURE_SET, base_feature_set, feature_filename, parse_feature_set
 from app.preprocess import process_mat_file
 
 ROOT = Path(__file__).resolve().parents[1]  # repo root
@@ -22,7 +25,7 @@ def safe_load_txt(path):
             lines = [l.strip() for l in f if l.strip()]
         return np.array([int(x) for x in lines], dtype=int)
 
-def process_session(subject_folder: Path, session_folder: Path):
+def process_session(subject_folder: Path, session_folder: Path, feature_set=DEFAULT_FEATURE_SET, spatial_filter=None):
     # session_folder is like data/SBJ01/S01
     out_session = OUT_DIR / subject_folder.name / session_folder.name
     out_session.mkdir(parents=True, exist_ok=True)
@@ -40,12 +43,12 @@ def process_session(subject_folder: Path, session_folder: Path):
         train_labels = train_folder / "trainLabels.txt"
 
         if train_mat.exists():
-            feats, info = process_mat_file(str(train_mat))
+            feats, info = process_mat_file(str(train_mat), feature_set=feature_set, spatial_filter=spatial_filter)
             train_targets_arr = safe_load_txt(train_targets) if train_targets.exists() else None
             train_events_arr = safe_load_txt(train_events) if train_events.exists() else None
             train_labels_arr = safe_load_txt(train_labels) if train_labels.exists() else None
 
-            npz_path = out_session / "train_features.npz"
+            npz_path = out_session / feature_filename("train", info["feature_set"])
             np.savez_compressed(
                 npz_path,
                 X=feats.astype(np.float32),
@@ -62,7 +65,9 @@ def process_session(subject_folder: Path, session_folder: Path):
         runs_file = test_folder / "runs_per_block.txt"
 
         if test_mat.exists():
-            feats_test, info_test = process_mat_file(str(test_mat))
+            feats_test, info_test = process_mat_file(
+                str(test_mat), feature_set=feature_set, spatial_filter=spatial_filter
+            )
             test_events_arr = safe_load_txt(test_events) if test_events.exists() else None
             runs_val = None
             if runs_file.exists():
@@ -71,7 +76,7 @@ def process_session(subject_folder: Path, session_folder: Path):
                 except:
                     runs_val = None
 
-            npz_test_path = out_session / "test_features.npz"
+            npz_test_path = out_session / feature_filename("test", info_test["feature_set"])
             np.savez_compressed(
                 npz_test_path,
                 X=feats_test.astype(np.float32),
@@ -83,21 +88,46 @@ def process_session(subject_folder: Path, session_folder: Path):
     return result
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the npz feature store from data/")
+    parser.add_argument(
+        "--feature-set",
+        default=DEFAULT_FEATURE_SET,
+        help="Feature set ID from app.features, e.g. stats, decimated, decimated+bandpower",
+    )
+    parser.add_argument(
+        "--spatial-filters",
+        default=None,
+        help="Directory of subject models; subjects whose bundle has a spatial filter get "
+             "features built with that filter and the bundle's feature set",
+    )
+    args = parser.parse_args()
+    parse_feature_set(args.feature_set)  # fail fast on unknown IDs
+
     manifest = {"subjects": []}
     # iterate subjects
     for subj in sorted(DATA_DIR.glob("SBJ*")):
         if not subj.is_dir():
             continue
         subj_entry = {"id": subj.name, "sessions": []}
+        feature_set, spatial_filter = args.feature_set, None
+        if args.spatial_filters:
+            model_path = Path(args.spatial_filters) / f"{subj.name}_model.npz"
+            bundle = load_artifact(model_path) if model_path.exists() else {}
+            if bundle.get("spatial_filter") is None:
+                continue
+            feature_set, spatial_filter = base_feature_set(bundle["feature_set"]), bundle["spatial_filter"]
         for sess in sorted(subj.glob("S*")):
             if not sess.is_dir():
                 continue
             print(f"Processing {subj.name}/{sess.name}")
-            sess_entry = process_session(subj, sess)
+            sess_entry = process_session(subj, sess, feature_set, spatial_filter)
             subj_entry["sessions"].append(sess_entry)
         manifest["subjects"].append(subj_entry)
 
-    # write manifest
+    # write manifest (only the default set feeds the frontend manifest)
+    if args.feature_set != DEFAULT_FEATURE_SET or args.spatial_filters:
+        print(f"\nDone. Feature set '{args.feature_set}' written next to the default files.")
+        return
     manifest_path = OUT_DIR / "manifest.json"
     with open(manifest_path, "w") as f:
         json.dump(manifest, f, indent=2)
@@ -1,12 +1,13 @@
 from app.db import db_list_subjects, get_sessions
 import requests
 from pathlib import Path
+import os
 import sys
 
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT))
 
-BASE_URL = "http://localhost:8000"
+BASE_URL = os.getenv("NEUROSENSE_API_URL", "http://localhost:8000")
 
 def backfill_subject(subject_id):
     sessions = get_sessions(subject_id)
@@ -0,0 +1,78 @@
+"""
+Import-time budget for the API process: a worker must be able to answer
+/health without paying for sklearn, scipy, pandas, joblib or pymongo.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+fails if a forbidden module was imported eagerly or the total exceeds the
+budget, and prints the slowest imports. Exit code 1 on failure (CI gate).
+
+    python scripts/check_import_time.py --budget-ms 1000
+
+tests/test_import_time.py runs the same check under pytest.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# heavy modules that must only load on first use
+FORBIDDEN = ("sklearn", "scipy", "pandas", "joblib", "pymongo", "dotenv")
+BUDGET_MS = 1000.0
+
+
+def import_times(module="app.main"):
+    """[(name, self_us, cumulative_us, depth)] in import order, from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ import {module} failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def check(module="app.main"):
+    """(total_ms, eagerly imported forbidden packages, rows)."""
+    rows = import_times(module)
+    total_ms = next(cum for name, _, cum, _ in reversed(rows) if name == module) / 1000
+    eager = sorted({name.split(".")[0] for name, *_ in rows} & set(FORBIDDEN))
+    return total_ms, eager, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Max cumulative import time")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total_ms, eager, rows = check(args.module)
+
+    print(f"⏱️  import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, _, cum, depth in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"   {cum / 1000:8.1f} ms  {'  ' * depth}{name}")
+
+    failed = False
+    if eager:
+        print(f"❌ Imported at startup (must be lazy): {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Over budget by {total_ms - args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ Import budget OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Fake 8-channel EEG device: replays a recorded session's .mat as a live stream
+against the /stream/predict WebSocket and reports per-trial latency.
+
+Epochs are laid back to back with a stimulus event at each epoch start, so the
+server's 100–700 ms window lines up with the offline features.
+
+    python scripts/fake_eeg_device.py --subject 1 --session 1 --speed 4
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import websockets
+
+from app.preprocess import load_mat, _to_trials_channels_samples
+
+ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = ROOT / "data"
+FS = 250.0
+EPOCH_LEN = int(700 * FS / 1000)  # samples until the feature window is complete
+
+
+def load_stream(subject: int, session: int):
+    folder = DATA_DIR / f"SBJ{subject:02d}" / f"S{session:02d}" / "Train"
+    raw = _to_trials_channels_samples(load_mat(str(folder / "trainData.mat")))
+    n_trials, n_channels, n_samples = raw.shape
+
+    codes = np.loadtxt(folder / "trainEvents.txt", dtype=int)
+    targets_path = folder / "trainTargets.txt"
+    targets = np.loadtxt(targets_path, dtype=int) if targets_path.exists() else None
+
+    stream = raw.transpose(1, 0, 2).reshape(n_channels, -1)  # (channels, total samples)
+    onsets = np.arange(n_trials) * n_samples
+    return stream, onsets, codes, targets
+
+
+async def replay(url, stream, onsets, codes, chunk, speed):
+    sent_at = {}
+    results = []
+
+    async with websockets.connect(url, max_size=None) as ws:
+        ready = json.loads(await ws.recv())
+        print(f"🔌 Connected: {ready}")
+
+        async def receiver():
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("type") != "trial":
+                    print(f"⚠️ {msg}")
+                    continue
+                done_chunk = (msg["onset"] + EPOCH_LEN - 1) // chunk
+                msg["roundtrip_ms"] = (time.perf_counter() - sent_at[done_chunk]) * 1000
+                results.append(msg)
+                if len(results) == len(onsets):
+                    return
+
+        recv_task = asyncio.create_task(receiver())
+
+        for i, start in enumerate(range(0, stream.shape[1], chunk)):
+            end = min(start + chunk, stream.shape[1])
+            in_chunk = np.nonzero((onsets >= start) & (onsets < end))[0]
+            payload = {
+                "samples": stream[:, start:end].T.tolist(),
+                "events": [[int(onsets[j] - start), int(codes[j])] for j in in_chunk],
+            }
+            sent_at[i] = time.perf_counter()
+            await ws.send(json.dumps(payload))
+            await asyncio.sleep((end - start) / FS / speed)
+
+        await asyncio.wait_for(recv_task, timeout=10)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subject", type=int, default=1)
+    parser.add_argument("--session", type=int, default=1)
+    parser.add_argument("--url", default="ws://localhost:8000")
+    parser.add_argument("--chunk", type=int, default=25, help="Samples per message (25 = 100 ms)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--subject-model", action="store_true", help="Prefer the subject-specific model")
+    args = parser.parse_args()
+
+    stream, onsets, codes, targets = load_stream(args.subject, args.session)
+    url = (
+        f"{args.url}/stream/predict/SBJ{args.subject:02d}"
+        f"?prefer_subject_model={str(args.subject_model).lower()}"
+    )
+    print(f"▶️  Replaying {len(onsets)} trials ({stream.shape[1] / FS:.0f}s of EEG) at {args.speed}x")
+
+    results = asyncio.run(replay(url, stream, onsets, codes, args.chunk, args.speed))
+
+    server = np.array([r["latency_ms"] for r in results])
+    roundtrip = np.array([r["roundtrip_ms"] for r in results])
+    print(f"\n✅ Scored {len(results)}/{len(onsets)} trials")
+    print(f"   server latency   p50={np.percentile(server, 50):.2f} ms  p95={np.percentile(server, 95):.2f} ms")
+    print(f"   round-trip       p50={np.percentile(roundtrip, 50):.2f} ms  p95={np.percentile(roundtrip, 95):.2f} ms")
+
+    if targets is not None and len(targets) == len(onsets):
+        from sklearn.metrics import roc_auc_score
+
+        probs = np.zeros(len(onsets))
+        for r in results:
+            probs[r["event_index"]] = r["prob"]
+        print(f"   online AUC = {roc_auc_score(targets, probs):.3f}")
+
+
+if __name__ == "__main__":
+    main()
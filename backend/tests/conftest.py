@@ -0,0 +1,55 @@
+# backend/tests/conftest.py
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))  # `from app.x import ...`, as when run from backend/
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def p300_data(rng):
+    """Small separable two-class problem shaped like trial features."""
+    n, d = 400, 60
+    y = (rng.random(n) < 0.25).astype(int)
+    X = rng.normal(size=(n, d)) + np.outer(y, rng.normal(size=d)) * 0.8
+    return X, y
+
+
+@pytest.fixture
+def db():
+    """app.db on an in-memory mongomock client."""
+    import mongomock
+
+    from app import db as dbm
+
+    dbm.set_client(mongomock.MongoClient())
+    yield dbm
+    dbm.close_client()
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    """Empty feature store the API reads instead of backend/static_data."""
+    from app import main
+
+    monkeypatch.setattr(main, "STATIC_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def api(db, static_dir):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,318 @@
+# backend/tests/test_api.py
+import io
+import json
+import pstats
+
+import numpy as np
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+from sklearn.linear_model import LogisticRegression
+
+from app import main, models_serving, profiling
+from app.artifacts import export_artifact
+from app.encoding import decode_f32
+from app.features import feature_filename
+
+
+def _fused(rng, n_features, feature_set):
+    return {"weights": rng.normal(size=n_features), "bias": 0.0, "feature_set": feature_set}
+
+
+def _write_features(static_dir, rng, subject_id, session_id, feature_set="stats", n_trials=40, n_features=12, **extra):
+    sess = static_dir / subject_id / session_id
+    sess.mkdir(parents=True, exist_ok=True)
+    path = sess / feature_filename("train", feature_set)
+    np.savez(
+        path,
+        X=rng.normal(size=(n_trials, n_features)).astype(np.float32),
+        targets=np.tile([1, 0, 0, 0], n_trials // 4),
+        info=json.dumps({"feature_set": feature_set}),
+        **extra,
+    )
+    return path
+
+
+@pytest.fixture
+def two_models(rng, monkeypatch):
+    """LOSO on the default features, subject model on its own feature set."""
+    loso, subject = _fused(rng, 12, "stats"), _fused(rng, 12, "decimated")
+    monkeypatch.setattr(main, "get_generalized_model", lambda: loso)
+    monkeypatch.setattr(main, "get_subject_model", lambda subject_id: subject)
+    return loso, subject
+
+
+# --- /predict/compare ETag ----------------------------------------------------
+def test_compare_etag_changes_with_every_feature_file(api, static_dir, rng, two_models):
+    _write_features(static_dir, rng, "SBJ01", "S01", "stats")
+    _write_features(static_dir, rng, "SBJ01", "S01", "decimated")
+
+    first = api.get("/predict/compare/SBJ01/S01")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert api.get("/predict/compare/SBJ01/S01", headers={"If-None-Match": etag}).status_code == 304
+
+    # only the subject model's feature file is rebuilt
+    _write_features(static_dir, rng, "SBJ01", "S01", "decimated", n_trials=44)
+    again = api.get("/predict/compare/SBJ01/S01", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert again.headers["etag"] != etag
+
+
+# --- /p300/decode -------------------------------------------------------------
+def _write_test_features(static_dir, rng, events, runs_per_block=None):
+    sess = static_dir / "SBJ01" / "S01"
+    sess.mkdir(parents=True, exist_ok=True)
+    arrays = {"X": rng.normal(size=(len(events), 12)), "events": np.asarray(events)}
+    if runs_per_block is not None:
+        arrays["runs_per_block"] = runs_per_block
+    np.savez(sess / feature_filename("test"), **arrays, info=json.dumps({"feature_set": "stats"}))
+
+
+def test_decode_p300_returns_blocks(api, static_dir, rng, two_models):
+    _write_test_features(static_dir, rng, np.tile(np.arange(1, 9), 6), runs_per_block=3)
+    body = api.get("/p300/decode/SBJ01/S01", params={"prefer_subject_model": False}).json()
+    assert body["n_blocks"] == 2
+    assert all(1 <= b["predictedObject"] <= 8 for b in body["blocks"])
+
+
+@pytest.mark.parametrize(
+    "events, runs_per_block",
+    [
+        (np.tile(np.arange(1, 9), 6), None),            # runs_per_block missing
+        (np.tile(np.arange(1, 9), 6), -1),              # preprocess_all's "unknown"
+        (np.tile(np.arange(0, 8), 6), 3),               # 0-based codes
+        (np.tile(np.arange(1, 9), 6) + 4, 3),           # codes above 8
+    ],
+)
+def test_decode_p300_rejects_unusable_sessions(api, static_dir, rng, two_models, events, runs_per_block):
+    _write_test_features(static_dir, rng, events, runs_per_block)
+    for params in ({}, {"margin": 0.1}):
+        resp = api.get("/p300/decode/SBJ01/S01", params={"prefer_subject_model": False, **params})
+        assert resp.status_code == 422
+
+
+# --- /stream/predict ----------------------------------------------------------
+def test_stream_reports_bad_messages_and_keeps_the_socket(api, two_models):
+    with api.websocket_connect("/stream/predict/SBJ01?prefer_subject_model=false") as ws:
+        assert ws.receive_json()["type"] == "ready"
+
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json([1, 2, 3])
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"samples": [[0.0] * 7]})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"samples": [], "events": 5})
+        assert ws.receive_json()["type"] == "error"
+
+        # still usable: an empty chunk scores nothing, a bad one still answers
+        ws.send_json({"samples": [[0.0] * 8] * 10, "events": []})
+        ws.send_json({"samples": "x"})
+        assert ws.receive_json()["type"] == "error"
+
+
+# --- /predict/session ---------------------------------------------------------
+def test_predict_session_without_features_serves_the_stored_score(api, db):
+    db.insert_or_update_session("SBJ01", "S02", 0.42, "loso", "v1")
+    body = api.get("/predict/session/SBJ01/S02").json()
+    assert body["score"] == 0.42 and body["n_trials"] == 0
+    assert api.get("/predict/session/SBJ01/S03").status_code == 404
+
+
+def test_predict_session_writes_only_changed_scores(api, db, static_dir, rng, two_models):
+    _write_features(static_dir, rng, "SBJ01", "S01")
+    first = api.get("/predict/session/SBJ01/S01", params={"prefer_subject_model": False}).json()
+    stored = db.get_session("SBJ01", "S01")
+    assert stored["score"] == pytest.approx(first["score"])
+
+    api.get("/predict/session/SBJ01/S01", params={"prefer_subject_model": False})
+    assert db.get_session("SBJ01", "S01")["created_at"] == stored["created_at"]
+
+
+# --- /data streaming ------------------------------------------------------------
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("offset, limit, chunk_size", [(0, None, 7), (5, 12, 5), (38, None, 4), (60, None, 8)])
+def test_streamed_rows_match_the_json_body(api, static_dir, rng, offset, limit, chunk_size):
+    path = _write_features(static_dir, rng, "SBJ01", "S01")
+    with np.load(path) as d:
+        arrays = {k: d[k] for k in d.files}
+    np.savez_compressed(path, **arrays)  # as preprocess_all.py writes them
+
+    params = {"offset": offset, "chunk_size": chunk_size, **({"limit": limit} if limit else {})}
+    full = api.get("/data/SBJ01/S01/train", params=params).json()
+    lines = _ndjson(api.get("/data/SBJ01/S01/train", params={**params, "stream": True}))
+
+    header, chunks = lines[0], lines[1:]
+    assert header["type"] == "header" and header["n_trials_total"] == 40
+    assert header["rows"] == len(full["X"])
+    assert json.loads(header["info"]) == {"feature_set": "stats"}
+    assert all(len(c["X"]) <= chunk_size for c in chunks)
+    assert [c["offset"] for c in chunks] == list(range(offset, offset + header["rows"], chunk_size))
+    assert sum((c["X"] for c in chunks), []) == full["X"]
+    assert sum((c["targets"] for c in chunks), []) == full["targets"]
+
+
+def test_streamed_columns_only_read_the_requested_arrays(api, static_dir, rng):
+    _write_features(static_dir, rng, "SBJ01", "S01")
+    lines = _ndjson(api.get("/data/SBJ01/S01/train", params={"stream": True, "columns": "targets"}))
+    assert all("X" not in line for line in lines)
+    assert sum((c["targets"] for c in lines[1:]), []) == [1, 0, 0, 0] * 10
+
+
+# --- /raw/static HTTP caching ---------------------------------------------------
+@pytest.fixture
+def static_file(static_dir):
+    path = static_dir / "manifest.json"
+    path.write_bytes(bytes(range(256)) * 4)
+    return path
+
+
+def test_static_file_etag_and_304(api, static_file):
+    first = api.get("/raw/static/manifest.json")
+    assert first.status_code == 200 and first.content == static_file.read_bytes()
+    etag = first.headers["etag"]
+    assert api.get("/raw/static/manifest.json", headers={"If-None-Match": etag}).status_code == 304
+    assert api.get("/raw/static/manifest.json", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+    assert api.get("/raw/static/manifest.json", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "range_header, start, end",
+    [("bytes=0-99", 0, 99), ("bytes=1000-", 1000, 1023), ("bytes=-24", 1000, 1023), ("bytes=1000-5000", 1000, 1023)],
+)
+def test_static_file_range_206(api, static_file, range_header, start, end):
+    r = api.get("/raw/static/manifest.json", headers={"Range": range_header})
+    assert r.status_code == 206
+    assert r.headers["content-range"] == f"bytes {start}-{end}/1024"
+    assert r.content == static_file.read_bytes()[start:end + 1]
+
+
+@pytest.mark.parametrize("range_header", ["bytes=1024-", "bytes=-0", "bytes=20-10", "bytes=abc-"])
+def test_static_file_unsatisfiable_range_416(api, static_file, range_header):
+    r = api.get("/raw/static/manifest.json", headers={"Range": range_header})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */1024"
+
+
+def test_static_file_multi_range_and_stale_if_range(api, static_file):
+    body = static_file.read_bytes()
+    multi = api.get("/raw/static/manifest.json", headers={"Range": "bytes=0-1,5-6"})
+    if multi.status_code == 206:
+        assert multi.headers["content-type"].startswith("multipart/byteranges")
+        assert "bytes 0-1/1024" in multi.text and "bytes 5-6/1024" in multi.text
+    else:
+        assert multi.status_code == 200 and multi.content == body
+    stale = api.get("/raw/static/manifest.json", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert stale.status_code == 200 and stale.content == body
+
+
+def test_static_path_cannot_escape(api, static_file):
+    assert api.get("/raw/static/../secrets.txt").status_code == 404
+
+
+# --- /data content negotiation --------------------------------------------------
+def test_data_content_negotiation(api, static_dir, rng):
+    path = _write_features(static_dir, rng, "SBJ01", "S01")
+    with np.load(path) as d:
+        X = d["X"]
+
+    as_json = api.get("/data/SBJ01/S01/train")
+    assert as_json.headers["content-type"] == "application/json"
+    np.testing.assert_allclose(as_json.json()["X"], X)
+
+    f32 = api.get("/data/SBJ01/S01/train", headers={"Accept": "application/x-neurosense-f32"})
+    meta, arrays = decode_f32(f32.content)
+    np.testing.assert_array_equal(arrays["X"], X)
+    np.testing.assert_array_equal(arrays["targets"], [1, 0, 0, 0] * 10)
+    assert meta["n_trials_total"] == 40
+
+    npy = api.get("/data/SBJ01/S01/train", params={"field": "targets"}, headers={"Accept": "application/x-npy"})
+    np.testing.assert_array_equal(np.load(io.BytesIO(npy.content)), [1, 0, 0, 0] * 10)
+    missing = api.get("/data/SBJ01/S01/train", params={"field": "info"}, headers={"Accept": "application/x-npy"})
+    assert missing.status_code == 400
+
+
+def test_data_f32_refuses_int64_overflow(api, static_dir, rng):
+    _write_features(static_dir, rng, "SBJ01", "S01", timestamps=np.arange(40, dtype=np.int64) + 2**40)
+    r = api.get("/data/SBJ01/S01/train", headers={"Accept": "application/x-neurosense-f32"})
+    assert r.status_code == 406
+    assert "timestamps" in r.json()["detail"]
+    assert api.get("/data/SBJ01/S01/train").json()["timestamps"][0] == 2**40
+
+
+# --- /metrics -------------------------------------------------------------------
+def _samples(api):
+    out = {}
+    for family in text_string_to_metric_families(api.get("/metrics").text):
+        for s in family.samples:
+            out[(s.name, tuple(sorted(s.labels.items())))] = s.value
+    return out
+
+
+def _value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+def test_metrics_label_requests_and_track_model_cache_hits(api, db, static_dir, rng, tmp_path, monkeypatch):
+    model = LogisticRegression().fit(rng.normal(size=(40, 12)), np.tile([1, 0, 0, 0], 10))
+    export_artifact({"model": model, "feature_set": "stats"}, tmp_path / "models" / "generalized_model.npz")
+    monkeypatch.setattr(models_serving, "GENERALIZED_MODEL_PATH", tmp_path / "models" / "generalized_model.pkl")
+    _write_features(static_dir, rng, "SBJ01", "S01")
+
+    before = _samples(api)
+    for _ in range(3):
+        assert api.get("/predict/session/SBJ01/S01", params={"prefer_subject_model": False}).status_code == 200
+    assert api.get("/data/SBJ01/S09/train").status_code == 404
+    after = _samples(api)
+
+    def delta(name, **labels):
+        return _value(after, name, **labels) - _value(before, name, **labels)
+
+    predict = {"endpoint": "/predict/session/{subject_id}/{session_id}", "method": "GET"}
+    assert delta("neurosense_request_seconds_count", **predict, status="200") == 3
+    assert delta("neurosense_request_seconds_count", endpoint="/data/{subject_id}/{session_id}/train",
+                 method="GET", status="404") == 1
+    assert delta("neurosense_stage_seconds_count", stage="predict_proba", endpoint=predict["endpoint"],
+                 model_type="loso") == 3
+
+    misses = delta("neurosense_cache_lookups_total", cache="model", result="miss")
+    hits = delta("neurosense_cache_lookups_total", cache="model", result="hit")
+    assert misses == 1 and hits >= 2
+    total_hits = _value(after, "neurosense_cache_lookups_total", cache="model", result="hit")
+    total_misses = _value(after, "neurosense_cache_lookups_total", cache="model", result="miss")
+    assert _value(after, "neurosense_cache_hit_ratio", cache="model") == pytest.approx(
+        total_hits / (total_hits + total_misses)
+    )
+
+
+# --- /admin/profiles ------------------------------------------------------------
+def test_profiled_request_is_listed_and_served(api, static_dir, rng, two_models, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(profiling, "TOKEN", "secret")
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 0.0)
+    _write_features(static_dir, rng, "SBJ01", "S01")
+    admin = {"X-Profile-Token": "secret"}
+
+    assert api.get("/admin/profiles").status_code == 403
+    assert api.get("/admin/profiles", headers={"X-Profile-Token": "guess"}).status_code == 403
+
+    api.get("/predict/session/SBJ01/S01")
+    assert api.get("/admin/profiles", headers=admin).json() == {"profiles": []}
+    api.get("/predict/session/SBJ01/S01", headers={"X-Profile": "secret"}, params={"prefer_subject_model": False})
+
+    (meta,) = api.get("/admin/profiles", headers=admin).json()["profiles"]
+    assert meta["endpoint"] == "/predict/session/{subject_id}/{session_id}"
+    assert meta["query"] == "prefer_subject_model=false"
+
+    text = api.get(f"/admin/profiles/{meta['id']}", headers=admin)
+    assert text.headers["content-type"].startswith("text/plain") and "predict_session" in text.text
+    top = api.get(f"/admin/profiles/{meta['id']}", headers=admin, params={"sort": "tottime", "limit": 5}).text
+    assert "Ordered by: internal time" in top and "due to restriction <5>" in top
+    raw = api.get(f"/admin/profiles/{meta['id']}", headers=admin, params={"format": "pstats"})
+    (tmp_path / "trace.prof").write_bytes(raw.content)
+    assert pstats.Stats(str(tmp_path / "trace.prof")).total_calls > 0
+    assert api.get("/admin/profiles/nope", headers=admin).status_code == 404
+    assert api.get(f"/admin/profiles/{meta['id']}", params={"format": "pstats"}).status_code == 403
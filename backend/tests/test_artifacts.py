@@ -0,0 +1,63 @@
+# backend/tests/test_artifacts.py
+import json
+
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LogisticRegression
+
+from app import artifacts
+from app.features import DEFAULT_FEATURE_SET
+from app.models_serving import predict_with_model
+
+
+def _bundle(X, y, whiten=False, **extra):
+    pca = PCA(n_components=10, whiten=whiten, random_state=0).fit(X)
+    model = LogisticRegression(max_iter=1000).fit(pca.transform(X), y)
+    return {"pca": pca, "model": model, "feature_set": DEFAULT_FEATURE_SET, "auc": 0.9, **extra}
+
+
+@pytest.mark.parametrize("whiten", [False, True])
+def test_fused_artifact_predicts_like_the_sklearn_bundle(tmp_path, p300_data, whiten):
+    X, y = p300_data
+    bundle = _bundle(X, y, whiten=whiten)
+    path = artifacts.export_artifact(bundle, tmp_path / "model.npz")
+
+    fused = artifacts.load_artifact(path)
+    np.testing.assert_allclose(
+        predict_with_model(fused, X), bundle["model"].predict_proba(bundle["pca"].transform(X))[:, 1], atol=1e-12
+    )
+    assert fused["feature_set"] == DEFAULT_FEATURE_SET and fused["auc"] == 0.9
+    assert fused["n_features"] == X.shape[1]
+    assert not fused["weights"].flags.writeable  # memory-mapped, read-only
+
+
+def test_spatial_filter_round_trips(tmp_path, p300_data, rng):
+    X, y = p300_data
+    spatial_filter = rng.normal(size=(8, 3))
+    path = artifacts.export_artifact(_bundle(X, y, spatial_filter=spatial_filter), tmp_path / "model.npz")
+    np.testing.assert_array_equal(artifacts.load_artifact(path)["spatial_filter"], spatial_filter)
+
+
+def test_artifact_has_no_pickled_members(tmp_path, p300_data):
+    path = artifacts.export_artifact(_bundle(*p300_data), tmp_path / "model.npz")
+    with np.load(path, allow_pickle=False) as d:
+        assert set(d.files) == {"weights", "bias", "meta"}
+        json.loads(str(d["meta"]))
+
+
+def test_compressed_or_newer_artifacts_are_rejected(tmp_path, p300_data):
+    path = artifacts.export_artifact(_bundle(*p300_data), tmp_path / "model.npz")
+    with np.load(path) as d:
+        arrays = {k: d[k] for k in d.files}
+
+    compressed = tmp_path / "compressed.npz"
+    np.savez_compressed(compressed, **arrays)
+    with pytest.raises(ValueError, match="compressed"):
+        artifacts.load_artifact(compressed)
+
+    newer = tmp_path / "newer.npz"
+    meta = {**json.loads(str(arrays["meta"])), "format": artifacts.ARTIFACT_FORMAT + 1}
+    np.savez(newer, **{**arrays, "meta": np.array(json.dumps(meta))})
+    with pytest.raises(ValueError, match="newer"):
+        artifacts.load_artifact(newer)
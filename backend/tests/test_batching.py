@@ -0,0 +1,105 @@
+# backend/tests/test_batching.py
+import threading
+
+import numpy as np
+import pytest
+
+from app import batching
+from app.artifacts import predict_fused
+from app.features import DEFAULT_FEATURE_SET
+
+
+def _fused(rng, n_features=6):
+    return {"weights": rng.normal(size=n_features), "bias": 0.1, "feature_set": DEFAULT_FEATURE_SET}
+
+
+@pytest.fixture
+def gated(monkeypatch):
+    """predict_with_model that records each call and blocks the first one until released."""
+    calls, release = [], threading.Event()
+    started = threading.Event()
+
+    def fake_predict(bundle, X):
+        calls.append(len(X))
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return predict_fused(bundle, X)
+
+    monkeypatch.setattr(batching, "predict_with_model", fake_predict)
+    return calls, started, release
+
+
+@pytest.fixture
+def batcher():
+    b = batching.InferenceBatcher(max_wait_ms=0, timeout_s=5, enabled=True)
+    yield b
+    b.close()
+
+
+def test_coalesced_requests_get_their_own_rows_back(rng, batcher, gated):
+    calls, started, release = gated
+    bundle = _fused(rng)
+    first = batcher.submit(bundle, rng.normal(size=(3, 6)))
+    assert started.wait(5)  # scheduler busy: the next requests queue up behind it
+
+    inputs = [rng.normal(size=(n, 6)) for n in (1, 5, 2, 7)]
+    futures = [batcher.submit(bundle, X) for X in inputs]
+    release.set()
+
+    assert first.result(5).shape == (3,)
+    for X, future in zip(inputs, futures):
+        np.testing.assert_allclose(future.result(5), predict_fused(bundle, X))
+    assert calls == [3, sum(len(X) for X in inputs)]
+
+
+def test_bad_request_fails_alone(rng, batcher, gated):
+    calls, started, release = gated
+    bundle = _fused(rng)
+    batcher.submit(bundle, rng.normal(size=(2, 6)))
+    assert started.wait(5)
+
+    good = rng.normal(size=(4, 6))
+    futures = [batcher.submit(bundle, good), batcher.submit(bundle, rng.normal(size=(4, 5)))]
+    release.set()
+
+    np.testing.assert_allclose(futures[0].result(5), predict_fused(bundle, good))
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+
+
+def test_requests_for_different_models_are_not_mixed(rng, batcher, gated):
+    calls, started, release = gated
+    a, b = _fused(rng), _fused(rng)
+    batcher.submit(a, rng.normal(size=(1, 6)))
+    assert started.wait(5)
+
+    Xa, Xb = rng.normal(size=(3, 6)), rng.normal(size=(2, 6))
+    fa, fb = batcher.submit(a, Xa), batcher.submit(b, Xb)
+    release.set()
+
+    np.testing.assert_allclose(fa.result(5), predict_fused(a, Xa))
+    np.testing.assert_allclose(fb.result(5), predict_fused(b, Xb))
+
+
+def test_slow_batch_falls_back_to_a_direct_call(rng, gated):
+    calls, started, release = gated
+    batcher = batching.InferenceBatcher(max_wait_ms=0, timeout_s=0.05, enabled=True)
+    bundle = _fused(rng)
+    try:
+        batcher.submit(bundle, rng.normal(size=(1, 6)))
+        assert started.wait(5)
+        X = rng.normal(size=(4, 6))
+        np.testing.assert_allclose(batcher.predict(bundle, X), predict_fused(bundle, X))
+    finally:
+        release.set()
+        batcher.close()
+    assert calls[:2] == [1, 4]  # the timed-out request was dropped, not predicted twice
+
+
+def test_wrong_width_bypasses_the_batcher(rng, batcher, gated):
+    calls, _, release = gated
+    release.set()
+    with pytest.raises(ValueError):
+        batcher.predict(_fused(rng), rng.normal(size=(2, 5)))
+    assert batcher._thread is None and calls == [2]
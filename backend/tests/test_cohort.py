@@ -0,0 +1,19 @@
+# backend/tests/test_cohort.py
+import pandas as pd
+
+from app.cohort import REPORT_COLUMNS, format_summary, summarize
+
+
+def test_empty_cohort_summary_formats():
+    summary = summarize(pd.DataFrame(columns=REPORT_COLUMNS))
+    assert summary["n_sessions"] == 0
+    assert summary["mean"]["delta_score"] is None
+    assert format_summary(summary) == "mean delta score = n/a, mean delta AUC = n/a"
+
+
+def test_summary_without_subject_models_formats():
+    report = pd.DataFrame([{c: None for c in REPORT_COLUMNS}])
+    report = report.assign(subject_id="SBJ01", session_id="S01", n_trials=40, loso_score=0.6, loso_auc=0.7)
+    summary = summarize(report.astype({c: float for c in REPORT_COLUMNS[2:]}))
+    assert format_summary(summary) == "mean delta score = n/a, mean delta AUC = n/a"
+    assert summary["mean"]["loso_auc"] == 0.7
@@ -0,0 +1,65 @@
+# backend/tests/test_encoding.py
+import io
+
+import numpy as np
+import pytest
+
+from app.encoding import decode_f32, encode_f32, encode_npy, negotiate
+
+
+def test_f32_round_trip(rng):
+    payload = {
+        "X": rng.normal(size=(5, 3)),
+        "targets": np.array([1, 0, 0, 1, 0]),
+        "flags": np.array([True, False]),
+        "cube": np.arange(24, dtype=np.int16).reshape(2, 3, 4),
+        "info": {"feature_set": "stats"},
+        "n_trials_total": 5,
+    }
+    meta, arrays = decode_f32(encode_f32(payload))
+
+    assert meta == {"info": {"feature_set": "stats"}, "n_trials_total": 5}
+    assert list(arrays) == ["X", "targets", "flags", "cube"]
+    np.testing.assert_allclose(arrays["X"], payload["X"].astype(np.float32))
+    assert arrays["X"].dtype == np.float32
+    np.testing.assert_array_equal(arrays["targets"], payload["targets"])
+    np.testing.assert_array_equal(arrays["flags"], [1, 0])
+    np.testing.assert_array_equal(arrays["cube"], payload["cube"])
+
+
+def test_f32_accepts_int64_within_int32():
+    values = np.array([-(2**31), 0, 2**31 - 1], dtype=np.int64)
+    np.testing.assert_array_equal(decode_f32(encode_f32({"events": values}))[1]["events"], values)
+
+
+@pytest.mark.parametrize(
+    "values", [np.array([2**31], dtype=np.int64), np.array([-(2**31) - 1]), np.array([2**32], dtype=np.uint64)]
+)
+def test_f32_refuses_ints_outside_int32(values):
+    with pytest.raises(ValueError, match="outside int32"):
+        encode_f32({"timestamps": values})
+
+
+def test_f32_refuses_non_numeric_arrays():
+    with pytest.raises(ValueError, match="no application/x-neurosense-f32 encoding"):
+        encode_f32({"names": np.array(["a", "b"])})
+
+
+def test_npy_round_trip_keeps_dtype():
+    arr = np.array([[2**40, -1]], dtype=np.int64)
+    out = np.load(io.BytesIO(encode_npy(arr)), allow_pickle=False)
+    assert out.dtype == np.int64
+    np.testing.assert_array_equal(out, arr)
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        (None, "application/json"),
+        ("*/*", "application/json"),
+        ("application/x-npy", "application/x-npy"),
+        ("application/x-neurosense-f32, application/json;q=0.5", "application/x-neurosense-f32"),
+    ],
+)
+def test_negotiate(accept, media_type):
+    assert negotiate(accept) == media_type
@@ -0,0 +1,108 @@
+# backend/tests/test_features.py
+import json
+
+import numpy as np
+import pytest
+
+from app.features import (
+    DEFAULT_FEATURE_SET,
+    apply_spatial_filter,
+    extract,
+    feature_filename,
+    npz_feature_set,
+    spatial_feature_set,
+)
+from app.models_serving import FeatureSetMismatch, predict_with_model
+from app.train_models import fit_xdawn
+
+
+@pytest.fixture
+def epochs(rng):
+    """(trials, channels, samples) with a target response on a mix of channels."""
+    y = np.tile([1, 0, 0, 0], 30)
+    X = rng.normal(size=(len(y), 8, 175))
+    bump = np.exp(-0.5 * ((np.arange(175) - 75) / 10.0) ** 2)
+    X += np.outer(y, rng.normal(size=8))[:, :, None] * bump
+    return X, y
+
+
+def test_xdawn_filter_shapes(epochs):
+    X, y = epochs
+    W = fit_xdawn(X, y, n_filters=4)
+    assert W.shape == (8, 4)
+
+    filtered = apply_spatial_filter(X, W)
+    assert filtered.shape == (len(X), 4, 175)
+    np.testing.assert_allclose(filtered[5], W.T @ X[5])
+
+
+def test_spatial_feature_set_names_the_filter(epochs, rng):
+    W = fit_xdawn(*epochs, n_filters=4)
+    name = spatial_feature_set("decimated", W)
+    assert name.startswith("decimated~") and len(name) == len("decimated~") + 8
+    assert spatial_feature_set("decimated", W.copy()) == name
+    assert spatial_feature_set("decimated", fit_xdawn(*epochs, n_filters=4)) == name
+    assert spatial_feature_set("decimated", W + 1e-9) != name
+    assert spatial_feature_set("decimated") == "decimated"
+
+
+def test_spatial_feature_set_requires_its_filter(epochs, rng):
+    X, y = epochs
+    W = fit_xdawn(X, y, n_filters=4)
+    name = spatial_feature_set("stats", W)
+
+    np.testing.assert_allclose(extract(X, name, spatial_filter=W), extract(apply_spatial_filter(X, W), "stats"))
+    with pytest.raises(ValueError, match="needs its spatial filter"):
+        extract(X, name)
+    with pytest.raises(ValueError, match="does not match"):
+        extract(X, name, spatial_filter=rng.normal(size=(8, 4)))
+
+
+@pytest.mark.parametrize(
+    "feature_set, n_features",
+    [("stats", 8 * 4), ("decimated", 8 * 12), ("bandpower", 8 * 5), ("multiwindow", 8 * 5), ("stats+bandpower", 72)],
+)
+def test_feature_set_shapes_and_determinism(rng, feature_set, n_features):
+    trials = rng.normal(size=(6, 8, 350))
+    X = extract(trials, feature_set)
+    assert X.shape == (6, n_features)
+    assert np.isfinite(X).all()
+    np.testing.assert_array_equal(extract(trials.copy(), feature_set), X)
+    # trials are independent: features of a subset are the subset of the features
+    np.testing.assert_allclose(extract(trials[2:4], feature_set), X[2:4])
+
+
+def test_decimated_and_multiwindow_values():
+    trials = np.broadcast_to(np.arange(350, dtype=float), (1, 8, 350))
+    # window 100-700 ms = samples 25..174, binned by 12 samples
+    np.testing.assert_allclose(extract(trials, "decimated")[0, :12], 25 + 12 * np.arange(12) + 5.5)
+    # 200 ms sub-windows starting every 100 ms from 100 ms
+    np.testing.assert_allclose(extract(trials, "multiwindow")[0, :5], [49.5, 74.5, 99.5, 124.5, 149.5])
+
+
+def test_unknown_feature_set_is_rejected(rng):
+    with pytest.raises(ValueError, match="Unknown feature set"):
+        extract(rng.normal(size=(1, 8, 350)), "wavelets")
+
+
+@pytest.mark.parametrize("feature_set", [DEFAULT_FEATURE_SET, "decimated", "decimated+bandpower"])
+def test_feature_file_round_trip(tmp_path, feature_set):
+    path = tmp_path / feature_filename("train", feature_set)
+    np.savez(path, X=np.zeros((2, 3)), info=json.dumps({"feature_set": feature_set}))
+    with np.load(path) as d:
+        assert npz_feature_set(d) == feature_set
+    assert (path.name == "train_features.npz") == (feature_set == DEFAULT_FEATURE_SET)
+
+
+def test_npz_without_info_is_the_default_set(tmp_path):
+    np.savez(tmp_path / "old.npz", X=np.zeros((2, 3)))
+    with np.load(tmp_path / "old.npz") as d:
+        assert npz_feature_set(d) == DEFAULT_FEATURE_SET
+
+
+def test_model_rejects_features_of_another_set(rng):
+    bundle = {"weights": rng.normal(size=40), "bias": 0.0, "feature_set": "bandpower"}
+    X = rng.normal(size=(3, 40))
+    assert predict_with_model(bundle, X, "bandpower").shape == (3,)
+    with pytest.raises(FeatureSetMismatch, match="expects feature set 'bandpower'"):
+        predict_with_model(bundle, X, "multiwindow")
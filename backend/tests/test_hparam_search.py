@@ -0,0 +1,78 @@
+# backend/tests/test_hparam_search.py
+import json
+
+import numpy as np
+import pytest
+
+from app import hparam_search, train_models
+from app.features import DEFAULT_FEATURE_SET, feature_filename
+
+
+@pytest.fixture(autouse=True)
+def empty_feature_cache():
+    train_models.clear_feature_cache()
+    yield
+    train_models.clear_feature_cache()
+
+
+@pytest.fixture
+def store(tmp_path, rng):
+    """Three subjects, one session each, 20 feature columns."""
+    for sid in (1, 2, 3):
+        sess = tmp_path / "static_data" / f"SBJ{sid:02d}" / "S01"
+        sess.mkdir(parents=True)
+        y = np.tile([1, 0, 0, 0], 20)
+        X = rng.normal(size=(len(y), 20)) + y[:, None]
+        np.savez(
+            sess / feature_filename("train", DEFAULT_FEATURE_SET),
+            X=X.astype(np.float32), targets=y, info=json.dumps({"feature_set": DEFAULT_FEATURE_SET}),
+        )
+    return tmp_path
+
+
+def test_clip_settings_dedupes_in_order():
+    settings = hparam_search.expand_grid({"n_components": [8, 32, 64], "C": [0.1, 1.0]})
+    clipped = hparam_search.clip_settings(settings, 20)
+    assert clipped == [
+        {"C": 0.1, "n_components": 8},
+        {"C": 0.1, "n_components": 20},
+        {"C": 1.0, "n_components": 8},
+        {"C": 1.0, "n_components": 20},
+    ]
+
+
+@pytest.mark.parametrize("mode", ["subject", "loso"])
+def test_search_leaderboard_has_one_row_per_effective_setting(store, mode):
+    board = hparam_search.run_search(
+        str(store / "data"),
+        mode=mode,
+        sessions=[1],
+        grid={"n_components": [4, 32, 64], "C": [0.1, 1.0]},
+        n_jobs=1,
+        output_dir=str(store / "search"),
+        feature_store=str(store / "static_data"),
+    )
+    assert len(board) == 4
+    assert not board.duplicated(["n_components", "C"]).any()
+    assert set(board["n_components"]) == {4, 20}
+
+    trials = (store / "search" / f"{mode}_search_trials.csv").read_text().splitlines()
+    assert len(trials) == 1 + 4 * 3  # header + settings × subjects
+    assert (board["fit_time_s"] >= board["clf_fit_time_s"]).all()
+
+
+@pytest.mark.parametrize("mode, params", [("subject", train_models.SUBJECT_PARAMS), ("loso", train_models.LOSO_PARAMS)])
+def test_search_uses_the_production_solver(store, monkeypatch, mode, params):
+    solvers = set()
+
+    class Spy(hparam_search.LogisticRegression):
+        def fit(self, X, y):
+            solvers.add(self.solver)
+            return super().fit(X, y)
+
+    monkeypatch.setattr(hparam_search, "LogisticRegression", Spy)
+    hparam_search.run_search(
+        str(store / "data"), mode=mode, sessions=[1], grid={"n_components": [4], "C": [0.1]}, n_jobs=1,
+        output_dir=str(store / "search"), feature_store=str(store / "static_data"),
+    )
+    assert solvers == {params["solver"]}
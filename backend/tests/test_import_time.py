@@ -0,0 +1,35 @@
+# backend/tests/test_import_time.py
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+_SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "check_import_time.py"
+_spec = importlib.util.spec_from_file_location("check_import_time", _SCRIPT)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+
+@pytest.fixture(scope="module")
+def api_import():
+    return check_import_time.check("app.main")
+
+
+def test_api_startup_imports_no_heavy_modules(api_import):
+    _, eager, _ = api_import
+    assert eager == [], f"imported at startup, must be lazy: {eager}"
+
+
+def test_api_startup_import_budget(api_import):
+    # NEUROSENSE_IMPORT_BUDGET_MS loosens the budget on slow or shared runners
+    budget_ms = float(os.getenv("NEUROSENSE_IMPORT_BUDGET_MS", check_import_time.BUDGET_MS))
+    total_ms, _, _ = api_import
+    assert total_ms <= budget_ms, f"import app.main took {total_ms:.0f} ms (budget {budget_ms:.0f} ms)"
+
+
+def test_forbidden_import_is_detected(tmp_path, monkeypatch):
+    (tmp_path / "eager_mod.py").write_text("import json\nimport pandas\n")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    _, eager, _ = check_import_time.check("eager_mod")
+    assert eager == ["pandas"]
@@ -0,0 +1,78 @@
+# backend/tests/test_incremental.py
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from app.artifacts import fuse_weights, sigmoid
+from app import incremental
+from app.incremental import _ipca_from_pca, _project_weights, save_versioned, update_bundle
+
+
+def _batch_bundle(X, y):
+    pca = PCA(n_components=20).fit(X)
+    return {"pca": pca, "model": LogisticRegression(max_iter=500).fit(pca.transform(X), y)}
+
+
+def _streaming_bundle(X, y):
+    # what train_loso_streaming saves: whitened IncrementalPCA + SGD
+    ipca = IncrementalPCA(n_components=20, whiten=True)
+    for chunk in np.array_split(X, 4):
+        ipca.partial_fit(chunk)
+    model = SGDClassifier(loss="log_loss", random_state=0).fit(ipca.transform(X), y)
+    return {"pca": ipca, "model": model}
+
+
+@pytest.mark.parametrize("make_bundle", [_batch_bundle, _streaming_bundle])
+def test_zero_sample_update_keeps_predictions(make_bundle, p300_data):
+    X, y = p300_data
+    bundle = make_bundle(X, y)
+    expected = bundle["model"].predict_proba(bundle["pca"].transform(X))[:, 1]
+
+    # warm start without new samples: state conversion + weight projection only
+    ipca = _ipca_from_pca(bundle["pca"])
+    w, b = _project_weights(*fuse_weights(bundle["pca"], bundle["model"]), ipca)
+
+    np.testing.assert_allclose(sigmoid(ipca.transform(X) @ w + b), expected, atol=1e-8)
+
+
+def test_ipca_from_pca_matches_batch_transform(p300_data):
+    X, _ = p300_data
+    pca = PCA(n_components=20).fit(X)
+    ipca = _ipca_from_pca(pca)
+    np.testing.assert_allclose(ipca.transform(X), pca.transform(X), atol=1e-10)
+    assert ipca.n_samples_seen_ == X.shape[0]
+
+
+@pytest.mark.parametrize("make_bundle", [_batch_bundle, _streaming_bundle])
+def test_update_bundle_bumps_version_and_keeps_input(make_bundle, p300_data):
+    X, y = p300_data
+    bundle = make_bundle(X[:300], y[:300])
+    before = bundle["model"].predict_proba(bundle["pca"].transform(X))[:, 1]
+
+    updated = update_bundle(bundle, X[300:], y[300:])
+
+    assert updated["version"] == 1 and updated["incremental"]
+    assert updated["n_samples_seen"] == X.shape[0]
+    np.testing.assert_array_equal(bundle["model"].predict_proba(bundle["pca"].transform(X))[:, 1], before)
+    # a small warm-started step: close to the previous model, not re-learned from scratch
+    after = updated["model"].predict_proba(updated["pca"].transform(X))[:, 1]
+    assert np.corrcoef(before, after)[0, 1] > 0.9
+
+
+def test_save_versioned_keeps_the_newest_versions(p300_data, tmp_path, monkeypatch):
+    X, y = p300_data
+    bundle = _batch_bundle(X, y)
+    current = tmp_path / "SBJ01_model.pkl"
+    (tmp_path / "versions").mkdir()
+    (tmp_path / "versions" / "SBJ02_model.v0001.pkl").touch()  # another model's history
+
+    for version in range(1, 13):
+        save_versioned({**bundle, "version": version}, current, keep=3)
+    names = sorted(p.name for p in (tmp_path / "versions").iterdir())
+    assert names == ["SBJ01_model.v0010.pkl", "SBJ01_model.v0011.pkl", "SBJ01_model.v0012.pkl", "SBJ02_model.v0001.pkl"]
+    assert current.exists() and (tmp_path / "SBJ01_model.npz").exists()
+
+    monkeypatch.setattr(incremental, "KEEP_VERSIONS", 0)
+    save_versioned({**bundle, "version": 13}, current)
+    assert len(list((tmp_path / "versions").glob("SBJ01_model.v*.pkl"))) == 4
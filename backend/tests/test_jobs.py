@@ -0,0 +1,96 @@
+# backend/tests/test_jobs.py
+import threading
+import time
+
+import pytest
+
+from app import jobs
+
+RAN = []
+GATE = threading.Event()
+
+
+@jobs.job_kind("test_record")
+def _record(job, name):
+    RAN.append(name)
+    return name
+
+
+@jobs.job_kind("test_gate")
+def _gate(job):
+    GATE.wait(5)
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    RAN.clear()
+    GATE.clear()
+    yield
+    GATE.set()
+
+
+def _wait(queue, job_ids, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(queue.get(i).status in jobs.FINISHED for i in job_ids):
+            return
+        time.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+
+def test_identical_queued_job_is_reused_and_promoted():
+    queue = jobs.JobQueue(workers=0, db_path=None)
+    job, created = queue.submit("test_record", {"name": "a"}, priority="low")
+    same, created_again = queue.submit("test_record", {"name": "a"}, priority="high")
+    other, _ = queue.submit("test_record", {"name": "b"})
+    assert created and not created_again
+    assert same is job and job.priority == jobs.PRIORITIES["high"]
+    assert other is not job
+
+
+def test_bad_kind_or_params_are_rejected():
+    queue = jobs.JobQueue(workers=0, db_path=None)
+    with pytest.raises(ValueError, match="Unknown job kind"):
+        queue.submit("no_such_kind")
+    with pytest.raises(ValueError, match="Bad params"):
+        queue.submit("test_record", {"nme": "a"})
+
+
+def test_higher_priority_runs_first_fifo_within_one():
+    queue = jobs.JobQueue(workers=1, db_path=None)
+    try:
+        gate, _ = queue.submit("test_gate")  # holds the only worker while the rest queue up
+        while gate.status != jobs.RUNNING:
+            time.sleep(0.01)
+        submitted = [
+            queue.submit("test_record", {"name": name}, priority=priority)[0]
+            for name, priority in [("low", "low"), ("normal-1", "normal"), ("high", "high"), ("normal-2", "normal")]
+        ]
+        submitted.append(queue.submit("test_record", {"name": "low"}, priority="high")[0])  # promotes "low"
+        GATE.set()
+        _wait(queue, [gate.id] + [j.id for j in submitted])
+    finally:
+        GATE.set()
+        queue.close()
+    assert RAN == ["high", "low", "normal-1", "normal-2"]
+
+
+def test_queued_jobs_survive_a_restart(tmp_path):
+    db_path = tmp_path / "jobs.sqlite"
+    queue = jobs.JobQueue(workers=0, db_path=str(db_path))
+    queued, _ = queue.submit("test_record", {"name": "resumed"})
+    cancelled, _ = queue.submit("test_record", {"name": "dropped"})
+    queue.cancel(cancelled.id)
+    queue.close()
+
+    restarted = jobs.JobQueue(workers=1, db_path=str(db_path))
+    try:
+        restarted.start()
+        _wait(restarted, [queued.id])
+        job = restarted.get(queued.id)
+        assert job.status == jobs.SUCCEEDED and job.result == "resumed"
+        assert job.message == "requeued after restart"
+        assert restarted.get(cancelled.id).status == jobs.CANCELLED
+    finally:
+        restarted.close()
+    assert RAN == ["resumed"]
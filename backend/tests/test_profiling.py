@@ -0,0 +1,75 @@
+# backend/tests/test_profiling.py
+import cProfile
+
+import pytest
+
+from app import profiling
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(profiling, "TOKEN", "secret")
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(profiling, "KEEP", 3)
+    return tmp_path / "profiles"
+
+
+def _scope(header=None):
+    return {"headers": [(b"x-profile", header.encode())] if header else []}
+
+
+def test_token_header_opts_in(profiles):
+    assert profiling.should_profile(_scope("secret"))
+    assert not profiling.should_profile(_scope("guess"))
+    assert not profiling.should_profile(_scope())
+    assert not profiling.should_profile(None)
+
+
+def test_no_configured_token_never_matches(profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "TOKEN", None)
+    assert not profiling.should_profile(_scope("None"))
+    assert not profiling.token_ok(None)
+
+
+def test_sample_rate(profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 0.25)
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.2)
+    assert profiling.should_profile(_scope())
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.3)
+    assert not profiling.should_profile(_scope())
+
+
+def test_only_the_slowest_traces_are_kept(profiles):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    sum(range(100))
+    profiler.disable()
+
+    stored = {}
+    for i, duration in enumerate([5.0, 1.0, 9.0, 3.0, 7.0, 2.0]):
+        stored[duration] = profiling._store(profiler, {"id": f"p{i}", "duration_ms": duration})
+
+    assert [m["duration_ms"] for m in profiling.list_profiles()] == [9.0, 7.0, 5.0]
+    assert sorted(p.name for p in profiles.iterdir()) == sorted(
+        f"{stored[d]}{suffix}" for d in (9.0, 7.0, 5.0) for suffix in (".json", ".prof")
+    )
+    assert stored[2.0] is None  # slower than nothing kept: never written
+    assert "function calls" in profiling.profile_report(stored[9.0])
+
+
+def test_profiled_marks_the_request_and_stores_it(profiles, monkeypatch):
+    seen = []
+
+    @profiling.profiled
+    def endpoint():
+        seen.append(profiling.profiling_active())
+        return "ok"
+
+    assert endpoint() == "ok" and seen == [False]
+    assert profiling.list_profiles() == []
+
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 1.0)
+    assert endpoint() == "ok" and seen == [False, True]
+    assert not profiling.profiling_active()
+    assert len(profiling.list_profiles()) == 1
@@ -0,0 +1,127 @@
+# backend/tests/test_shared_store.py
+import json
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from app import shared_store
+from app.artifacts import export_artifact
+
+
+@pytest.fixture
+def sources(tmp_path, rng):
+    """A feature store with one session and a models dir with an artifact and a legacy .pkl."""
+    static_dir, models_dir = tmp_path / "static_data", tmp_path / "models"
+    sess = static_dir / "SBJ01" / "S01"
+    sess.mkdir(parents=True)
+    np.savez_compressed(
+        sess / "train_features.npz",
+        X=rng.normal(size=(20, 6)).astype(np.float32),
+        targets=np.tile([1, 0, 0, 0], 5),
+        info=json.dumps({"feature_set": "stats"}),
+    )
+    model = LogisticRegression().fit(rng.normal(size=(20, 6)), np.tile([1, 0, 0, 0], 5))
+    export_artifact({"model": model, "feature_set": "stats"}, models_dir / "subject_models" / "SBJ01_model.npz")
+    (models_dir / "generalized").mkdir(parents=True)
+    joblib.dump({"model": model, "pca": None, "feature_set": "stats"}, models_dir / "generalized" / "generalized_model.pkl")
+    (models_dir / "subject_models" / "versions").mkdir()
+    joblib.dump({"model": model}, models_dir / "subject_models" / "versions" / "SBJ01_model.v0001.pkl")
+    return static_dir, models_dir
+
+
+@pytest.fixture
+def store(tmp_path, sources, monkeypatch):
+    store_dir = tmp_path / "shm"
+    monkeypatch.setenv(shared_store.STORE_ENV, str(store_dir))
+    static_dir, models_dir = sources
+    build = lambda **kw: shared_store.build_store(store_dir, static_dir, models_dir, **kw)  # noqa: E731
+    return store_dir, build
+
+
+def _touch(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_build_writes_manifest_and_current(store, sources):
+    store_dir, build = store
+    static_dir, models_dir = sources
+    manifest = build()
+
+    npz = static_dir / "SBJ01" / "S01" / "train_features.npz"
+    assert list(manifest["features"]) == [str(npz.resolve())]
+    assert manifest["features"][str(npz.resolve())]["stamp"] == shared_store._stamp(npz)
+    assert sorted(Path(p).name for p in manifest["models"]) == ["SBJ01_model.npz", "generalized_model.pkl"]
+    current = store_dir / os.readlink(store_dir / "current")
+    assert json.loads((current / "manifest.json").read_text()) == manifest
+    # the legacy .pkl is fused into an artifact once, at build time
+    assert (current / "models" / "generalized" / "generalized_model.npz").exists()
+
+
+def test_open_features_maps_the_store_copy(store, sources):
+    _, build = store
+    build()
+    npz = sources[0] / "SBJ01" / "S01" / "train_features.npz"
+
+    with shared_store.open_features(npz) as d:
+        assert isinstance(d, shared_store.SharedArrays)
+        assert not d["X"].flags.writeable
+        with np.load(npz) as ref:
+            np.testing.assert_array_equal(d["X"], ref["X"])
+            assert sorted(d.files) == sorted(ref.files)
+            assert str(d["info"]) == str(ref["info"])
+
+
+def test_changed_sources_fall_back(store, sources):
+    _, build = store
+    build()
+    static_dir, models_dir = sources
+    npz = static_dir / "SBJ01" / "S01" / "train_features.npz"
+    model = models_dir / "subject_models" / "SBJ01_model.npz"
+    assert shared_store.shared_model_path(model) is not None
+
+    _touch(npz)
+    _touch(model)
+    with shared_store.open_features(npz) as d:
+        assert isinstance(d, np.lib.npyio.NpzFile)
+    assert shared_store.shared_model_path(model) is None
+    assert shared_store.shared_model_path(models_dir / "unknown_model.npz") is None
+
+
+def test_rebuild_switches_generation_and_prunes(store, sources):
+    store_dir, build = store
+    build()
+    first = shared_store.attached_store()
+    npz = sources[0] / "SBJ01" / "S01" / "train_features.npz"
+    _touch(npz)
+
+    build()
+    second = shared_store.attached_store()
+    assert second.generation != first.generation
+    assert isinstance(shared_store.open_features(npz), shared_store.SharedArrays)
+
+    build(keep=2)
+    gens = sorted(p.name for p in store_dir.glob("gen-*"))
+    assert len(gens) == 2 and first.generation not in gens
+    assert os.readlink(store_dir / "current") in gens
+
+
+@pytest.mark.parametrize("setup", ["unset", "missing_dir", "not_built"])
+def test_no_store_falls_back_to_the_source(tmp_path, sources, monkeypatch, setup):
+    if setup == "unset":
+        monkeypatch.delenv(shared_store.STORE_ENV, raising=False)
+    else:
+        store_dir = tmp_path / ("nope" if setup == "missing_dir" else "empty")
+        if setup == "not_built":
+            store_dir.mkdir()
+        monkeypatch.setenv(shared_store.STORE_ENV, str(store_dir))
+
+    static_dir, models_dir = sources
+    assert shared_store.attached_store() is None
+    with shared_store.open_features(static_dir / "SBJ01" / "S01" / "train_features.npz") as d:
+        assert isinstance(d, np.lib.npyio.NpzFile)
+    assert shared_store.shared_model_path(models_dir / "subject_models" / "SBJ01_model.npz") is None
@@ -0,0 +1,75 @@
+# backend/tests/test_streaming.py
+import numpy as np
+import pytest
+from scipy.io import savemat
+
+from app.models_serving import features_from_epochs, predict_with_model
+from app.preprocess import process_mat_file
+from app.streaming import TRIAL_MS, OnlineP300Scorer
+
+FS = 250.0
+EPOCH_LEN = int(TRIAL_MS * FS / 1000)
+
+
+@pytest.fixture
+def recording(rng):
+    """(n_samples, 8) raw EEG and (onset, code) events every 125 ms."""
+    n = int(6 * FS)
+    t = np.arange(n) / FS
+    raw = rng.normal(scale=5.0, size=(n, 8)) + 20 * np.sin(2 * np.pi * 50 * t)[:, None] + 100.0
+    onsets = np.arange(50, n - EPOCH_LEN, 31)
+    events = [(int(o), int(i % 8) + 1) for i, o in enumerate(onsets)]
+    return raw, events
+
+
+@pytest.fixture
+def bundle(rng):
+    n_features = features_from_epochs({}, np.zeros((1, 8, EPOCH_LEN))).shape[1]
+    return {"weights": rng.normal(scale=0.05, size=n_features), "bias": 0.0, "feature_set": "stats"}
+
+
+def _stream(bundle, raw, events, chunk_sizes):
+    scorer = OnlineP300Scorer(bundle)
+    out, start, sizes = [], 0, iter(chunk_sizes)
+    while start < len(raw):
+        stop = min(start + next(sizes), len(raw))
+        chunk_events = [(o - start, c) for o, c in events if start <= o < stop]
+        out += scorer.push(raw[start:stop], chunk_events)
+        start = stop
+    return out
+
+
+def test_scores_do_not_depend_on_chunking(bundle, recording, rng):
+    raw, events = recording
+    # chunks stay well below the 4 s ring buffer, so every event is scored
+    steady = _stream(bundle, raw, events, [250] * len(raw))
+    jittery = _stream(bundle, raw, events, rng.integers(1, 60, size=len(raw)))
+
+    assert [t["event_index"] for t in jittery] == list(range(len(events)))
+    np.testing.assert_allclose([t["prob"] for t in jittery], [t["prob"] for t in steady], atol=1e-12)
+
+
+def test_streaming_matches_offline_session_scoring(bundle, tmp_path, rng):
+    """A recorded session scored online gives the process_mat_file / predict_with_model result."""
+    n = int(30 * FS)
+    t = np.arange(n) / FS
+    raw = rng.normal(scale=2.0, size=(n, 8)) + 20 * np.sin(2 * np.pi * 50 * t)[:, None] + 100.0
+    onsets = np.arange(50, n - EPOCH_LEN, 100)
+    p300 = 8 * np.exp(-0.5 * ((np.arange(EPOCH_LEN) - 75) / 12.0) ** 2)
+    for onset in onsets[::4]:
+        raw[onset:onset + EPOCH_LEN] += np.outer(p300, rng.normal(size=8) + 1)
+
+    # the .mat as the headset software writes it: (channels, samples, trials) cut at each onset
+    trials = np.stack([raw[o:o + EPOCH_LEN].T for o in onsets], axis=-1)
+    savemat(tmp_path / "trainData.mat", {"trainData": trials})
+    X_offline, _ = process_mat_file(str(tmp_path / "trainData.mat"))
+    offline = predict_with_model(bundle, X_offline)
+
+    streamed = _stream(bundle, raw, [(int(o), 1) for o in onsets], [25] * len(raw))
+    assert len(streamed) == len(onsets)
+    np.testing.assert_allclose([t["prob"] for t in streamed], offline, atol=1e-9)
+
+
+def test_push_rejects_wrong_channel_count(bundle):
+    with pytest.raises(ValueError, match="shape"):
+        OnlineP300Scorer(bundle).push(np.zeros((10, 7)))
@@ -0,0 +1,197 @@
+# backend/tests/test_train_models.py
+import json
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+from scipy.io import savemat
+from sklearn.decomposition import PCA
+
+from app import train_models
+from app.features import DEFAULT_FEATURE_SET, feature_filename, spatial_feature_set
+from app.preprocess import process_mat_file
+
+
+@pytest.fixture(autouse=True)
+def empty_feature_cache():
+    train_models.clear_feature_cache()
+    yield
+    train_models.clear_feature_cache()
+
+
+def _write_session(tmp_path, rng, subject_id, session_id, n_trials=80, n_features=30, feature_set=DEFAULT_FEATURE_SET):
+    """Raw placeholders under data/ plus the npz preprocess_all.py would write."""
+    sess = f"SBJ{subject_id:02d}/S{session_id:02d}"
+    raw = tmp_path / "data" / sess / "Train"
+    raw.mkdir(parents=True, exist_ok=True)
+    y = np.tile([1, 0, 0, 0], n_trials // 4)
+    (raw / "trainData.mat").write_bytes(b"raw")
+    np.savetxt(raw / "trainTargets.txt", y, fmt="%d")
+
+    store = tmp_path / "static_data" / sess
+    store.mkdir(parents=True, exist_ok=True)
+    X = rng.normal(size=(n_trials, n_features)) + y[:, None]
+    npz_path = store / feature_filename("train", feature_set)
+    np.savez(npz_path, X=X.astype(np.float32), targets=y, info=json.dumps({"feature_set": feature_set}))
+    # the npz is newer than its sources, as right after preprocess_all.py
+    for src in (raw / "trainData.mat", raw / "trainTargets.txt"):
+        os.utime(src, (1_000_000, 1_000_000))
+    return npz_path, X, y
+
+
+@pytest.fixture
+def raw_calls(monkeypatch):
+    calls = []
+
+    def fake_process_mat_file(mat_file, feature_set=DEFAULT_FEATURE_SET, spatial_filter=None):
+        calls.append(mat_file)
+        return np.full((80, 30), 7.0), {}
+
+    monkeypatch.setattr(train_models, "process_mat_file", fake_process_mat_file)
+    return calls
+
+
+def _load(tmp_path, subject_id=1, session_id=1, **kwargs):
+    return train_models.load_session_features(
+        str(tmp_path / "data"), subject_id, session_id, feature_store=str(tmp_path / "static_data"), **kwargs
+    )
+
+
+def test_fresh_npz_is_read_without_touching_raw(tmp_path, rng, raw_calls):
+    _, X, y = _write_session(tmp_path, rng, 1, 1)
+    feats, labels = _load(tmp_path)
+    assert raw_calls == []
+    np.testing.assert_allclose(feats, X.astype(np.float32))
+    np.testing.assert_array_equal(labels, y)
+
+
+def test_stale_npz_falls_back_to_raw_processing(tmp_path, rng, raw_calls):
+    npz_path, _, _ = _write_session(tmp_path, rng, 1, 1)
+    os.utime(npz_path, (0, 0))  # older than trainData.mat
+    feats, _ = _load(tmp_path)
+    assert len(raw_calls) == 1 and raw_calls[0].endswith("trainData.mat")
+    assert (feats == 7.0).all()
+
+
+def test_npz_of_another_feature_set_falls_back_to_raw(tmp_path, rng, raw_calls):
+    npz_path, _, _ = _write_session(tmp_path, rng, 1, 1)
+    npz_path.rename(npz_path.with_name(feature_filename("train", "decimated")))  # right name, wrong info
+    feats, _ = _load(tmp_path, feature_set="decimated")
+    assert len(raw_calls) == 1 and (feats == 7.0).all()
+
+
+def test_subject_training_fills_the_parent_cache_for_loso(tmp_path, rng):
+    store = str(tmp_path / "static_data")
+    for sid in (1, 2):
+        for sess in (1, 2):
+            _write_session(tmp_path, rng, sid, sess)
+
+    summary = train_models.train_all_subjects(
+        str(tmp_path / "data"), subjects=[1, 2], sessions=[1, 2], output_dir=str(tmp_path / "models"),
+        n_jobs=2, feature_store=store,
+    )
+    assert sorted(summary["Subject"]) == ["SBJ01", "SBJ02"]
+
+    # LOSO in the same process must not read a feature file again
+    for npz_path in (tmp_path / "static_data").rglob("*.npz"):
+        npz_path.unlink()
+    X, y = train_models.load_subject_data(str(tmp_path / "data"), 2, [1, 2], feature_store=store)
+    assert X.shape == (160, 30) and len(y) == 160
+
+
+def test_failed_subject_is_not_reported_with_a_stale_auc(tmp_path, rng, monkeypatch):
+    store = str(tmp_path / "static_data")
+    for sid in (1, 2):
+        _write_session(tmp_path, rng, sid, 1)
+    run = lambda **kw: train_models.train_all_subjects(  # noqa: E731
+        str(tmp_path / "data"), subjects=[1, 2], sessions=[1], output_dir=str(tmp_path / "models"),
+        n_jobs=1, feature_store=store, audit_pickle=False, **kw,
+    )
+    first = run()
+    assert list(first["status"]) == ["trained", "trained"]
+
+    job = train_models._train_subject_job
+    monkeypatch.setattr(
+        train_models, "_train_subject_job",
+        lambda base_path, sid, *a, **kw: None if sid == 2 else job(base_path, sid, *a, **kw),
+    )
+    summary = run(force=True).set_index("Subject")
+    assert summary.loc["SBJ01", "status"] == "trained"
+    assert summary.loc["SBJ02", "status"] == "failed"
+    assert summary["AUC"].isna().tolist() == [False, True]
+
+
+# --- streaming LOSO ----------------------------------------------------------
+def _streaming_store(tmp_path, rng, subjects=(1, 2, 3)):
+    for sid in subjects:
+        _write_session(tmp_path, rng, sid, 1)
+    return str(tmp_path / "static_data")
+
+
+def test_streaming_skips_a_fold_without_labelled_trials(tmp_path, rng):
+    store = _streaming_store(tmp_path, rng)
+    # SBJ03's session has no targets (as for test-only recordings)
+    path = tmp_path / "static_data" / "SBJ03" / "S01" / feature_filename("train")
+    np.savez(path, X=rng.normal(size=(80, 30)), targets=np.array([]), info=json.dumps({"feature_set": "stats"}))
+
+    results, _ = train_models.train_loso_streaming(
+        store, output_dir=str(tmp_path / "models"), params={"epochs": 1}, audit_pickle=False
+    )
+    assert list(results["Subject"]) == ["SBJ01", "SBJ02"]
+    assert (tmp_path / "models" / "generalized_model.npz").exists()
+
+
+def test_streaming_stops_tracemalloc_when_a_fold_fails(tmp_path, rng, monkeypatch):
+    store = _streaming_store(tmp_path, rng)
+
+    def broken_fold(*args):
+        raise RuntimeError("fold failed")
+
+    monkeypatch.setattr(train_models, "_streaming_fold", broken_fold)
+    with pytest.raises(RuntimeError):
+        train_models.train_loso_streaming(store, output_dir=str(tmp_path / "models"))
+    assert not tracemalloc.is_tracing()
+
+
+def test_streaming_without_data_raises_a_clear_error(tmp_path):
+    with pytest.raises(ValueError, match="No labelled"):
+        train_models.train_loso_streaming(str(tmp_path), subjects=[1], output_dir=str(tmp_path / "models"))
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("n_components", [5, 12])
+def test_fold_engine_pca_matches_sklearn(rng, n_components):
+    all_data = {
+        sid: (rng.normal(loc=sid, size=(60 + 10 * sid, 12)) @ rng.normal(size=(12, 12)), np.zeros(60 + 10 * sid))
+        for sid in (1, 2, 3)
+    }
+    engine = train_models.FoldEngine(all_data)
+    X_train = np.vstack([all_data[1][0], all_data[3][0]])
+
+    ours = engine.pca(n_components, exclude=2)
+    ref = PCA(n_components=n_components, svd_solver="full").fit(X_train)
+    np.testing.assert_allclose(ours.mean_, ref.mean_, atol=1e-10)
+    np.testing.assert_allclose(ours.explained_variance_, ref.explained_variance_, rtol=1e-8)
+    np.testing.assert_allclose(ours.components_, ref.components_, atol=1e-8)
+    np.testing.assert_allclose(ours.noise_variance_, ref.noise_variance_, atol=1e-8)
+    np.testing.assert_allclose(ours.transform(all_data[2][0]), ref.transform(all_data[2][0]), atol=1e-8)
+
+
+def test_raw_fallback_applies_the_spatial_filter(tmp_path, rng):
+    raw = tmp_path / "data" / "SBJ01" / "S01" / "Train"
+    raw.mkdir(parents=True)
+    savemat(raw / "trainData.mat", {"trainData": rng.normal(size=(8, 350, 40))})
+    np.savetxt(raw / "trainTargets.txt", np.tile([1, 0, 0, 0], 10), fmt="%d")
+    spatial_filter = rng.normal(size=(8, 3))
+    feature_set = spatial_feature_set(DEFAULT_FEATURE_SET, spatial_filter)
+
+    feats, _ = _load(tmp_path, feature_set=feature_set, spatial_filter=spatial_filter)
+    expected, info = process_mat_file(str(raw / "trainData.mat"), spatial_filter=spatial_filter)
+    assert info["feature_set"] == feature_set
+    assert feats.shape == (40, 4 * 3)
+    np.testing.assert_allclose(feats, expected)
+
+    train_models.clear_feature_cache()
+    with pytest.raises(ValueError, match="needs its spatial filter"):
+        _load(tmp_path, feature_set=feature_set)
@@ -0,0 +1,109 @@
+# backend/tests/test_train_report.py
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from app import stages
+from app.train_report import StackSampler, TrainingReport, activate, stage
+
+
+def test_stage_is_a_no_op_without_a_report():
+    with stage("load") as extra:
+        extra["ignored"] = 1
+    assert stages._active is None
+
+
+def test_nested_stages_inherit_labels_and_record_extras():
+    report = TrainingReport(track_memory=False)
+    with activate(report):
+        with stage("fold", fold="SBJ03"):
+            with stage("pca_fit") as extra:
+                extra["n_components"] = 32
+            with stage("clf_fit", C=0.1):
+                pass
+    assert stages._active is None
+
+    assert [r["stage"] for r in report.rows] == ["fold/pca_fit", "fold/clf_fit", "fold"]
+    pca, clf, fold = report.rows
+    assert pca["fold"] == "SBJ03" and pca["n_components"] == 32
+    assert clf["fold"] == "SBJ03" and clf["C"] == 0.1
+    assert fold["wall_s"] >= pca["wall_s"] + clf["wall_s"] - 1e-3
+    assert "peak_mb" not in fold
+    assert set(report.summary()) == {"fold", "pca_fit", "clf_fit"}
+
+
+def test_memory_is_tracked_and_tracemalloc_released():
+    report = TrainingReport()
+    with activate(report):
+        with stage("alloc"):
+            block = bytearray(8 * 2**20)
+            del block
+    assert not tracemalloc.is_tracing()
+    assert report.rows[0]["peak_mb"] >= 8
+    assert report.peak_mb >= 8
+
+
+def test_outer_tracemalloc_session_is_left_alone():
+    tracemalloc.start()
+    try:
+        report = TrainingReport()
+        with activate(report):
+            with stage("alloc"):
+                bytearray(2**20)
+        assert tracemalloc.is_tracing()
+        assert "peak_mb" not in report.rows[0]
+    finally:
+        tracemalloc.stop()
+
+
+def test_reports_nest_and_restore_the_outer_one():
+    outer, inner = TrainingReport(track_memory=False), TrainingReport(track_memory=False)
+    with activate(outer):
+        with activate(inner):
+            with stage("inner"):
+                pass
+        with stage("outer"):
+            pass
+    assert [r["stage"] for r in inner.rows] == ["inner"]
+    assert [r["stage"] for r in outer.rows] == ["outer"]
+
+
+def test_write_json_and_csv(tmp_path):
+    report = TrainingReport(track_memory=False)
+    with activate(report):
+        with stage("load", subject="SBJ01"):
+            pass
+    json_path = report.write(tmp_path, "subject_report")
+    payload = json.loads(open(json_path).read())
+    assert payload["stages"][0]["subject"] == "SBJ01"
+    assert payload["peak_mb"] is None
+    assert list(pd.read_csv(tmp_path / "subject_report.csv")["stage"]) == ["load"]
+
+
+def _busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stack_sampler_collects_collapsed_stacks(tmp_path):
+    with StackSampler(interval=0.001) as sampler:
+        _busy_leaf(0.1)
+    assert sampler.counts
+    stack, count = sampler.counts.most_common(1)[0]
+    assert stack.split(";")[-1].startswith("_busy_leaf (test_train_report.py:")
+    lines = open(sampler.write(tmp_path / "flame.folded")).read().splitlines()
+    assert lines[0] == f"{stack} {count}"
+
+
+def test_preprocess_does_not_import_the_report():
+    code = "import sys, app.preprocess; print('app.train_report' in sys.modules, 'pandas' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[1]
+    )
+    assert out.stdout.split() == ["False", "False"]
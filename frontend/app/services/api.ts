@@ -26,6 +26,14 @@ export const api = {
     apiGet<any>(
       `/predict/session/${subjectId}/${sessionId}?prefer_subject_model=${preferSubjectModel}`
     ),
+  getP300Decode: (
+    subjectId: string,
+    sessionId: string,
+    preferSubjectModel: boolean
+  ) =>
+    apiGet<any>(
+      `/p300/decode/${subjectId}/${sessionId}?prefer_subject_model=${preferSubjectModel}`
+    ),
   getNSI: (subjectId: string) => apiGet<any>(`/nsi/${subjectId}`),
   getRecommendation: (subjectId: string) =>
     apiGet<any>(`/recommend/next/${subjectId}`),
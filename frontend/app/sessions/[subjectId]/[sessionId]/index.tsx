@@ -4,7 +4,6 @@ import { View, Text, ScrollView, Pressable, Alert } from "react-native";
 import { useLocalSearchParams, useRouter } from "expo-router";
 import { useEffect, useMemo, useState } from "react";
 import { api, BASE_URL } from "@/app/services/api";
-import { aggregateP300 } from "@/app/utils/p300";
 import ObjectConfidenceBars from "@/app/components/ObjectConfidenceBars";
 import AppShell from "@/app/components/AppShell";
 import { useAuth } from "@/app/context/AuthContext";
@@ -94,19 +93,14 @@ export default function SessionScreen() {
         setRecommendedGame(rec);
       }
 
-      // --- Metadata ---
-      const metaRes = await fetch(
-        `${BASE_URL}/data/${subjectId}/${sessionId}/test`
-      );
-      const meta = await metaRes.json();
-
-      const blocks = aggregateP300(
-        pred.probs,
-        meta.events,
-        meta.runs_per_block
+      // --- Object decoding (aggregated server-side) ---
+      const decoded = await api.getP300Decode(
+        subjectId!,
+        sessionId!,
+        preferSubjectModel
       );
 
-      setBlockResults(blocks);
+      setBlockResults(decoded.blocks);
     }
 
     load().catch(console.error);